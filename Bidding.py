@@ -1,42 +1,265 @@
 import random
+import re
+import json
+from functools import partial
 from langchain_openai import ChatOpenAI
 import os
+import warnings
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from llm_calls import invoke_llm
+from prompts import BID_SYSTEM_PROMPT, build_messages, format_dialogue, instruction
 # ChatGpt model setup - initialize lazily
 _llm = None
 
+BID_STRATEGIES = ("llm", "rule", "learned")
+
+# Words that turn a mention into an accusation for the rule-based features
+ACCUSATION_WORDS = ("suspect", "suspicious", "werewolf", "wolf", "lying", "liar", "vote", "exile", "accuse")
+
 def get_llm():
+    """Fallback bid model from MODEL_NAME, used when no model registry is given."""
     global _llm
     if _llm is None:
         model_name = os.environ.get("MODEL_NAME", "gpt-4o")
-        _llm = ChatOpenAI(model=model_name, temperature=0.7)
+        _llm = ChatOpenAI(model=model_name, temperature=0.7, stream_usage=True)
     return _llm
 
-def get_bid(player_name: str, dialogue_history: str):
+def _parse_bid(response: str) -> int:
+    """Pull the first integer out of a model reply and clamp it to 0-10 (0 if none)."""
+    match = re.search(r"-?\d+", response or "")
+    if not match:
+        return 0  # Safe fallback
+    return max(0, min(10, int(match.group(0))))
+
+def get_bid(player_name: str, dialogue_history: str, llm=None):
     """
-    Calls gpt to get a bid (0-10) from a player based on the debate so far.
+    Calls the model (`llm`, else `get_llm()`) to get a bid (0-10) from a player based on the debate so far.
 
     Returns:
         (int, str): (numeric bid value, raw model output)
     """
-    prompt = f"""
-You are a player in a competitive game of Werewolf. Your name is {player_name}.
-Here is the current conversation between players:
+    # Shared system prefix and dialogue; only the last message names the bidder
+    prompt = build_messages(BID_SYSTEM_PROMPT, dialogue_history, instruction("bid", player_name=player_name))
+
+    response, _info = invoke_llm(llm or get_llm(), prompt, "bid", player=player_name)
+    return _parse_bid(response), response
+
+def llm_bid(player_name: str, debate_log: List[List[str]], dialogue_history: Optional[str] = None, models=None):
+    """
+    LLM bid strategy: one model call per player. Uses the pre-rendered
+    (bounded) `dialogue_history` when given, else formats the whole log.
+    With a model registry (`models`), the "bid" route picks the model.
+    """
+    if dialogue_history is None:
+        dialogue_history = format_dialogue(debate_log)
+    return get_bid(player_name, dialogue_history, models.for_call("bid") if models is not None else None)
 
-{dialogue_history}
+def bid_features(player_name: str, debate_log: List[List[str]], window: int = 6) -> Dict[str, float]:
+    """
+    Cheap lexical features describing how much a player has reason to speak.
+
+    - mentions: lines by others in the recent window that name the player
+    - accusations: those mentions that also contain an accusation word
+    - turns_since_spoke: lines since the player last spoke (whole log if never)
+    - has_spoken: 1.0 if the player has spoken at all
+    """
+    recent = debate_log[-window:]
+    name = player_name.lower()
+    mentions = 0
+    accusations = 0
+    for speaker, text in recent:
+        lowered = text.lower()
+        if speaker == player_name or name not in lowered:
+            continue
+        mentions += 1
+        if any(word in lowered for word in ACCUSATION_WORDS):
+            accusations += 1
 
-How strongly do you want to speak next? Return a single number from 0 to 10.
-0 means you have no desire to speak. 10 means you are extremely eager to speak.
-Only respond with the number. Do not explain.
-"""
+    turns_since_spoke = len(debate_log)
+    for idx in range(len(debate_log) - 1, -1, -1):
+        if debate_log[idx][0] == player_name:
+            turns_since_spoke = len(debate_log) - 1 - idx
+            break
 
-    response = get_llm().invoke(prompt).content.strip()
-    try:
-        bid = int(response)
-        bid = max(0, min(10, bid))
-    except ValueError:
-        bid = 0  # Safe fallback
+    return {
+        "mentions": float(mentions),
+        "accusations": float(accusations),
+        "turns_since_spoke": float(min(turns_since_spoke, window)),
+        "has_spoken": 1.0 if turns_since_spoke < len(debate_log) else 0.0,
+    }
+
+def rule_based_bid(player_name: str, debate_log: List[List[str]], dialogue_history: Optional[str] = None):
+    """
+    Rule-based bid strategy: accused or mentioned players and players who have
+    been quiet for a while want the floor. No model call.
+    """
+    f = bid_features(player_name, debate_log)
+    score = 2 + 3 * f["accusations"] + f["mentions"] + f["turns_since_spoke"] // 2
+    if not f["has_spoken"]:
+        score += 2
+    bid = max(0, min(10, int(score)))
+    raw = (f"rule: mentions={int(f['mentions'])} accusations={int(f['accusations'])} "
+           f"turns_since_spoke={int(f['turns_since_spoke'])}")
+    return bid, raw
+
+def shortlist_bidders(players: List[str], debate_log: List[List[str]], k: int) -> Tuple[List[str], List[str]]:
+    """
+    Cheap first tier of hierarchical bidding: rank players by the rule-based
+    score (accusations, mentions, time since last spoke) and keep the top `k`
+    for the real bid calls. Ties keep roster order, so the cut is reproducible
+    from the debate log. Returns (selected, skipped), each in roster order.
+    """
+    if not k or len(players) <= k:
+        return list(players), []
+    scores = {name: rule_based_bid(name, debate_log)[0] for name in players}
+    ranked = sorted(players, key=lambda name: -scores[name])  # stable: ties keep roster order
+    chosen = set(ranked[:k])
+    return [p for p in players if p in chosen], [p for p in players if p not in chosen]
+
+def _solve(matrix: List[List[float]], vector: List[float]) -> List[float]:
+    """Solve a small dense linear system with Gauss-Jordan elimination."""
+    n = len(vector)
+    aug = [row[:] + [vector[i]] for i, row in enumerate(matrix)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(aug[r][col]))
+        if abs(aug[pivot][col]) < 1e-12:
+            continue
+        aug[col], aug[pivot] = aug[pivot], aug[col]
+        div = aug[col][col]
+        aug[col] = [v / div for v in aug[col]]
+        for r in range(n):
+            if r != col and aug[r][col]:
+                factor = aug[r][col]
+                aug[r] = [a - factor * b for a, b in zip(aug[r], aug[col])]
+    return [aug[i][n] for i in range(n)]
+
+def bid_source(strategy: Callable, raw_output: str) -> str:
+    """
+    Where a bid came from, logged per bidder in `debate` events (`bid_sources`):
+    "llm", "rule", "learned", or "parse_error" for an LLM reply with no number.
+    """
+    if strategy is rule_based_bid:
+        return "rule"
+    if isinstance(strategy, LearnedBidModel):
+        return "learned"
+    return "llm" if re.search(r"-?\d+", raw_output or "") else "parse_error"
+
+def bid_samples_from_events(events_path: str) -> List[Tuple[Dict[str, float], int]]:
+    """
+    Rebuild (features, bid) training pairs from a run's events.ndjson.
+
+    Each `debate` event stores the bids placed before its dialogue line, so the
+    debate log is replayed in file order to recover what bidders saw. Only LLM
+    bids are kept (`bid_sources`); events logged before sources were recorded
+    drop timed-out bids and turns with heuristic bids instead.
+    """
+    samples = []
+    debate_log: List[List[str]] = []
+    with open(events_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if entry.get("event") != "debate":
+                continue
+            details = entry.get("details", {}) or {}
+            sources = details.get("bid_sources")
+            for name, bid in (details.get("bids") or {}).items():
+                if sources is not None:
+                    keep = sources.get(name) == "llm"
+                else:
+                    keep = name not in (details.get("bid_timeouts") or []) and \
+                        "heuristic_bids" not in (details.get("degraded") or [])
+                if keep:
+                    samples.append((bid_features(name, debate_log), int(bid)))
+            debate_log.append([entry.get("actor"), details.get("dialogue", "")])
+    return samples
+
+class LearnedBidModel:
+    """
+    Ridge regression from `bid_features` to the bids players actually placed in
+    earlier runs. Trained locally from `events.ndjson` files; predicting is free.
+    """
+
+    FEATURES = ("mentions", "accusations", "turns_since_spoke", "has_spoken")
+
+    def __init__(self, weights: Optional[List[float]] = None):
+        # weights[0] is the intercept
+        self.weights = weights or [0.0] * (len(self.FEATURES) + 1)
+
+    def _row(self, features: Dict[str, float]) -> List[float]:
+        return [1.0] + [features.get(name, 0.0) for name in self.FEATURES]
+
+    def fit(self, samples: Iterable[Tuple[Dict[str, float], int]], l2: float = 1.0) -> "LearnedBidModel":
+        size = len(self.FEATURES) + 1
+        xtx = [[0.0] * size for _ in range(size)]
+        xty = [0.0] * size
+        count = 0
+        for features, bid in samples:
+            row = self._row(features)
+            for i in range(size):
+                xty[i] += row[i] * bid
+                for j in range(size):
+                    xtx[i][j] += row[i] * row[j]
+            count += 1
+        if not count:
+            raise ValueError("No bid samples to train on.")
+        for i in range(1, size):  # do not shrink the intercept
+            xtx[i][i] += l2
+        self.weights = _solve(xtx, xty)
+        return self
+
+    @classmethod
+    def from_log_dir(cls, log_dir: str) -> "LearnedBidModel":
+        """
+        Train on every events.ndjson under `log_dir` (one folder per run),
+        skipping runs whose run_meta.json names a non-LLM bid strategy.
+        """
+        samples = []
+        for root, _dirs, files in os.walk(log_dir):
+            if "events.ndjson" not in files:
+                continue
+            if "run_meta.json" in files:
+                try:
+                    with open(os.path.join(root, "run_meta.json"), "r", encoding="utf-8") as f:
+                        strategy = (json.load(f).get("config") or {}).get("bid_strategy", "llm")
+                except (OSError, json.JSONDecodeError):
+                    strategy = "llm"
+                if strategy != "llm":
+                    continue
+            samples.extend(bid_samples_from_events(os.path.join(root, "events.ndjson")))
+        return cls().fit(samples)
+
+    def __call__(self, player_name: str, debate_log: List[List[str]], dialogue_history: Optional[str] = None):
+        row = self._row(bid_features(player_name, debate_log))
+        value = sum(w * x for w, x in zip(self.weights, row))
+        bid = max(0, min(10, int(round(value))))
+        return bid, f"learned: {value:.2f}"
+
+def make_bid_strategy(name: str = "llm", log_dir: Optional[str] = None, models=None) -> Callable[..., Tuple[int, str]]:
+    """
+    Return a bid function `(player_name, debate_log, dialogue_history=None) -> (bid, raw_output)`.
+    `dialogue_history` is the rendered transcript; local strategies ignore it.
+
+    - llm: one model call per player (original behaviour), on the registry's "bid" route if `models` is given
+    - rule: local heuristic over mentions, accusations and time since last spoke
+    - learned: ridge model trained from past runs under `log_dir`; the rule
+      strategy (with a warning) while no bids have been logged there yet
+    """
+    if name == "llm":
+        return partial(llm_bid, models=models) if models is not None else llm_bid
+    if name == "rule":
+        return rule_based_bid
+    if name == "learned":
+        log_dir = log_dir or os.getenv("LOG_DIR", "./logs")
+        try:
+            return LearnedBidModel.from_log_dir(log_dir)
+        except ValueError:
+            warnings.warn(f"No logged bids under {log_dir} to train the learned bid model; using the rule strategy.")
+            return rule_based_bid
+    raise ValueError(f"Unknown bid strategy: {name}. Options: {', '.join(BID_STRATEGIES)}")
 
-    return bid, response
 def get_max_bids(bid_dict):
     max_value = max(bid_dict.values())
     return [name for name, bid in bid_dict.items() if bid == max_value]
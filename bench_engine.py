@@ -0,0 +1,130 @@
+import argparse
+import contextlib
+import io
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from config import AVAILABLE_MODELS
+from live_events import EventHub
+from local_backend import get_engine
+from stub_server import call_type_of, estimate_tokens, fake_reply
+
+# Zero-latency in-process model, served through the "local" provider so the
+# whole engine (registry, scheduler, parsing, state updates) is exercised
+BENCH_MODEL = "bench-fake"
+
+
+class FakeRuntime:
+    """`local_backend` runtime answering every conversation with a schema-valid stub reply."""
+
+    def __init__(self, model_path: Optional[str] = None, threads: Optional[int] = None, seed: int = 0):
+        self.rng = random.Random(seed)
+
+    def generate(self, conversations: List[List[Dict[str, str]]], max_tokens: List[int], temperature: float):
+        results = []
+        for conversation in conversations:
+            text = fake_reply(call_type_of({"messages": conversation}), conversation, self.rng)
+            prompt = sum(estimate_tokens(m["content"]) for m in conversation)
+            results.append((text, {"prompt_tokens": prompt, "completion_tokens": estimate_tokens(text)}))
+        return results
+
+
+def register_bench_model(seed: int = 0) -> None:
+    """Add the fake model to AVAILABLE_MODELS and load its engine (max_wait 0: no batching delay)."""
+    AVAILABLE_MODELS[BENCH_MODEL] = {
+        "name": BENCH_MODEL, "description": "In-process fake model for engine benchmarks",
+        "temperature": 0.0, "max_tokens": 256, "provider": "local", "model_path": BENCH_MODEL,
+        "batching": {"max_batch": 64, "max_wait": 0.0}, "json_mode": "off",
+    }
+    get_engine(BENCH_MODEL, max_batch=64, max_wait=0.0, runtime_factory=lambda path, threads=None: FakeRuntime(seed=seed))
+
+
+def default_role_counts(num_players: int) -> Dict[str, int]:
+    """About one Werewolf per five players and one Seer and Doctor per twenty."""
+    return {"Werewolf": max(1, num_players // 5), "Seer": max(1, num_players // 20), "Doctor": max(1, num_players // 20)}
+
+
+def _summary(gaps: List[float], prefix: str) -> Dict:
+    gaps = sorted(gaps)
+    return {
+        f"{prefix}s": len(gaps),
+        f"{prefix}_mean_ms": round(1000 * statistics.fmean(gaps), 1) if gaps else None,
+        f"{prefix}_p95_ms": round(1000 * gaps[int(0.95 * (len(gaps) - 1))], 1) if gaps else None,
+        f"{prefix}_max_ms": round(1000 * gaps[-1], 1) if gaps else None,
+    }
+
+
+def bench_game(num_players: int, seed: int = 0, role_counts: Optional[Dict[str, int]] = None) -> Dict:
+    """
+    Play one full game against the fake model and time it. A node's engine
+    time is the gap between the previous graph node finishing and it finishing:
+    a debate turn covers bids, speaker, self and peer analyses and the state
+    update; a vote phase covers every vote and the analyses of their reasoning.
+    """
+    from run import run_werewolf_game
+
+    hub = EventHub(buffer_size=10 ** 7)
+    sub = hub.subscribe()
+    started = time.monotonic()
+    with contextlib.redirect_stdout(io.StringIO()):
+        final = run_werewolf_game(
+            BENCH_MODEL, enable_file_logging=False, blob_store=False, run_catalog=False, event_hub=hub,
+            num_players=num_players, role_counts=role_counts or default_role_counts(num_players), role_seed=seed,
+        )
+    wall = time.monotonic() - started
+    hub.close()
+
+    gaps: Dict[str, List[float]] = {"debate": [], "vote": []}
+    previous = None
+    while True:
+        item = sub.get(timeout=0)
+        if item is None:
+            break
+        event = item[0]
+        if event.get("event") != "node_update":
+            continue
+        at = datetime.fromisoformat(event["timestamp"])
+        if event.get("node") in gaps and previous is not None:
+            gaps[event["node"]].append((at - previous).total_seconds())
+        previous = at
+
+    return {
+        "players": num_players,
+        "rounds": final.round_num,
+        "winner": final.winner,
+        "wall_s": round(wall, 2),
+        **_summary(gaps["debate"], "turn"),
+        **_summary(gaps["vote"], "vote_phase"),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time full games against a zero-latency in-process model to check per-turn engine latency by roster size"
+    )
+    parser.add_argument("--players", type=int, nargs="+", default=[20, 50, 100],
+                        help="Roster sizes to play, one game each. Default: 20 50 100")
+    parser.add_argument("--target-ms", type=float, default=1000.0,
+                        help="Per-turn engine time target at the 95th percentile; exit 1 if a size misses it. Default: 1000")
+    parser.add_argument("--vote-target-ms", type=float, default=5000.0,
+                        help="Vote phase (all votes and their analyses) engine time target at the 95th percentile; "
+                             "exit 1 if a size misses it. Default: 5000")
+    parser.add_argument("--seed", type=int, default=0, help="Role and reply seed. Default: 0")
+    args = parser.parse_args()
+
+    register_bench_model(args.seed)
+    missed = False
+    for n in args.players:
+        result = bench_game(n, seed=args.seed)
+        result["within_target"] = all(
+            result[key] is not None and result[key] <= target
+            for key, target in (("turn_p95_ms", args.target_ms), ("vote_phase_p95_ms", args.vote_target_ms))
+        )
+        missed = missed or not result["within_target"]
+        print(json.dumps(result), flush=True)
+    sys.exit(1 if missed else 0)
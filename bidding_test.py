@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for the local bid strategies (no LLM calls).
+"""
+
+import json
+import os
+import tempfile
+
+import pytest
+
+from Bidding import (bid_features, bid_source, rule_based_bid, LearnedBidModel, bid_samples_from_events, make_bid_strategy,
+                     shortlist_bidders, _parse_bid)
+
+DEBATE_LOG = [
+    ["Alice", "I suspect Bob is a werewolf."],
+    ["Charlie", "Bob has been quiet, that is suspicious."],
+    ["Alice", "Let's vote Bob."],
+]
+
+def test_bid_features():
+    bob = bid_features("Bob", DEBATE_LOG)
+    assert bob["mentions"] == 3
+    assert bob["accusations"] == 3
+    assert bob["has_spoken"] == 0.0
+
+    alice = bid_features("Alice", DEBATE_LOG)
+    assert alice["turns_since_spoke"] == 0
+    assert alice["has_spoken"] == 1.0
+
+def test_rule_based_bid_prefers_accused():
+    bob_bid, raw = rule_based_bid("Bob", DEBATE_LOG)
+    alice_bid, _ = rule_based_bid("Alice", DEBATE_LOG)
+    assert 0 <= alice_bid < bob_bid <= 10
+    assert raw.startswith("rule:")
+
+def test_shortlist_keeps_accused_and_quiet_players():
+    players = ["Alice", "Bob", "Charlie", "Dana"]
+    assert shortlist_bidders(players, DEBATE_LOG, 2) == (["Bob", "Dana"], ["Alice", "Charlie"])
+    assert shortlist_bidders(players, DEBATE_LOG, None) == (players, [])
+    assert shortlist_bidders(players, DEBATE_LOG, 10) == (players, [])
+
+def test_parse_bid():
+    assert _parse_bid("7") == 7
+    assert _parse_bid("I'd say 12.") == 10
+    assert _parse_bid("no idea") == 0
+
+def test_learned_bid_model_from_events():
+    events = [
+        {"event": "debate", "actor": "Alice", "details": {"dialogue": "I suspect Bob.", "bids": {"Alice": 5, "Bob": 5}}},
+        {"event": "vote", "actor": "system", "details": {}},
+        {"event": "debate", "actor": "Bob", "details": {"dialogue": "Not me!", "bids": {"Bob": 10, "Charlie": 1}}},
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        run_dir = os.path.join(tmp, "run1")
+        os.makedirs(run_dir)
+        with open(os.path.join(run_dir, "events.ndjson"), "w", encoding="utf-8") as f:
+            for e in events:
+                f.write(json.dumps(e) + "\n")
+
+        samples = bid_samples_from_events(os.path.join(run_dir, "events.ndjson"))
+        assert len(samples) == 4
+        # Bob's second bid was placed after Alice accused him
+        assert samples[2][0]["accusations"] == 1
+
+        model = make_bid_strategy("learned", log_dir=tmp)
+        assert isinstance(model, LearnedBidModel)
+        accused_bid, _ = model("Bob", [["Alice", "I suspect Bob."]])
+        quiet_bid, _ = model("Charlie", [["Alice", "I suspect Bob."]])
+        assert accused_bid > quiet_bid
+
+def test_learned_bid_model_trains_on_llm_bids_only():
+    events = [
+        # Legacy event without sources: the timed-out bid is dropped
+        {"event": "debate", "actor": "Alice", "details": {"dialogue": "Hi.", "bids": {"Alice": 5, "Bob": 0},
+                                                          "bid_timeouts": ["Bob"]}},
+        {"event": "debate", "actor": "Bob", "details": {"dialogue": "Hello.", "bids": {"Bob": 7, "Charlie": 3, "Dana": 0},
+                                                        "bid_sources": {"Bob": "llm", "Charlie": "rule",
+                                                                        "Dana": "parse_error"}}},
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "events.ndjson")
+        with open(path, "w", encoding="utf-8") as f:
+            for e in events:
+                f.write(json.dumps(e) + "\n")
+        assert [bid for _, bid in bid_samples_from_events(path)] == [5, 7]
+
+    assert bid_source(rule_based_bid, "rule: ...") == "rule"
+    assert bid_source(LearnedBidModel(), "learned: 1.00") == "learned"
+    assert bid_source(print, "8") == "llm" and bid_source(print, "no idea") == "parse_error"
+
+def test_learned_strategy_falls_back_to_rule_without_logs():
+    with tempfile.TemporaryDirectory() as tmp:
+        with pytest.warns(UserWarning, match="rule strategy"):
+            strategy = make_bid_strategy("learned", log_dir=tmp)
+    assert strategy is rule_based_bid
+
+if __name__ == "__main__":
+    test_bid_features()
+    test_rule_based_bid_prefers_accused()
+    test_parse_bid()
+    test_learned_bid_model_from_events()
+    test_learned_bid_model_trains_on_llm_bids_only()
+    test_learned_strategy_falls_back_to_rule_without_logs()
+    print("Bidding tests passed")
@@ -0,0 +1,115 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import zlib
+from typing import Any, Dict, Optional
+
+from llm_calls import current_call_context
+from prompts import render_messages
+
+
+class BlobStore:
+    """
+    Content-addressed, zlib-compressed text store shared by all runs under a log dir.
+
+    Blobs are rows of one SQLite file keyed by the SHA-256 of their text, so
+    repeated prompt prefixes and replies are written once and small blobs cost no
+    filesystem blocks. Events and snapshots hold `_prompt_ref` / `_raw_response_ref`
+    instead of the text (see `log_payload`).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._known = set()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS blobs (hash TEXT PRIMARY KEY, data BLOB NOT NULL)")
+        self._conn.commit()
+
+    def put(self, text: str) -> str:
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            if digest not in self._known:
+                self._conn.execute("INSERT OR IGNORE INTO blobs VALUES (?, ?)", (digest, zlib.compress(data)))
+                self._conn.commit()
+                self._known.add(digest)
+        return digest
+
+    def get(self, digest: str) -> str:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        if row is None:
+            raise KeyError(digest)
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def prompt_ref(self, prompt, template: Optional[str] = None) -> Dict:
+        """Store each prompt message separately so the stable prefix is shared across calls."""
+        messages = [prompt] if isinstance(prompt, str) else prompt
+        return {
+            "template": template,
+            "parts": [self.put(m if isinstance(m, str) else render_messages([m])) for m in messages],
+        }
+
+    def resolve(self, obj: Any) -> Any:
+        """Copy of `obj` with every blob reference replaced by the stored text."""
+        if isinstance(obj, list):
+            return [self.resolve(v) for v in obj]
+        if not isinstance(obj, dict):
+            return obj
+        resolved = {}
+        for key, value in obj.items():
+            if key == "_prompt_ref" and isinstance(value, dict):
+                resolved["_prompt"] = "\n\n".join(self.get(h) for h in value.get("parts", []))
+                resolved["_prompt_template"] = value.get("template")
+            elif key == "_raw_response_ref" and isinstance(value, str):
+                resolved["_raw_response"] = self.get(value)
+            else:
+                resolved[key] = self.resolve(value)
+        return resolved
+
+
+def log_payload(prompt, raw_text: str, template: Optional[str] = None) -> Dict:
+    """
+    Prompt/response fields to attach to a parsed model reply: blob references when
+    the call context carries a `blobs` store, otherwise the inline text.
+    """
+    store: Optional[BlobStore] = current_call_context().get("blobs")
+    if store is None:
+        return {"_raw_response": raw_text, "_prompt": render_messages(prompt)}
+    return {"_raw_response_ref": store.put(raw_text), "_prompt_ref": store.prompt_ref(prompt, template)}
+
+
+def resolve_file(path: str, store: BlobStore, out=sys.stdout) -> None:
+    """Write `path` (events NDJSON or a JSON snapshot) to `out` with blob references resolved."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".ndjson"):
+            for line in f:
+                if line.strip():
+                    out.write(json.dumps(store.resolve(json.loads(line)), ensure_ascii=False) + "\n")
+        else:
+            json.dump(store.resolve(json.load(f)), out, ensure_ascii=False, indent=2)
+            out.write("\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print a run's events or snapshot with prompts/responses resolved")
+    parser.add_argument("path", help="events.ndjson or game_state.json of a run")
+    parser.add_argument(
+        "--blobs",
+        help="Blob store file (default: blobs.sqlite next to the run folder)"
+    )
+    args = parser.parse_args()
+    blobs = args.blobs or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(args.path))), "blobs.sqlite")
+    resolve_file(args.path, BlobStore(blobs))
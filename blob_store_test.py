@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Tests for the content-addressed prompt/response blob store (no LLM calls).
+"""
+
+from blob_store import BlobStore, log_payload
+from llm_calls import call_context
+from prompts import build_messages, render_messages
+
+def test_put_dedups_and_round_trips(tmp_path):
+    store = BlobStore(str(tmp_path / "blobs.sqlite"))
+    first = store.put("same template text " * 50)
+    assert store.put("same template text " * 50) == first
+    assert store.get(first) == "same template text " * 50
+
+    # A second store on the same file (another run) sees the existing blob
+    other = BlobStore(str(tmp_path / "blobs.sqlite"))
+    assert other.get(first) == "same template text " * 50
+    assert other._conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 1
+
+
+def test_log_payload_refs_resolve_to_inline_text(tmp_path):
+    prompt = build_messages("Stable prefix", "Bob: hi", "Vote now")
+    raw = '{"vote": "Bob"}'
+    inline = log_payload(prompt, raw)
+    assert inline == {"_raw_response": raw, "_prompt": render_messages(prompt)}
+
+    store = BlobStore(str(tmp_path / "blobs.sqlite"))
+    with call_context(blobs=store):
+        ref = log_payload(prompt, raw, "vote")
+        again = log_payload(build_messages("Stable prefix", "Raj: hello", "Vote now"), raw, "vote")
+    assert "_prompt" not in ref and ref["_prompt_ref"]["template"] == "vote"
+    # Shared prefix and instruction parts reuse the same blobs
+    assert again["_prompt_ref"]["parts"][0] == ref["_prompt_ref"]["parts"][0]
+    assert again["_prompt_ref"]["parts"][2] == ref["_prompt_ref"]["parts"][2]
+
+    event = {"event": "vote", "details": {"raw_output": {"Bob": {"vote": "Raj", **ref}}}}
+    resolved = store.resolve(event)["details"]["raw_output"]["Bob"]
+    assert resolved["_prompt"] == inline["_prompt"]
+    assert resolved["_raw_response"] == raw
+    assert resolved["_prompt_template"] == "vote"
@@ -0,0 +1,218 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    folder TEXT,
+    created_at_utc TEXT,
+    finished_at_utc TEXT,
+    duration_s REAL,
+    model TEXT,
+    seed INTEGER,
+    num_players INTEGER,
+    players TEXT,
+    roles TEXT,
+    config TEXT,
+    winner TEXT,
+    num_rounds INTEGER,
+    llm_calls INTEGER,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    cached_tokens INTEGER,
+    batch TEXT,
+    cost_usd REAL
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    timestamp TEXT,
+    round INTEGER,
+    step INTEGER,
+    phase TEXT,
+    event TEXT,
+    actor TEXT,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_model_winner ON runs (model, winner);
+CREATE INDEX IF NOT EXISTS runs_batch ON runs (batch);
+CREATE INDEX IF NOT EXISTS events_run_round ON events (run_id, round, phase);
+CREATE INDEX IF NOT EXISTS events_event_run ON events (event, run_id);
+CREATE INDEX IF NOT EXISTS events_actor ON events (actor, event);
+"""
+# Columns added to `runs` after the first catalogs were written (added on open)
+_ADDED_COLUMNS = {"batch": "TEXT", "cost_usd": "REAL"}
+
+
+class RunCatalog:
+    """
+    SQLite (WAL) catalog of runs and events, written alongside the per-run files.
+
+    `runs` has one row per game (model, roster, seed, batch, winner, duration, call,
+    token and cost totals); `events` mirrors events.ndjson with indexed run, round, phase,
+    event type and actor columns, so cross-run queries don't open every run folder.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(runs)")}
+        for name, kind in _ADDED_COLUMNS.items():
+            if columns and name not in columns:
+                self._conn.execute(f"ALTER TABLE runs ADD COLUMN {name} {kind}")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def add_run(self, meta: Dict, folder: Optional[str] = None) -> None:
+        """Register a run from its run_meta.json contents."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO runs (run_id, folder, created_at_utc, model, seed, num_players, players, roles, config, batch)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    meta["run_id"], folder, meta.get("created_at_utc"), meta.get("model"), meta.get("seed"),
+                    len(meta.get("players", []) or []), json.dumps(meta.get("players", [])),
+                    json.dumps(meta.get("roles", {})), json.dumps(meta.get("config", {})), meta.get("batch"),
+                ),
+            )
+            self._conn.commit()
+
+    def add_event(self, run_id: str, entry: Dict) -> None:
+        """Insert one event entry (the same dict streamed to events.ndjson)."""
+        self.add_events(run_id, [entry])
+
+    def add_events(self, run_id: str, entries) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO events (run_id, timestamp, round, step, phase, event, actor, details) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (run_id, e.get("timestamp"), e.get("round"), e.get("step"), e.get("phase"), e.get("event"),
+                     e.get("actor"), json.dumps(e.get("details", {}), ensure_ascii=False))
+                    for e in entries
+                ],
+            )
+            self._conn.commit()
+
+    def finish_run(self, metrics: Dict, finished_at: Optional[str] = None) -> None:
+        """
+        Fill in outcome, duration and call totals from a final_metrics.json dict
+        of an ended game (see `run_ended`).
+        """
+        run = metrics.get("run", {}) or {}
+        calls = (metrics.get("llm_calls", {}) or {}).values()
+        finished_at = finished_at or run.get("created_at_utc")
+        with self._lock:
+            self._conn.execute(
+                "UPDATE runs SET finished_at_utc = ?, winner = ?, num_rounds = ?,"
+                " duration_s = (julianday(?) - julianday(created_at_utc)) * 86400.0,"
+                " llm_calls = ?, prompt_tokens = ?, completion_tokens = ?, cached_tokens = ? WHERE run_id = ?",
+                (
+                    finished_at, run.get("winner"), run.get("num_rounds"), finished_at,
+                    sum(c.get("calls", 0) for c in calls),
+                    sum(c.get("prompt_tokens", 0) for c in calls),
+                    sum(c.get("completion_tokens", 0) for c in calls),
+                    sum(c.get("cached_tokens", 0) for c in calls),
+                    run.get("run_id"),
+                ),
+            )
+            self._conn.commit()
+
+    def update_usage(self, metrics: Dict) -> None:
+        """Store call, token and cost totals from a final_metrics.json dict, ended or mid-game."""
+        run = metrics.get("run", {}) or {}
+        totals = (metrics.get("usage", {}) or {}).get("totals", {}) or {}
+        with self._lock:
+            self._conn.execute(
+                "UPDATE runs SET llm_calls = ?, prompt_tokens = ?, completion_tokens = ?, cached_tokens = ?, cost_usd = ?"
+                " WHERE run_id = ?",
+                (
+                    totals.get("calls", 0), totals.get("prompt_tokens", 0), totals.get("completion_tokens", 0),
+                    totals.get("cached_tokens", 0), totals.get("cost_usd", 0.0), run.get("run_id"),
+                ),
+            )
+            self._conn.commit()
+
+    def batch_usage(self, batch: str) -> Dict[str, float]:
+        """Runs, calls, tokens (prompt + completion) and cost so far of the runs of `batch`."""
+        with self._lock:
+            runs, calls, tokens, cost = self._conn.execute(
+                "SELECT COUNT(*), SUM(llm_calls), SUM(prompt_tokens + completion_tokens), SUM(cost_usd)"
+                " FROM runs WHERE batch = ?", (batch,),
+            ).fetchone()
+        return {"runs": runs, "calls": calls or 0, "tokens": tokens or 0, "cost_usd": cost or 0.0}
+
+    def has_run(self, run_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM runs WHERE run_id = ?", (run_id,)).fetchone() is not None
+
+    def query(self, sql: str, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def run_ended(metrics: Dict) -> bool:
+    """
+    Whether a final_metrics.json dict is from a game that ended (a winner or a
+    stop reason) rather than a mid-game refresh. Files without `finished` were
+    only written at the end of a game.
+    """
+    run = metrics.get("run", {}) or {}
+    return bool(run.get("finished", True) or run.get("stop_reason"))
+
+
+def backfill(catalog: RunCatalog, log_dir: str) -> int:
+    """Catalog runs listed in `log_dir`/index.jsonl that are not in the catalog yet. Returns runs added."""
+    index_path = os.path.join(log_dir, "index.jsonl")
+    if not os.path.exists(index_path):
+        return 0
+    added = 0
+    with open(index_path, "r", encoding="utf-8") as fidx:
+        for line in fidx:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if catalog.has_run(record["run_id"]):
+                continue
+            try:
+                with open(record["meta_path"], "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            catalog.add_run(meta, folder=os.path.dirname(record["meta_path"]))
+            if os.path.exists(record["events_path"]):
+                with open(record["events_path"], "r", encoding="utf-8") as f:
+                    catalog.add_events(record["run_id"], (json.loads(l) for l in f if l.strip()))
+            if os.path.exists(record["metrics_path"]):
+                with open(record["metrics_path"], "r", encoding="utf-8") as f:
+                    metrics = json.load(f)
+                if metrics.get("usage"):
+                    catalog.update_usage(metrics)
+                if run_ended(metrics):
+                    catalog.finish_run(metrics)
+            added += 1
+    return added
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or update the SQLite run catalog from existing run folders")
+    parser.add_argument(
+        "--log-dir",
+        default="./logs",
+        help="Directory holding index.jsonl and run folders. Default: ./logs"
+    )
+    args = parser.parse_args()
+    catalog = RunCatalog(os.path.join(args.log_dir, "catalog.sqlite"))
+    print(f"Cataloged {backfill(catalog, args.log_dir)} runs")
+    catalog.close()
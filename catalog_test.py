@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite run catalog (no LLM calls).
+"""
+
+import json
+import sqlite3
+
+from types import SimpleNamespace
+
+from catalog import RunCatalog, backfill
+from logs import batch_usage, write_final_metrics
+
+META = {"run_id": "r1", "created_at_utc": "2026-01-01T00:00:00", "model": "gpt-4o-mini",
+        "players": ["Alice", "Bob"], "roles": {"Alice": "Villager", "Bob": "Werewolf"}}
+EVENTS = [
+    {"timestamp": "2026-01-01T00:00:01", "round": 0, "step": 1, "phase": "vote", "event": "vote",
+     "actor": "system", "details": {"votes": {"Alice": "Bob"}}},
+    {"timestamp": "2026-01-01T00:00:02", "round": 1, "step": 2, "phase": "debate", "event": "debate",
+     "actor": "Bob", "details": {"dialogue": "hi"}},
+]
+METRICS = {"run": {"run_id": "r1", "created_at_utc": "2026-01-01T00:01:30", "winner": "Werewolves", "num_rounds": 2},
+           "llm_calls": {"vote": {"calls": 2, "prompt_tokens": 100, "completion_tokens": 10, "cached_tokens": 50},
+                         "bid": {"calls": 3, "prompt_tokens": 30, "completion_tokens": 3, "cached_tokens": 0}}}
+
+def test_runs_and_events_are_queryable(tmp_path):
+    catalog = RunCatalog(str(tmp_path / "catalog.sqlite"))
+    catalog.add_run(META, folder="logs/r1")
+    for entry in EVENTS:
+        catalog.add_event("r1", entry)
+    catalog.finish_run(METRICS)
+
+    run = catalog.query("SELECT model, winner, num_rounds, duration_s, llm_calls, prompt_tokens FROM runs")[0]
+    assert run[:3] == ("gpt-4o-mini", "Werewolves", 2)
+    assert abs(run[3] - 90.0) < 0.01
+    assert run[4:] == (5, 130)
+
+    rows = catalog.query(
+        "SELECT e.details FROM events e JOIN runs r USING (run_id)"
+        " WHERE e.event = 'vote' AND r.model = ? AND r.winner = 'Werewolves'", ("gpt-4o-mini",))
+    assert [json.loads(d) for (d,) in rows] == [{"votes": {"Alice": "Bob"}}]
+
+
+def test_backfill_reads_index_once(tmp_path):
+    run_dir = tmp_path / "r1"
+    run_dir.mkdir()
+    (run_dir / "run_meta.json").write_text(json.dumps(META))
+    (run_dir / "events.ndjson").write_text("".join(json.dumps(e) + "\n" for e in EVENTS))
+    (run_dir / "final_metrics.json").write_text(json.dumps(METRICS))
+    (tmp_path / "index.jsonl").write_text(json.dumps({
+        "run_id": "r1",
+        "meta_path": str(run_dir / "run_meta.json"),
+        "events_path": str(run_dir / "events.ndjson"),
+        "state_path": str(run_dir / "game_state.json"),
+        "metrics_path": str(run_dir / "final_metrics.json"),
+    }) + "\n")
+
+    catalog = RunCatalog(str(tmp_path / "catalog.sqlite"))
+    assert backfill(catalog, str(tmp_path)) == 1
+    assert backfill(catalog, str(tmp_path)) == 0
+    assert catalog.query("SELECT COUNT(*) FROM events WHERE run_id = 'r1'") == [(2,)]
+    assert catalog.query("SELECT winner FROM runs") == [("Werewolves",)]
+
+
+def test_mid_game_metrics_leave_run_open(tmp_path):
+    from running_metrics import RunningMetrics
+
+    catalog_path = str(tmp_path / "catalog.sqlite")
+    RunCatalog(catalog_path).add_run(META, folder="logs/r1")
+    state = SimpleNamespace(
+        log_run_id="r1", players=["Alice", "Bob"], alive_players=["Alice", "Bob"], round_num=1,
+        winner=None, stop_reason=None, running_metrics=RunningMetrics(), deception_statements=[],
+        log_paths={"metrics": str(tmp_path / "final_metrics.json"), "catalog": catalog_path},
+    )
+    write_final_metrics(state)
+    assert RunCatalog(catalog_path).query("SELECT finished_at_utc, duration_s FROM runs") == [(None, None)]
+
+    state.winner = "Villagers"
+    write_final_metrics(state)
+    assert RunCatalog(catalog_path).query("SELECT winner FROM runs") == [("Villagers",)]
+
+
+def test_batch_usage_is_read_from_the_catalog(tmp_path):
+    # A catalog from before the batch/cost columns gets them on open
+    old = sqlite3.connect(str(tmp_path / "catalog.sqlite"))
+    old.execute("CREATE TABLE runs (run_id TEXT PRIMARY KEY, folder TEXT, created_at_utc TEXT, finished_at_utc TEXT,"
+                " duration_s REAL, model TEXT, seed INTEGER, num_players INTEGER, players TEXT, roles TEXT, config TEXT,"
+                " winner TEXT, num_rounds INTEGER, llm_calls INTEGER, prompt_tokens INTEGER, completion_tokens INTEGER,"
+                " cached_tokens INTEGER)")
+    old.close()
+    catalog = RunCatalog(str(tmp_path / "catalog.sqlite"))
+    usage = {"totals": {"calls": 4, "prompt_tokens": 900, "completion_tokens": 100, "cached_tokens": 0, "cost_usd": 0.01}}
+    for run_id, batch in [("r1", "b1"), ("r2", "b1"), ("r3", "b2")]:
+        catalog.add_run({**META, "run_id": run_id, "batch": batch})
+        catalog.update_usage({"run": {"run_id": run_id, "finished": False}, "usage": usage})
+
+    used = batch_usage(str(tmp_path), "b1")
+    assert used["runs"] == 2 and used["calls"] == 8 and used["tokens"] == 2000
+    assert abs(used["cost_usd"] - 0.02) < 1e-9
+    assert batch_usage(str(tmp_path), "none") == {"runs": 0, "calls": 0, "tokens": 0, "cost_usd": 0.0}
@@ -1,6 +1,9 @@
 # Werewolf Game Configuration
 
 # Available models and their configurations
+# json_mode: how structured output is requested (see response_parsing.json_mode_kwargs)
+#   json_schema = OpenAI strict schema, json_object = OpenAI JSON mode, mime = Gemini JSON mime type, off = prompt only
+# price_per_mtok: USD per million tokens (list prices, used for cost accounting in llm_calls.call_cost)
 AVAILABLE_MODELS = {
     # --- OpenAI Models ---
     "gpt-4o": {
@@ -8,14 +11,18 @@ AVAILABLE_MODELS = {
         "description": "OpenAI GPT-4o - latest flagship reasoning model",
         "temperature": 0.7,
         "max_tokens": None,
-        "provider": "openai"
+        "provider": "openai",
+        "json_mode": "json_schema",
+        "price_per_mtok": {"input": 2.5, "cached_input": 1.25, "output": 10.0}
     },
     "gpt-4o-mini": {
         "name": "gpt-4o-mini",
         "description": "OpenAI GPT-4o Mini - faster, cheaper, lower latency",
         "temperature": 0.7,
         "max_tokens": None,
-        "provider": "openai"
+        "provider": "openai",
+        "json_mode": "json_schema",
+        "price_per_mtok": {"input": 0.15, "cached_input": 0.075, "output": 0.6}
     },
 
     # --- Google Models ---
@@ -24,21 +31,41 @@ AVAILABLE_MODELS = {
         "description": "Gemini Pro - balanced performance",
         "temperature": 0.7,
         "max_tokens": None,
-        "provider": "google"
+        "provider": "google",
+        "json_mode": "off",
+        "price_per_mtok": {"input": 0.5, "cached_input": 0.5, "output": 1.5}
     },
     "gemini-1.5-pro": {
         "name": "gemini-1.5-pro",
         "description": "Gemini 1.5 Pro - enhanced reasoning",
         "temperature": 0.7,
         "max_tokens": None,
-        "provider": "google"
+        "provider": "google",
+        "json_mode": "mime",
+        "price_per_mtok": {"input": 1.25, "cached_input": 0.3125, "output": 5.0}
     },
     "gemini-1.5-flash": {
         "name": "gemini-1.5-flash",
         "description": "Gemini 1.5 Flash - fast and efficient",
         "temperature": 0.7,
         "max_tokens": None,
-        "provider": "google"
+        "provider": "google",
+        "json_mode": "mime",
+        "price_per_mtok": {"input": 0.075, "cached_input": 0.01875, "output": 0.3}
+    },
+
+    # --- Local CPU Models (local_backend.py; needs transformers + torch) ---
+    # model_path: Hugging Face id or directory; batching: BatchingEngine settings shared by concurrent games
+    "local-qwen2.5-0.5b": {
+        "name": "local-qwen2.5-0.5b",
+        "description": "Qwen2.5 0.5B Instruct on local CPU - free, for high-volume offline runs",
+        "temperature": 0.7,
+        "max_tokens": 256,
+        "provider": "local",
+        "model_path": "Qwen/Qwen2.5-0.5B-Instruct",
+        "batching": {"max_batch": 8, "max_wait": 0.02, "threads": None},
+        "json_mode": "off",
+        "price_per_mtok": {"input": 0.0, "cached_input": 0.0, "output": 0.0}
     }
 }
 
@@ -48,12 +75,93 @@ DEFAULT_MODEL = "gpt-4o"
 # Game settings
 GAME_CONFIG = {
     "max_debate_turns": 6,
-    "player_names": ["Alice", "Bob", "Charlie"],
-    "default_roles": {
-        "Alice": "Doctor",
-        "Bob": "Werewolf",
-        "Charlie": "Seer"
-    }
+    # Adaptive debate length (see debate_control.DebateController): stop early on low bids, repeated
+    # lines or a per-round call/token budget; extend past max_debate_turns up to hard_cap on high bids.
+    # Off by default: the study protocol is exactly max_debate_turns lines per round (--adaptive-debate).
+    "adaptive_debate": False,
+    "debate_control": {
+        "min_turns": 3,
+        "hard_cap": 10,
+        "low_bid": 2,
+        "extend_bid": 8,
+        "repeat_similarity": 0.8,
+        "call_budget": None,
+        "token_budget": None,
+    },
+    # Token/cost budgets (None = unlimited). A game over its budget ends cleanly at the next step;
+    # batch budgets cover all runs started with the same --batch id in the log directory.
+    "budget": {
+        "game_tokens": None,
+        "game_cost_usd": None,
+        "batch_tokens": None,
+        "batch_cost_usd": None,
+    },
+    # Graceful degradation (degradation.DegradationPolicy): as the game nears its budget or calls get
+    # slow, shed optional work in order: self-analysis, most peer observers, model bids, vote-reasoning
+    # analysis, long prompts. Each threshold passed adds one step; degraded events list what was shed.
+    # Off by default (--degradation): shed self-analyses remove the ground-truth labels metrics rely on.
+    "degradation": False,
+    "degradation_policy": {
+        "budget_levels": (0.5, 0.6, 0.7, 0.8, 0.9),  # share of the game's token/cost budget used
+        "latency_levels": (8.0, 12.0, 16.0, 20.0, 30.0),  # mean seconds of the last 20 calls
+        "observer_sample": 3,
+        "short_prompt_tokens": 300,
+    },
+    # Model per call type (None = the run's --model). Cheap, high-volume calls can go to a fast model,
+    # e.g. {"bid": "gpt-4o-mini", "peer_analysis": "gpt-4o-mini"}. Night actions are eliminate/protect/unmask.
+    "model_routes": {
+        "bid": None, "debate": None, "eliminate": None, "protect": None, "unmask": None, "vote": None,
+        "summary": None, "self_analysis": None, "peer_analysis": None, "round_summary": None,
+    },
+    # Per-call timeouts in seconds by call type ("default" for the rest)
+    "call_timeouts": {"default": 15, "bid": 10, "self_analysis": 10, "peer_analysis": 10},
+    # Deadline in seconds for one step of a phase (a night action, one debate turn with its bids and
+    # analyses, the whole vote, ...), shared by every call in it: each call's timeout is cut to the time
+    # left, late peer analyses and bids are cancelled and marked timed out. None = no deadline.
+    "phase_deadlines": {"eliminate": 60, "protect": 60, "unmask": 60, "debate": 30, "vote": None, "summarize": None},
+    # Priority scheduling of model calls (scheduler.CallScheduler), shared by all games in the process:
+    # at most max_concurrent calls in flight; critical-path calls (speaker, night actions, votes) go
+    # before bids/self-analyses, which go before peer analyses and summaries; games share slots fairly
+    # and a call waiting promote_after seconds moves up a class. priorities overrides call type -> class.
+    "scheduler": True,
+    "scheduler_settings": {"max_concurrent": 32, "promote_after": 10.0, "priorities": {}},
+    # Live event streaming (run.py --live-port/--live-stdout, live_events.py): events buffered per client;
+    # a client that falls further behind loses its oldest events and gets a "dropped" count instead
+    "live_events": {"host": "127.0.0.1", "buffer_size": 1000},
+    # Connection pool shared by all OpenAI-compatible clients of a run
+    "http_pool": {"max_connections": 64, "max_keepalive": 32, "timeout": 60.0},
+    # Upper bound on concurrent model calls within one step (bids, peer analyses), so large rosters
+    # reuse a bounded set of worker threads
+    "max_parallel_calls": 16,
+    # Bid strategy for speaker selection: "llm", "rule" or "learned" (see Bidding.make_bid_strategy)
+    "bid_strategy": "llm",
+    # Hierarchical bidding: shortlist this many players with the local rule score each turn and
+    # only they place bids (None = everyone bids); candidates and skipped players go in the debate event
+    "bid_shortlist": None,
+    # Local deception pre-classifier: statements scored inside the band are escalated to LLM peer analysis
+    "deception_preclassifier": False,
+    "preclassifier_band": (0.3, 0.7),
+    # Stream model replies and stop at the first complete, schema-valid JSON object
+    "stream_responses": False,
+    # Debate transcript sent to prompts: recent lines kept verbatim, finished rounds summarized
+    "transcript_window": 12,
+    "transcript_token_budget": 1200,
+    "transcript_summarizer": "extractive",  # or "llm"
+    # Player memory: top-k relevant scratchpad notes (BM25) added to each prompt within a token budget
+    "memory_top_k": 5,
+    "memory_token_budget": 150,
+    # Log prompts/responses as hashes into a shared compressed blob store (logs/blobs.sqlite) instead of inline text
+    "blob_store": True,
+    # Also write runs and events into a queryable SQLite catalog (logs/catalog.sqlite)
+    "run_catalog": False,
+    # Rewrite final_metrics.json at the end of every round (from running counters) for live monitoring
+    "metrics_every_round": True,
+    # Roster: names are taken from player_names first, then Player<N>; roles are shuffled with role_seed
+    # (None draws a fresh seed, recorded in run_meta.json). Players not given a special role are Villagers.
+    "num_players": 8,
+    "role_counts": {"Werewolf": 2, "Seer": 1, "Doctor": 1},
+    "role_seed": None,
+    "player_names": ["Alice", "Bob", "Selena", "Raj", "Frank", "Joy", "Cyrus", "Emma"],
 }
 
 # Environment settings
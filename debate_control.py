@@ -0,0 +1,74 @@
+import re
+from typing import Dict, Iterable, Optional
+
+WORD_RE = re.compile(r"[a-z0-9']+")
+
+# Stop reasons recorded on the last debate event of a round
+STOP_REASONS = ("max_turns", "hard_cap", "low_bids", "repetition", "call_budget", "token_budget")
+
+
+def similarity(a: str, b: str) -> float:
+    """Jaccard overlap of the two texts' word sets (1.0 = same words)."""
+    words_a, words_b = set(WORD_RE.findall(a.lower())), set(WORD_RE.findall(b.lower()))
+    if not words_a or not words_b:
+        return 0.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+class DebateController:
+    """
+    Decides after each debate turn whether the day's debate goes on.
+
+    The debate ends early (once `min_turns` lines were spoken) when every bid
+    was at most `low_bid`, when the new line repeats one spoken earlier this
+    round, or when the round's model calls/tokens exceed their budget. At
+    `max_turns` it continues only while someone bid at least `extend_bid`,
+    and never past `hard_cap`. Budgets are measured on the run's `CallMeter`
+    from the round's first turn.
+    """
+
+    def __init__(self, min_turns: int = 3, max_turns: int = 6, hard_cap: int = 10,
+                 low_bid: int = 2, extend_bid: int = 8, repeat_similarity: float = 0.8,
+                 call_budget: Optional[int] = None, token_budget: Optional[int] = None):
+        self.min_turns = min_turns
+        self.max_turns = max_turns
+        self.hard_cap = max(hard_cap, max_turns)
+        self.low_bid = low_bid
+        self.extend_bid = extend_bid
+        self.repeat_similarity = repeat_similarity
+        self.call_budget = call_budget
+        self.token_budget = token_budget
+        self._baselines: Dict[int, Dict[str, int]] = {}  # {round: meter totals at its first turn}
+
+    @classmethod
+    def from_config(cls, settings: Dict, max_turns: int) -> "DebateController":
+        return cls(max_turns=max_turns, **settings)
+
+    def start_round(self, round_num: int, meter=None) -> None:
+        """Remember the meter totals before the round's first turn (bids included)."""
+        self._baselines[round_num] = meter.totals() if meter is not None else {"calls": 0, "tokens": 0}
+
+    def stop_reason(self, round_num: int, turns: int, bids: Dict[str, int], statement: str,
+                    earlier: Iterable[str], meter=None) -> Optional[str]:
+        """
+        Why the debate should stop after `turns` lines this round, or None to go on.
+        `earlier` holds this round's previous lines.
+        """
+        if turns >= self.hard_cap:
+            return "hard_cap"
+        if meter is not None:
+            base = self._baselines.get(round_num, {"calls": 0, "tokens": 0})
+            used = meter.totals()
+            if self.call_budget is not None and used["calls"] - base["calls"] >= self.call_budget:
+                return "call_budget"
+            if self.token_budget is not None and used["tokens"] - base["tokens"] >= self.token_budget:
+                return "token_budget"
+        top_bid = max(bids.values(), default=0)
+        if turns >= self.min_turns:
+            if top_bid <= self.low_bid:
+                return "low_bids"
+            if any(similarity(statement, line) >= self.repeat_similarity for line in earlier):
+                return "repetition"
+        if turns >= self.max_turns and top_bid < self.extend_bid:
+            return "max_turns"
+        return None
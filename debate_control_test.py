@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Tests for the adaptive debate controller (no LLM calls).
+"""
+
+from debate_control import DebateController, similarity
+from llm_calls import CallMeter
+
+
+def test_similarity():
+    assert similarity("I suspect Bob.", "i SUSPECT bob") == 1.0
+    assert similarity("Bob is lying", "Alice seems honest") == 0.0
+    assert similarity("", "anything") == 0.0
+
+
+def test_stops_on_low_bids_and_repetition_after_min_turns():
+    c = DebateController(min_turns=2, max_turns=6)
+    assert c.stop_reason(1, 1, {"A": 0, "B": 1}, "hello", []) is None  # below min_turns
+    assert c.stop_reason(1, 2, {"A": 0, "B": 2}, "new point", ["hello"]) == "low_bids"
+    assert c.stop_reason(1, 2, {"A": 5}, "I think Bob is the wolf", ["i think bob is the wolf!"]) == "repetition"
+    assert c.stop_reason(1, 2, {"A": 5}, "Alice defended Bob", ["I think Bob is the wolf"]) is None
+
+
+def test_extends_on_high_bids_up_to_hard_cap():
+    c = DebateController(min_turns=1, max_turns=4, hard_cap=6, extend_bid=8)
+    assert c.stop_reason(1, 4, {"A": 7}, "x", []) == "max_turns"
+    assert c.stop_reason(1, 4, {"A": 9}, "x", []) is None
+    assert c.stop_reason(1, 6, {"A": 10}, "x", []) == "hard_cap"
+
+
+def test_round_budget_counts_from_round_start():
+    meter = CallMeter()
+    meter.record("bid", {"usage": {"prompt_tokens": 500, "completion_tokens": 5}})
+    c = DebateController(min_turns=1, call_budget=3, token_budget=1000)
+    c.start_round(2, meter)
+    assert c.stop_reason(2, 1, {"A": 5}, "x", [], meter) is None
+    for _ in range(3):
+        meter.record("peer", {"usage": {"prompt_tokens": 100, "completion_tokens": 10}})
+    assert c.stop_reason(2, 1, {"A": 5}, "x", [], meter) == "call_budget"
+    c = DebateController(min_turns=1, token_budget=300)
+    c.start_round(2, meter)
+    meter.record("debate", {"usage": {"prompt_tokens": 290, "completion_tokens": 10}})
+    assert c.stop_reason(2, 1, {"A": 5}, "x", [], meter) == "token_budget"
@@ -0,0 +1,162 @@
+import json
+import math
+import os
+import re
+import threading
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+from deception_detection import deception_history_view
+
+# Cue phrases that tend to show up in deflection/over-assertion; hashed in as extra features
+_CUES = ("trust me", "i swear", "honestly", "believe me", "not me", "i'm innocent", "i am innocent",
+         "obviously", "clearly", "definitely")
+_TOKEN_RE = re.compile(r"[a-z']+")
+
+
+class DeceptionPreClassifier:
+    """
+    CPU-only logistic regression over hashed lexical features of a statement.
+
+    Used as a first pass in `analyze_statement_deception`: statements whose
+    probability falls outside the uncertain `band` are labelled locally for
+    every observer, and only the rest are escalated to LLM peer analysis.
+    Trained from peer analyses in `deception_history` records (LLM-sourced only).
+    Until it has seen any labelled statement every statement is escalated.
+    """
+
+    def __init__(self, n_features: int = 4096, band: Tuple[float, float] = (0.3, 0.7),
+                 weights: Optional[List[float]] = None, bias: float = 0.0, samples_seen: int = 0):
+        self.n_features = n_features
+        self.band = (float(band[0]), float(band[1]))
+        self.weights = weights if weights is not None else [0.0] * n_features
+        self.bias = bias
+        self.samples_seen = samples_seen
+        self._lock = threading.Lock()
+
+    def features(self, statement: str) -> Dict[int, float]:
+        """Hashed unigrams, bigrams, cue phrases and a couple of shape features."""
+        text = (statement or "").lower()
+        tokens = _TOKEN_RE.findall(text)
+        grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        grams += [f"cue:{cue}" for cue in _CUES if cue in text]
+        grams.append(f"len:{min(len(tokens) // 5, 6)}")
+        if "?" in text:
+            grams.append("shape:question")
+        if "!" in text:
+            grams.append("shape:exclaim")
+
+        feats: Dict[int, float] = {}
+        for gram in grams:
+            idx = zlib.crc32(gram.encode("utf-8")) % self.n_features
+            feats[idx] = feats.get(idx, 0.0) + 1.0
+        # L2-normalise so long statements do not dominate
+        norm = math.sqrt(sum(v * v for v in feats.values())) or 1.0
+        return {k: v / norm for k, v in feats.items()}
+
+    def _score(self, feats: Dict[int, float]) -> float:
+        z = self.bias + sum(self.weights[i] * v for i, v in feats.items())
+        z = max(-30.0, min(30.0, z))
+        return 1.0 / (1.0 + math.exp(-z))
+
+    def predict_proba(self, statement: str) -> float:
+        return self._score(self.features(statement))
+
+    def is_uncertain(self, probability: float) -> bool:
+        return not self.samples_seen or self.band[0] <= probability <= self.band[1]
+
+    def partial_fit(self, samples: Iterable[Tuple[str, int]], lr: float = 0.5, l2: float = 1e-4) -> "DeceptionPreClassifier":
+        """One SGD pass over (statement, label) pairs."""
+        with self._lock:
+            for statement, label in samples:
+                feats = self.features(statement)
+                err = self._score(feats) - (1.0 if label else 0.0)
+                self.bias -= lr * err
+                for i, v in feats.items():
+                    self.weights[i] -= lr * (err * v + l2 * self.weights[i])
+                self.samples_seen += 1
+        return self
+
+    def fit(self, samples: Iterable[Tuple[str, int]], epochs: int = 5, **kwargs) -> "DeceptionPreClassifier":
+        samples = list(samples)
+        if not samples:
+            raise ValueError("No labelled statements to train the deception pre-classifier on.")
+        for _ in range(epochs):
+            self.partial_fit(samples, **kwargs)
+        return self
+
+    def classify(self, statement: str, probability: Optional[float] = None) -> Dict:
+        """Return an analysis dict shaped like `DeceptionDetector.analyze_other_deception` output."""
+        p = self.predict_proba(statement) if probability is None else probability
+        deceptive = 1 if p > 0.5 else 0
+        return {
+            "chain_of_thought": "",
+            "is_deceptive": deceptive,
+            "confidence": abs(p - 0.5) * 2,
+            "deception_type": "unknown" if deceptive else "none",
+            "reasoning": f"Pre-classifier probability {p:.2f}",
+            "suspicion_level": p,
+            "source": "classifier",
+        }
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "n_features": self.n_features,
+                "band": list(self.band),
+                "bias": self.bias,
+                "samples_seen": self.samples_seen,
+                # sparse: most hashed buckets stay at zero
+                "weights": {str(i): w for i, w in enumerate(self.weights) if w},
+            }, f)
+
+    @classmethod
+    def load(cls, path: str) -> "DeceptionPreClassifier":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        weights = [0.0] * data["n_features"]
+        for i, w in data.get("weights", {}).items():
+            weights[int(i)] = w
+        # Files saved before `samples_seen` was recorded came from a fitted model
+        return cls(n_features=data["n_features"], band=tuple(data["band"]), weights=weights, bias=data["bias"],
+                   samples_seen=data.get("samples_seen", 1))
+
+    @classmethod
+    def from_log_dir(cls, log_dir: str, **kwargs) -> "DeceptionPreClassifier":
+        """
+        Train on every run's game_state.json under `log_dir`. With no labelled
+        statements yet (e.g. a first run) the classifier starts untrained and
+        learns online from escalated statements.
+        """
+        samples: List[Tuple[str, int]] = []
+        for root, _dirs, files in os.walk(log_dir):
+            if "game_state.json" not in files:
+                continue
+            try:
+                with open(os.path.join(root, "game_state.json"), "r", encoding="utf-8") as f:
+                    snapshot = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            # Older snapshots stored deception_history itself rather than the normalized store
+            history = snapshot.get("deception_history") or deception_history_view(
+                snapshot.get("deception_statements", []) or [], snapshot.get("deception_analyses", {}) or {}
+            )
+            for records in history.values():
+                samples.extend(training_samples(records))
+        classifier = cls(**kwargs)
+        return classifier.fit(samples) if samples else classifier
+
+
+def training_samples(records: Iterable[Dict]) -> List[Tuple[str, int]]:
+    """
+    Turn `deception_history` records into (statement, label) pairs, one per
+    LLM peer analysis. Classifier-sourced analyses are skipped so the model
+    never trains on its own output.
+    """
+    samples = []
+    for record in records:
+        statement = record.get("statement", "")
+        for analysis in (record.get("other_analyses", {}) or {}).values():
+            if analysis.get("source", "llm") != "llm":
+                continue
+            samples.append((statement, 1 if analysis.get("is_deceptive", 0) == 1 else 0))
+    return samples
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for the local deception pre-classifier (no LLM calls).
+"""
+
+import os
+import tempfile
+
+from deception_classifier import DeceptionPreClassifier, training_samples
+from response_parsing import validate
+
+RECORDS = [
+    {"statement": "Trust me, I swear I'm innocent, it's obviously Bob",
+     "other_analyses": {"Bob": {"is_deceptive": 1, "source": "llm"}, "Cy": {"is_deceptive": 1}}},
+    {"statement": "I saw Dana defend Eve twice, that's worth checking",
+     "other_analyses": {"Bob": {"is_deceptive": 0, "source": "llm"}, "Cy": {"is_deceptive": 1, "source": "classifier"}}},
+]
+
+def test_training_samples_skip_classifier_labels():
+    samples = training_samples(RECORDS)
+    assert len(samples) == 3
+    assert all(label in (0, 1) for _, label in samples)
+
+def test_fit_separates_and_classifies():
+    clf = DeceptionPreClassifier(band=(0.4, 0.6)).fit(training_samples(RECORDS) * 10)
+    high = clf.predict_proba("Believe me, I swear it's obviously not me")
+    low = clf.predict_proba("I saw Dana defend Eve, worth checking")
+    assert high > 0.6 > 0.4 > low
+    assert not clf.is_uncertain(high)
+
+    analysis = clf.classify("Believe me, I swear it's obviously not me")
+    assert analysis["source"] == "classifier"
+    assert analysis["is_deceptive"] == 1
+    assert set(["is_deceptive", "confidence", "suspicion_level"]) <= set(analysis)
+    # Classifier labels fit the peer analysis schema, "unknown" deception type included
+    assert validate(dict(analysis), "peer_analysis")[0]["deception_type"] == "unknown"
+
+def test_save_and_load_roundtrip():
+    clf = DeceptionPreClassifier().fit(training_samples(RECORDS))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "clf.json")
+        clf.save(path)
+        loaded = DeceptionPreClassifier.load(path)
+    statement = RECORDS[0]["statement"]
+    assert abs(loaded.predict_proba(statement) - clf.predict_proba(statement)) < 1e-9
+
+def test_empty_log_dir_gives_untrained_classifier():
+    with tempfile.TemporaryDirectory() as tmp:
+        clf = DeceptionPreClassifier.from_log_dir(tmp, band=(0.45, 0.55))
+    assert clf.samples_seen == 0
+    assert clf.is_uncertain(0.99) and clf.is_uncertain(0.01)
+
+    clf.partial_fit(training_samples(RECORDS) * 20)
+    assert not clf.is_uncertain(0.99)
+
+if __name__ == "__main__":
+    test_training_samples_skip_classifier_labels()
+    test_fit_separates_and_classifies()
+    test_save_and_load_roundtrip()
+    test_empty_log_dir_gives_untrained_classifier()
+    print("Deception pre-classifier tests passed")
@@ -1,15 +1,46 @@
-from typing import Dict, List, Optional
-from langchain_openai import ChatOpenAI
+from collections.abc import Mapping
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from langchain_core.language_models import BaseChatModel
 import json
 from datetime import datetime
+from response_parsing import parse_response, json_mode_kwargs, model_name_of
+from llm_calls import invoke_llm
+from prompts import ANALYST_SYSTEM_PROMPT, build_messages, instruction
+from blob_store import log_payload
+
+# Sources of stand-in analyses that carry no judgement (the reply could not be
+# parsed, or the call errored or missed the phase deadline); they stay in the
+# store but are left out of metrics, scores and training
+FALLBACK_SOURCES = ("parse_error", "timeout", "error")
+
+
+def is_fallback(analysis: Dict) -> bool:
+    return analysis.get("source") in FALLBACK_SOURCES
 
 class DeceptionDetector:
     """
     Handles deception detection analysis for player statements using Chain of Thought reasoning.
     """
     
-    def __init__(self, llm: ChatOpenAI):
+    def __init__(self, llm: BaseChatModel, models=None):
         self.llm = llm
+        self.models = models  # optional models.ModelRegistry routing self/peer analysis
+
+    def _llm_for(self, call_type: str):
+        return self.models.for_call(call_type) if self.models is not None else self.llm
+
+    def _invoke(self, prompt, call_type: str, player: str) -> Tuple[str, Optional[str]]:
+        """
+        Call the model for an analysis on behalf of `player`, requesting provider
+        JSON mode where supported. Returns (text, model name).
+        """
+        llm = self._llm_for(call_type)
+        text, _info = invoke_llm(
+            llm, prompt, call_type, max_tokens=300, player=player,
+            **json_mode_kwargs(llm, call_type)
+        )
+        return text, model_name_of(llm)
     
     def analyze_self_deception(self, player_name: str, statement: str, context: str = "") -> Dict:
         """
@@ -23,56 +54,28 @@ class DeceptionDetector:
         Returns:
             Dict containing deception analysis in JSON format
         """
-        prompt = f"""
-You are {player_name}. You just made this statement: "{statement}"
-
-Context: {context}
-
-Think step by step to analyze deception:
-1. Intention behind the statement
-2. Any deliberate omission, distortion, or fabrication
-3. Whether you tried to mislead others about role/suspicions/knowledge
-4. Consistency with your true beliefs/knowledge
-
-Then classify whether your statement was deceptive or not.
-
-Respond in this exact JSON format:
-{{
-    "chain_of_thought": "Your step-by-step reasoning about the statement",
-    "is_deceptive": 0 or 1,
-    "confidence": 0.0 to 1.0,
-    "deception_type": "none" | "omission" | "distortion" | "fabrication" | "misdirection",
-    "reasoning": "Brief explanation of your classification"
-}}
-No extra text, no markdown, no code fences.
-"""
+        prompt = build_messages(
+            ANALYST_SYSTEM_PROMPT, context,
+            instruction("self_analysis", player_name=player_name, statement=statement),
+            label="Context",
+        )
         
-        raw_text = self.llm.invoke(prompt, max_tokens=300, timeout=10).content.strip()                
-        try:
-            result = json.loads(raw_text)
-            # required fields and validate types
-            result.setdefault("chain_of_thought", "")
-            result.setdefault("is_deceptive", 0)
-            result.setdefault("confidence", 0.5)
-            result.setdefault("deception_type", "none")
-            result.setdefault("reasoning", "")
-            
-            # Validate and normalize values
-            result["is_deceptive"] = 1 if result["is_deceptive"] else 0
-            result["confidence"] = max(0.0, min(1.0, float(result["confidence"])))
-            
-        except (json.JSONDecodeError, ValueError, KeyError) as e:
+        raw_text, model_name = self._invoke(prompt, "self_analysis", player_name)
+        result, ok = parse_response(raw_text, "self_analysis", model_name)
+        if not ok:
             # Fallback 
             result = {
                 "chain_of_thought": f"Failed to parse response: {raw_text}",
                 "is_deceptive": 0,
                 "confidence": 0.0,
                 "deception_type": "none",
-                "reasoning": f"JSON parsing error: {str(e)}",
+                "reasoning": f"JSON parsing error: {result.get('_parse_error', '')}",
+                "source": "parse_error",
             }
-        # needa always include raw response and prompt for logging
-        result.setdefault("_raw_response", raw_text)
-        result.setdefault("_prompt", prompt)
+        result.setdefault("source", "llm")
+        # needa always include raw response and prompt (or their blob references) for logging
+        for key, value in log_payload(prompt, raw_text, "self_analysis").items():
+            result.setdefault(key, value)
         return result
     
     def analyze_other_deception(self, observer_name: str, speaker_name: str, statement: str, 
@@ -99,68 +102,142 @@ No extra text, no markdown, no code fences.
                 history_items.append(f"- {h.get('statement', 'Unknown')}: classified as {deceptive}")
             history_text = f"\nPrevious statements from {speaker_name}:\n" + "\n".join(history_items)
         
-        prompt = f"""
-You are {observer_name}. Another player, {speaker_name}, just made this statement: "{statement}"
-Context: {context}{history_text}
-
-Please analyze {speaker_name}'s statement using Chain of Thought reasoning. 
-Think step by step to analyze deception:
-1. Likely intentions behind the statement
-2. Consistency with prior behavior/claims
-3. Contradictions, unusual phrasing, or suspicious elements
-4. Truthfulness given game knowledge
-5. Consider role possibilities and motivations
-
-Based on your analysis, classify whether you think this statement was deceptive or not.
-
-Respond in this exact JSON format:
-{{
-    "chain_of_thought": "Your step-by-step reasoning about {speaker_name}'s statement",
-    "is_deceptive": 0 or 1,
-    "confidence": 0.0 to 1.0,
-    "deception_type": "none" | "omission" | "distortion" | "fabrication" | "misdirection",
-    "reasoning": "Brief explanation of your classification",
-    "suspicion_level": 0.0 to 1.0
-}}
-No extra text, no markdown, no code fences.
-"""
+        prompt = build_messages(
+            ANALYST_SYSTEM_PROMPT, context,
+            instruction("peer_analysis", observer_name=observer_name, speaker_name=speaker_name,
+                        statement=statement, history_text=history_text),
+            label="Context",
+        )
         
-        raw_text = self.llm.invoke(prompt, max_tokens=300, timeout=10).content.strip()          
-        try:
-            result = json.loads(raw_text)
-            # required fields and validate types
-            result.setdefault("chain_of_thought", "")
-            result.setdefault("is_deceptive", 0)
-            result.setdefault("confidence", 0.5)
-            result.setdefault("deception_type", "none")
-            result.setdefault("reasoning", "")
-            result.setdefault("suspicion_level", 0.5)
-            
-            # Validate and normalize values
-            result["is_deceptive"] = 1 if result["is_deceptive"] else 0
-            result["confidence"] = max(0.0, min(1.0, float(result["confidence"])))
-            result["suspicion_level"] = max(0.0, min(1.0, float(result["suspicion_level"])))
-            
-        except (json.JSONDecodeError, ValueError, KeyError) as e:
+        raw_text, model_name = self._invoke(prompt, "peer_analysis", observer_name)
+        result, ok = parse_response(raw_text, "peer_analysis", model_name)
+        if not ok:
             # Fallback 
             result = {
                 "chain_of_thought": f"Failed to parse response: {raw_text}",
                 "is_deceptive": 0,
                 "confidence": 0.0,
                 "deception_type": "none",
-                "reasoning": f"JSON parsing error: {str(e)}",
+                "reasoning": f"JSON parsing error: {result.get('_parse_error', '')}",
                 "suspicion_level": 0.5,
+                "source": "parse_error",
             }
-        # Always include raw response and prompt for logging
-        result.setdefault("_raw_response", raw_text)
-        result.setdefault("_prompt", prompt)
+        result.setdefault("source", "llm")
+        # Always include raw response and prompt (or their blob references) for logging
+        for key, value in log_payload(prompt, raw_text, "peer_analysis").items():
+            result.setdefault(key, value)
         return result
 
 
+class ScoreMatrix(Mapping):
+    """
+    Dense observer x target deception scores indexed by player id.
+
+    Reads like the old `{observer: {target: score}}` dict (only assessed pairs
+    appear), so `Player.vote` and printing work unchanged. Scores are stored
+    one column per target: `updated` copies only the assessed target's column
+    and shares the others with the matrix it came from, so an update costs
+    O(players) and earlier game states keep their scores. The dense `values`
+    and `seen` matrices are assembled on demand.
+    """
+
+    # Weight of a new assessment in the exponentially weighted score
+    WEIGHT = 0.7
+
+    def __init__(self, players: Iterable[str] = (), values: Optional[np.ndarray] = None,
+                 seen: Optional[np.ndarray] = None):
+        self.players = list(players)
+        self.index = {p: i for i, p in enumerate(self.players)}
+        n = len(self.players)
+        values = values if values is not None else np.full((n, n), 0.5)
+        seen = seen if seen is not None else np.zeros((n, n), dtype=bool)
+        self._values = [values[:, j].copy() for j in range(n)]
+        self._seen = [seen[:, j].copy() for j in range(n)]
+        self._assessed = seen.sum(axis=1)  # targets each observer has assessed
+
+    @classmethod
+    def _from_columns(cls, players: List[str], index: Dict[str, int], values: List[np.ndarray],
+                      seen: List[np.ndarray], assessed: np.ndarray) -> "ScoreMatrix":
+        matrix = cls.__new__(cls)
+        matrix.players, matrix.index = players, index
+        matrix._values, matrix._seen, matrix._assessed = values, seen, assessed
+        return matrix
+
+    @classmethod
+    def from_dict(cls, scores: Dict[str, Dict[str, float]]) -> "ScoreMatrix":
+        players = list(dict.fromkeys([*scores, *(t for row in scores.values() for t in row)]))
+        index = {p: i for i, p in enumerate(players)}
+        values = np.full((len(players), len(players)), 0.5)
+        seen = np.zeros((len(players), len(players)), dtype=bool)
+        for observer, row in scores.items():
+            for target, score in row.items():
+                values[index[observer], index[target]] = score
+                seen[index[observer], index[target]] = True
+        return cls(players, values, seen)
+
+    @property
+    def values(self) -> np.ndarray:
+        n = len(self.players)
+        return np.column_stack(self._values) if n else np.full((0, 0), 0.5)
+
+    @property
+    def seen(self) -> np.ndarray:
+        n = len(self.players)
+        return np.column_stack(self._seen) if n else np.zeros((0, 0), dtype=bool)
+
+    def updated(self, target: str, assessments: Dict[str, float]) -> "ScoreMatrix":
+        """New matrix with every observer's score of `target` moved toward their new assessment at once."""
+        added = [p for p in dict.fromkeys([target, *assessments]) if p not in self.index]
+        if added:
+            # Roster grew (rare: games start with every player indexed), so every column is extended
+            players = self.players + added
+            index = {p: i for i, p in enumerate(players)}
+            grow, n = len(added), len(players)
+            values = [np.concatenate([c, np.full(grow, 0.5)]) for c in self._values] + [np.full(n, 0.5) for _ in added]
+            seen = [np.concatenate([c, np.zeros(grow, dtype=bool)]) for c in self._seen] + [np.zeros(n, dtype=bool) for _ in added]
+            assessed = np.concatenate([self._assessed, np.zeros(grow, dtype=self._assessed.dtype)])
+        else:
+            players, index = self.players, self.index
+            values, seen, assessed = list(self._values), list(self._seen), self._assessed
+        if assessments:
+            rows = np.fromiter((index[o] for o in assessments), dtype=np.int64, count=len(assessments))
+            new = np.fromiter((float(v) for v in assessments.values()), dtype=np.float64, count=len(assessments))
+            col = index[target]
+            column, seen_column = values[col].copy(), seen[col].copy()
+            column[rows] = self.WEIGHT * new + (1 - self.WEIGHT) * column[rows]
+            assessed = assessed.copy()
+            assessed[rows] += ~seen_column[rows]
+            seen_column[rows] = True
+            values[col], seen[col] = column, seen_column
+        return ScoreMatrix._from_columns(players, index, values, seen, assessed)
+
+    def __getitem__(self, observer: str) -> Dict[str, float]:
+        i = self.index[observer]
+        if not self._assessed[i]:
+            raise KeyError(observer)
+        return {self.players[j]: float(self._values[j][i]) for j in range(len(self.players)) if self._seen[j][i]}
+
+    def __iter__(self):
+        return (self.players[i] for i in np.flatnonzero(self._assessed))
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self._assessed))
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        return {observer: self[observer] for observer in self}
+
+
 def update_deception_history(state, player_name: str, statement: str, 
-                           self_analysis: Dict, other_analyses: Dict[str, Dict]):
+                           self_analysis: Dict, other_analyses: Dict[str, Dict], **extra):
     """
-    Update the deception history for a player based on their statement and analyses.
+    Record a statement and its analyses in the normalized deception store and
+    update deception scores.
+
+    The store is two tables on the state: `deception_statements` (one row per
+    statement with its aggregates) and `deception_analyses`
+    ({statement_id: {observer: analysis}}, the speaker's own entry being the
+    self-analysis). `deception_history` and `deception_iterations` are views
+    over these tables, so every analysis is held exactly once.
     
     Args:
         state: Game state object
@@ -168,18 +245,23 @@ def update_deception_history(state, player_name: str, statement: str,
         statement: The statement that was analyzed
         self_analysis: The player's own deception analysis
         other_analyses: Other players' analyses {observer_name: analysis}
+        **extra: Additional statement columns (e.g. classifier_probability, escalated)
     
+    Fallback analyses (`is_fallback`) are stored but left out of the
+    aggregates, scores and running metrics; a statement whose self-analysis is
+    a fallback has no label (`self_reported_deceptive` None).
+
     Returns:
         Updated game state
     """
 
-    # Aggregate observer metrics
-    observer_count = len(other_analyses)
-    observer_deceptive_count = sum(1 for a in other_analyses.values() if a.get("is_deceptive", 0) == 1)
-    observers_flagging = [name for name, a in other_analyses.items() if a.get("is_deceptive", 0) == 1]
-    suspicion_levels = {name: a.get("suspicion_level", 0.5) for name, a in other_analyses.items()}
+    # Aggregate observer metrics over the analyses that carry a judgement
+    judged = {name: a for name, a in other_analyses.items() if not is_fallback(a)}
+    observer_count = len(judged)
+    observer_deceptive_count = sum(1 for a in judged.values() if a.get("is_deceptive", 0) == 1)
+    observers_flagging = [name for name, a in judged.items() if a.get("is_deceptive", 0) == 1]
     if observer_count > 0:
-        average_suspicion = sum(float(v) for v in suspicion_levels.values()) / observer_count
+        average_suspicion = sum(float(a.get("suspicion_level", 0.5)) for a in judged.values()) / observer_count
         observer_deceptive_fraction = observer_deceptive_count / observer_count
     else:
         average_suspicion = 0.0
@@ -201,45 +283,75 @@ def update_deception_history(state, player_name: str, statement: str,
     else:
         timestamp = datetime.utcnow().isoformat()
 
-    deception_record = {
+    self_label = None if is_fallback(self_analysis) else (1 if self_analysis.get("is_deceptive", 0) == 1 else 0)
+    statement_id = f"s{len(state.deception_statements)}"
+    statement_row = {
+        "id": statement_id,
+        "speaker": player_name,
         "statement": statement,
         "round": state.round_num,
         "phase": state.phase,
-        "self_analysis": self_analysis,
-        "self_reported_deceptive": 1 if self_analysis.get("is_deceptive", 0) == 1 else 0,
-        "other_analyses": other_analyses,
+        "step": getattr(state, "step", 0),
+        "self_reported_deceptive": self_label,
         "observer_count": observer_count,
         "observer_deceptive_count": observer_deceptive_count,
         "observer_deceptive_fraction": observer_deceptive_fraction,
         "observers_flagging": observers_flagging,
-        "suspicion_levels": suspicion_levels,
         "average_suspicion": average_suspicion,
         "context_snapshot": context_snapshot,
         "timestamp": timestamp,
+        **extra,
     }
+    analyses = {player_name: self_analysis, **other_analyses}
     
-    # Update history
-    new_history = state.deception_history.copy()
-    if player_name not in new_history:
-        new_history[player_name] = []
-    new_history[player_name].append(deception_record)
-    
-    # Update deception scores (how each observer perceives the other players)
-    new_scores = state.deception_scores.copy()
-    for observer, analysis in other_analyses.items():
-        if observer not in new_scores:
-            new_scores[observer] = {}
-        
-        # Update score 
-        current_score = new_scores[observer].get(player_name, 0.5)
-        new_assessment = analysis.get("suspicion_level", 0.5)
-        # Weighted average: 70% new assessment, 30% historical
-        new_scores[observer][player_name] = 0.7 * new_assessment + 0.3 * current_score
+    # Update deception scores (how each observer perceives the other players):
+    # 70% new assessment, 30% historical, for all observers in one step
+    scores = state.deception_scores
+    if not isinstance(scores, ScoreMatrix):
+        scores = ScoreMatrix.from_dict(scores or {})
+    new_scores = scores.updated(
+        player_name, {observer: analysis.get("suspicion_level", 0.5) for observer, analysis in judged.items()}
+    )
     
-    return state.model_copy(update={
-        "deception_history": new_history,
+    update = {
+        "deception_statements": state.deception_statements + [statement_row],
+        "deception_analyses": {**state.deception_analyses, statement_id: analyses},
         "deception_scores": new_scores
-    })
+    }
+    # Keep running metrics current so final_metrics.json can be written at any point
+    running = getattr(state, "running_metrics", None)
+    if running is not None:
+        update["running_metrics"] = running.record(
+            player_name, state.round_num, self_label, judged,
+            average_suspicion, observer_deceptive_fraction,
+        )
+    return state.model_copy(update=update)
+
+
+def _statement_view(row: Dict, analyses: Dict[str, Dict]) -> Dict:
+    """A statement row joined with its analyses (shared, not copied)."""
+    speaker = row["speaker"]
+    statement_analyses = analyses.get(row["id"], {})
+    other_analyses = {o: a for o, a in statement_analyses.items() if o != speaker}
+    return {
+        **row,
+        "self_analysis": statement_analyses.get(speaker, {}),
+        "other_analyses": other_analyses,
+        "suspicion_levels": {o: a.get("suspicion_level", 0.5) for o, a in other_analyses.items()},
+    }
+
+
+def deception_history_view(statements: List[Dict], analyses: Dict[str, Dict[str, Dict]]) -> Dict[str, List[Dict]]:
+    """`deception_history` layout ({speaker: [records]}) built from the store."""
+    history: Dict[str, List[Dict]] = {}
+    for row in statements:
+        history.setdefault(row["speaker"], []).append(_statement_view(row, analyses))
+    return history
+
+
+def deception_iterations_view(statements: List[Dict], analyses: Dict[str, Dict[str, Dict]]) -> List[Dict]:
+    """`deception_iterations` layout (one record per statement, in order) built from the store."""
+    return [_statement_view(row, analyses) for row in statements]
 
 
 def compute_observer_accuracy(state) -> Dict[str, Dict[str, float]]:
@@ -252,21 +364,26 @@ def compute_observer_accuracy(state) -> Dict[str, Dict[str, float]]:
     """
     metrics: Dict[str, Dict[str, float]] = {}
 
-    for speaker, history in getattr(state, "deception_history", {}).items():
-        for record in history:
-            true_label = 1 if record.get("self_analysis", {}).get("is_deceptive", 0) == 1 else 0
-            for observer, analysis in record.get("other_analyses", {}).items():
-                pred = 1 if analysis.get("is_deceptive", 0) == 1 else 0
-                stat = metrics.setdefault(observer, {"tp": 0, "tn": 0, "fp": 0, "fn": 0, "total": 0})
-                if pred == 1 and true_label == 1:
-                    stat["tp"] += 1
-                elif pred == 0 and true_label == 0:
-                    stat["tn"] += 1
-                elif pred == 1 and true_label == 0:
-                    stat["fp"] += 1
-                elif pred == 0 and true_label == 1:
-                    stat["fn"] += 1
-                stat["total"] += 1
+    analyses = getattr(state, "deception_analyses", {}) or {}
+    for row in getattr(state, "deception_statements", []) or []:
+        speaker = row["speaker"]
+        true_label = row.get("self_reported_deceptive", 0)
+        if true_label is None:
+            continue
+        for observer, analysis in analyses.get(row["id"], {}).items():
+            if observer == speaker or is_fallback(analysis):
+                continue
+            pred = 1 if analysis.get("is_deceptive", 0) == 1 else 0
+            stat = metrics.setdefault(observer, {"tp": 0, "tn": 0, "fp": 0, "fn": 0, "total": 0})
+            if pred == 1 and true_label == 1:
+                stat["tp"] += 1
+            elif pred == 0 and true_label == 0:
+                stat["tn"] += 1
+            elif pred == 1 and true_label == 0:
+                stat["fp"] += 1
+            elif pred == 0 and true_label == 1:
+                stat["fn"] += 1
+            stat["total"] += 1
 
     # compute rates
     for observer, stat in metrics.items():
@@ -0,0 +1,55 @@
+import random
+from typing import Dict, List, Optional, Sequence
+
+# Optional work shed as pressure rises; level n turns on the first n actions
+ACTIONS = (
+    "skip_self_analysis",   # use the speaker's own is_deceptive reply instead of a self-analysis call
+    "sample_observers",     # only `observer_sample` observers run LLM peer analysis
+    "heuristic_bids",       # rule-based bids instead of the configured (model) bid strategy
+    "skip_vote_analysis",   # do not analyze vote reasoning for deception
+    "short_prompts",        # render the debate transcript with `short_prompt_tokens`
+)
+
+
+class DegradationPolicy:
+    """
+    Maps budget and latency pressure to a degradation level.
+
+    Budget pressure is the share of the game's token/cost budget already used
+    (`CallMeter.budget_fraction`); latency pressure is the mean latency of the
+    most recent calls (`CallMeter.recent_latency`). Each threshold passed
+    raises that pressure's level by one, and the higher of the two levels
+    decides how many of `ACTIONS` are active.
+    """
+
+    def __init__(self, budget_levels: Sequence[float] = (0.5, 0.6, 0.7, 0.8, 0.9),
+                 latency_levels: Sequence[float] = (8.0, 12.0, 16.0, 20.0, 30.0),
+                 observer_sample: int = 3, short_prompt_tokens: int = 300):
+        self.budget_levels = tuple(budget_levels)
+        self.latency_levels = tuple(latency_levels)
+        self.observer_sample = observer_sample
+        self.short_prompt_tokens = short_prompt_tokens
+
+    @classmethod
+    def from_config(cls, settings: Dict) -> "DegradationPolicy":
+        return cls(**settings)
+
+    def level(self, meter) -> int:
+        if meter is None:
+            return 0
+        used = meter.budget_fraction()
+        latency = meter.recent_latency()
+        budget_level = sum(1 for t in self.budget_levels if used >= t)
+        latency_level = sum(1 for t in self.latency_levels if latency is not None and latency >= t)
+        return min(len(ACTIONS), max(budget_level, latency_level))
+
+    def active(self, meter) -> List[str]:
+        """Degradations in force right now, in shedding order (empty at full service)."""
+        return list(ACTIONS[:self.level(meter)])
+
+    def sample_observers(self, observers: List[str], rng: Optional[random.Random] = None) -> List[str]:
+        """At most `observer_sample` of `observers`, chosen at random, kept in roster order."""
+        if len(observers) <= self.observer_sample:
+            return list(observers)
+        chosen = set((rng or random).sample(observers, self.observer_sample))
+        return [o for o in observers if o in chosen]
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Tests for the degradation policy (no LLM calls).
+"""
+
+import random
+
+from degradation import ACTIONS, DegradationPolicy
+from llm_calls import CallMeter
+
+
+def _meter_at(tokens: int, budget: int, elapsed: float = 0.1) -> CallMeter:
+    meter = CallMeter(token_budget=budget)
+    meter.record("bid", {"elapsed": elapsed, "usage": {"prompt_tokens": tokens, "completion_tokens": 0}})
+    return meter
+
+
+def test_levels_follow_budget_and_latency():
+    policy = DegradationPolicy(budget_levels=(0.5, 0.6, 0.7, 0.8, 0.9), latency_levels=(5.0, 100, 100, 100, 100))
+    assert policy.active(None) == []
+    assert policy.active(CallMeter()) == []  # no budget, fast calls
+    assert policy.active(_meter_at(550, 1000)) == ["skip_self_analysis"]
+    assert policy.active(_meter_at(950, 1000)) == list(ACTIONS)
+    # Slow provider: latency alone degrades even without a budget
+    slow = CallMeter()
+    slow.record("debate", {"elapsed": 6.0})
+    assert policy.level(slow) == 1
+
+
+def test_observer_sample_keeps_roster_order():
+    policy = DegradationPolicy(observer_sample=2)
+    observers = ["A", "B", "C", "D", "E"]
+    sample = policy.sample_observers(observers, random.Random(0))
+    assert len(sample) == 2 and sample == [o for o in observers if o in sample]
+    assert policy.sample_observers(["A", "B"]) == ["A", "B"]
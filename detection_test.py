@@ -4,12 +4,17 @@ Simple test script to demonstrate the deception detection system implementation.
 This tests only the deception detection components without LLM dependencies.
 """
 
-from deception_detection import DeceptionDetector, update_deception_history, compute_observer_accuracy
+from deception_detection import (
+    DeceptionDetector, update_deception_history, compute_observer_accuracy, deception_history_view, ScoreMatrix,
+)
+import pytest
 from logs import print_header, print_subheader, print_kv
 from pydantic import BaseModel, Field
 from typing import Dict, List, Optional, Literal
 from datetime import datetime
 import json
+import threading
+import time
 
 # Simplified GameState for testing
 class TestGameState(BaseModel):
@@ -18,9 +23,14 @@ class TestGameState(BaseModel):
     alive_players: List[str] = []
     roles: Dict[str, str] = {}
     phase: str = "debate"
-    deception_history: Dict[str, List[Dict]] = Field(default_factory=dict)
+    deception_statements: List[Dict] = Field(default_factory=list)
+    deception_analyses: Dict[str, Dict[str, Dict]] = Field(default_factory=dict)
     deception_scores: Dict[str, Dict[str, float]] = Field(default_factory=dict)
 
+    @property
+    def deception_history(self) -> Dict[str, List[Dict]]:
+        return deception_history_view(self.deception_statements, self.deception_analyses)
+
 def generate_test_deception_summary(state: TestGameState) -> Dict:
     """Generate a summary of deception patterns for testing."""
     summary = {
@@ -98,6 +108,9 @@ class MockLLM:
             def __init__(self, content):
                 self.content = content
         
+        if not isinstance(prompt, str):
+            # Prompts are sent as [system prefix, context, instruction] messages
+            prompt = "\n".join(m.content for m in prompt)
         response = mock_llm_response(prompt)
         return MockResponse(json.dumps(response))
 
@@ -112,7 +125,6 @@ def test_deception_detection():
         alive_players=["Alice", "Bob", "Charlie"], 
         roles={"Alice": "Villager", "Bob": "Werewolf", "Charlie": "Seer"},
         phase="debate",
-        deception_history={},
         deception_scores={}
     )
     
@@ -221,5 +233,110 @@ def test_deception_detection():
     print_kv("7", "Comprehensive summary generation", indent=2)
     print_kv("8", "Binary deception classification (0 or 1)", indent=2)
 
+def test_deception_store_views_share_analyses():
+    """Each analysis is stored once; history views and accuracy read the store."""
+    state = TestGameState(round_num=1, alive_players=["Alice", "Bob", "Charlie"], roles={"Bob": "Werewolf"})
+    self_analysis = {"is_deceptive": 1, "_prompt": "p" * 100}
+    other_analyses = {
+        "Alice": {"is_deceptive": 1, "suspicion_level": 0.9},
+        "Charlie": {"is_deceptive": 0, "suspicion_level": 0.3},
+    }
+    state = update_deception_history(state, "Bob", "I'm innocent", self_analysis, other_analyses, escalated=True)
+
+    row = state.deception_statements[0]
+    assert row["id"] == "s0" and row["speaker"] == "Bob" and row["escalated"] is True
+    assert row["observer_deceptive_count"] == 1 and abs(row["average_suspicion"] - 0.6) < 1e-9
+    assert "self_analysis" not in row and "other_analyses" not in row
+    assert set(state.deception_analyses["s0"]) == {"Bob", "Alice", "Charlie"}
+
+    record = state.deception_history["Bob"][0]
+    assert record["self_analysis"] is self_analysis
+    assert record["other_analyses"]["Alice"] is other_analyses["Alice"]
+    assert record["suspicion_levels"] == {"Alice": 0.9, "Charlie": 0.3}
+
+    accuracy = compute_observer_accuracy(state)
+    assert accuracy["Alice"]["tp"] == 1 and accuracy["Charlie"]["fn"] == 1
+    assert "Bob" not in accuracy
+
+
+def test_score_matrix_updates_without_aliasing():
+    """Score updates return a new matrix; earlier states keep their scores."""
+    state = TestGameState(alive_players=["Alice", "Bob", "Charlie"])
+    first = update_deception_history(state, "Bob", "hi", {}, {"Alice": {"suspicion_level": 1.0}})
+    second = update_deception_history(first, "Bob", "hi again", {}, {
+        "Alice": {"suspicion_level": 0.0}, "Charlie": {"suspicion_level": 0.5},
+    })
+
+    assert first.deception_scores["Alice"] == {"Bob": 0.7 * 1.0 + 0.3 * 0.5}
+    assert "Charlie" not in first.deception_scores
+    assert abs(second.deception_scores["Alice"]["Bob"] - 0.3 * 0.85) < 1e-9
+    assert second.deception_scores.to_dict() == {"Alice": {"Bob": second.deception_scores["Alice"]["Bob"]},
+                                                 "Charlie": {"Bob": 0.5}}
+
+    restored = ScoreMatrix.from_dict(second.deception_scores.to_dict())
+    assert restored.to_dict() == second.deception_scores.to_dict()
+
+
+def test_score_matrix_update_copies_only_the_target_column():
+    players = [f"P{i}" for i in range(50)]
+    before = ScoreMatrix(players)
+    after = before.updated("P3", {"P1": 1.0, "P2": 0.0})
+    shared = [j for j in range(len(players)) if after._values[j] is before._values[j]]
+    assert shared == [j for j in range(len(players)) if j != 3]
+    assert before.to_dict() == {} and len(after) == 2
+    assert after["P1"] == {"P3": 0.7 + 0.3 * 0.5}
+    assert after.values.shape == (50, 50) and after.seen.sum() == 2
+
+    grown = after.updated("New", {"P1": 0.2})
+    assert grown["P1"] == {"P3": after["P1"]["P3"], "New": pytest.approx(0.7 * 0.2 + 0.3 * 0.5)}
+    assert after.players == players
+
+
+class _SlowModel:
+    """Chat model stand-in answering every analysis after `delay` seconds; notes the threads it ran on."""
+    REPLY = json.dumps({"chain_of_thought": "c", "is_deceptive": 0, "confidence": 0.5, "deception_type": "none",
+                        "reasoning": "r", "suspicion_level": 0.2})
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.threads = set()
+
+    def invoke(self, prompt, **kwargs):
+        self.threads.add(threading.current_thread().name)
+        time.sleep(self.delay)
+        return type("Message", (), {"content": self.REPLY, "usage_metadata": None})()
+
+
+class _Voter:
+    def __init__(self, name, target, llm):
+        self.name, self.target, self.llm, self.models = name, target, llm, None
+
+    def vote(self, deception_scores=None, dialogue_history=None, alive_players=None):
+        self.llm.invoke("vote")
+        return self.target, {"vote": self.target, "reasoning": f"{self.target} dodged questions", "is_deceptive": False}
+
+
+def test_vote_phase_runs_votes_and_analyses_together_on_one_pool():
+    from game_graph import GameState, _call_executor, vote_node
+
+    llm = _SlowModel(0.1)
+    names = ["Alice", "Bob", "Cy", "Dee"]
+    players = {name: _Voter(name, names[(i + 1) % 4], llm) for i, name in enumerate(names)}
+    config = {"configurable": {"player_objects": players, "max_parallel_calls": 16}}
+    state = GameState(players=names, alive_players=names, phase="vote", deception_scores=ScoreMatrix(names))
+
+    started = time.monotonic()
+    state = vote_node(state, config)
+    # 4 votes, then 4 self and 12 peer analyses at once (one after another: 2s)
+    assert time.monotonic() - started < 0.6
+    assert state.votes == {"Alice": "Bob", "Bob": "Cy", "Cy": "Dee", "Dee": "Alice"}
+    assert [row["speaker"] for row in state.deception_statements] == names
+    assert all(len(state.deception_analyses[row["id"]]) == 4 for row in state.deception_statements)
+
+    vote_node(state, config)
+    pool = {thread.name for thread in _call_executor(config)._threads}
+    assert llm.threads <= pool and len(pool) <= 16
+
+
 if __name__ == "__main__":
     test_deception_detection()
\ No newline at end of file
@@ -0,0 +1,159 @@
+import argparse
+import json
+import os
+from typing import Dict, Iterator, List, Tuple
+
+from deception_detection import deception_iterations_view
+
+# Column order and types of the exported tables; statement columns mirror the
+# statement rows written by `update_deception_history`
+STATEMENT_COLUMNS = {
+    "run_id": "string", "model": "string", "date": "string",
+    "statement_id": "string", "speaker": "string", "speaker_role": "string", "statement": "string",
+    "round": "int32", "phase": "string", "step": "int32",
+    "self_reported_deceptive": "int8", "observer_count": "int32", "observer_deceptive_count": "int32",
+    "observer_deceptive_fraction": "float64", "average_suspicion": "float64",
+    "classifier_probability": "float64", "escalated": "bool", "timestamp": "string",
+}
+ANALYSIS_COLUMNS = {
+    "run_id": "string", "model": "string", "date": "string",
+    "statement_id": "string", "round": "int32", "speaker": "string", "speaker_role": "string",
+    "observer": "string", "observer_role": "string", "is_self": "bool",
+    "is_deceptive": "int8", "confidence": "float64", "suspicion_level": "float64",
+    "deception_type": "string", "source": "string", "reasoning": "string", "chain_of_thought": "string",
+    "timestamp": "string",
+}
+PARTITIONS = ("model", "date")
+
+
+def _legacy_store(history: Dict[str, List[Dict]]) -> Tuple[List[Dict], Dict[str, Dict[str, Dict]]]:
+    """Statement rows and analyses from a snapshot written before the normalized store."""
+    statements, analyses = [], {}
+    records = sorted(
+        ((speaker, r) for speaker, recs in history.items() for r in recs),
+        key=lambda item: item[1].get("timestamp", ""),
+    )
+    for n, (speaker, record) in enumerate(records):
+        statement_id = f"s{n}"
+        statements.append({**record, "id": statement_id, "speaker": speaker})
+        analyses[statement_id] = {speaker: record.get("self_analysis", {}) or {}, **(record.get("other_analyses", {}) or {})}
+    return statements, analyses
+
+
+def rows_from_snapshot(snapshot: Dict, meta: Dict) -> Tuple[List[Dict], List[Dict]]:
+    """Flatten one run's game_state.json into (statement rows, per-observer analysis rows)."""
+    statements = snapshot.get("deception_statements")
+    analyses = snapshot.get("deception_analyses") or {}
+    if statements is None:
+        statements, analyses = _legacy_store(snapshot.get("deception_history", {}) or {})
+    roles = snapshot.get("roles", {}) or meta.get("roles", {}) or {}
+    run = {
+        "run_id": meta.get("run_id") or snapshot.get("log_run_id"),
+        "model": meta.get("model") or "unknown",
+        "date": (meta.get("created_at_utc") or "")[:10] or "unknown",
+    }
+
+    statement_rows, analysis_rows = [], []
+    for row in deception_iterations_view(statements, analyses):
+        speaker = row["speaker"]
+        statement_rows.append({
+            **{col: row.get(col) for col in STATEMENT_COLUMNS},
+            **run,
+            "statement_id": row["id"],
+            "speaker_role": roles.get(speaker),
+        })
+        observed = [(speaker, row["self_analysis"], True)] + [(o, a, False) for o, a in row["other_analyses"].items()]
+        for observer, analysis, is_self in observed:
+            analysis_rows.append({
+                **{col: analysis.get(col) for col in ANALYSIS_COLUMNS},
+                **run,
+                "statement_id": row["id"],
+                "round": row.get("round"),
+                "speaker": speaker,
+                "speaker_role": roles.get(speaker),
+                "observer": observer,
+                "observer_role": roles.get(observer),
+                "is_self": is_self,
+                "is_deceptive": 1 if analysis.get("is_deceptive", 0) == 1 else 0,
+                "suspicion_level": None if is_self else analysis.get("suspicion_level"),
+            })
+    return statement_rows, analysis_rows
+
+
+def iter_runs(log_dir: str) -> Iterator[Tuple[Dict, Dict]]:
+    """Yield (run meta, game_state snapshot) for each run in `log_dir`/index.jsonl, one at a time."""
+    index_path = os.path.join(log_dir, "index.jsonl")
+    if not os.path.exists(index_path):
+        return
+    with open(index_path, "r", encoding="utf-8") as fidx:
+        for line in fidx:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            try:
+                with open(record["meta_path"], "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                with open(record["state_path"], "r", encoding="utf-8") as f:
+                    snapshot = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            yield meta, snapshot
+
+
+def _partition_path(out_dir: str, table: str, row: Dict) -> str:
+    parts = [f"{key}={str(row[key]).replace('/', '_')}" for key in PARTITIONS]
+    return os.path.join(out_dir, table, *parts, f"{row['run_id']}.parquet")
+
+
+def export(log_dir: str, out_dir: str, overwrite: bool = False) -> int:
+    """
+    Write each run's deception tables as Hive-partitioned Parquet files
+    (`<out_dir>/<table>/model=<m>/date=<d>/<run_id>.parquet`), one run in memory
+    at a time. Runs already exported are skipped unless `overwrite`. Returns runs written.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet export needs pyarrow: pip install pyarrow") from e
+
+    schemas = {
+        "statements": pa.schema([(c, pa.type_for_alias(t)) for c, t in STATEMENT_COLUMNS.items() if c not in PARTITIONS]),
+        "analyses": pa.schema([(c, pa.type_for_alias(t)) for c, t in ANALYSIS_COLUMNS.items() if c not in PARTITIONS]),
+    }
+    written = 0
+    for meta, snapshot in iter_runs(log_dir):
+        statement_rows, analysis_rows = rows_from_snapshot(snapshot, meta)
+        if not statement_rows:
+            continue
+        target = _partition_path(out_dir, "statements", statement_rows[0])
+        if os.path.exists(target) and not overwrite:
+            continue
+        for table, rows in (("statements", statement_rows), ("analyses", analysis_rows)):
+            path = _partition_path(out_dir, table, rows[0])
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            columns = {name: [r.get(name) for r in rows] for name in schemas[table].names}
+            pq.write_table(pa.table(columns, schema=schemas[table]), path)
+        written += 1
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export deception statements and analyses of many runs to Parquet")
+    parser.add_argument(
+        "--log-dir",
+        default="./logs",
+        help="Directory holding index.jsonl and run folders. Default: ./logs"
+    )
+    parser.add_argument(
+        "--out",
+        default="./exports/deception",
+        help="Output dataset directory, partitioned by model and date. Default: ./exports/deception"
+    )
+    parser.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="Rewrite runs that were already exported"
+    )
+    args = parser.parse_args()
+    print(f"Exported {export(args.log_dir, args.out, overwrite=args.overwrite)} runs to {args.out}")
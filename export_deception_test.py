@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Tests for the columnar deception export (no LLM calls).
+"""
+
+import json
+
+import pytest
+
+from export_deception import ANALYSIS_COLUMNS, STATEMENT_COLUMNS, export, rows_from_snapshot
+
+META = {"run_id": "r1", "created_at_utc": "2026-01-02T03:04:05", "model": "gpt-4o-mini"}
+SNAPSHOT = {
+    "roles": {"Alice": "Villager", "Bob": "Werewolf"},
+    "deception_statements": [
+        {"id": "s0", "speaker": "Bob", "statement": "Trust me", "round": 1, "phase": "debate", "step": 3,
+         "self_reported_deceptive": 1, "observer_count": 1, "observer_deceptive_count": 1,
+         "observer_deceptive_fraction": 1.0, "average_suspicion": 0.8, "escalated": True},
+    ],
+    "deception_analyses": {"s0": {
+        "Bob": {"is_deceptive": 1, "confidence": 0.9, "source": "llm"},
+        "Alice": {"is_deceptive": 1, "suspicion_level": 0.8, "source": "llm", "_prompt_ref": {"parts": []}},
+    }},
+}
+
+def test_rows_flatten_statements_and_observers():
+    statements, analyses = rows_from_snapshot(SNAPSHOT, META)
+    assert len(statements) == 1 and set(statements[0]) == set(STATEMENT_COLUMNS)
+    assert statements[0]["speaker_role"] == "Werewolf" and statements[0]["date"] == "2026-01-02"
+
+    assert [(a["observer"], a["is_self"]) for a in analyses] == [("Bob", True), ("Alice", False)]
+    assert all(set(a) == set(ANALYSIS_COLUMNS) for a in analyses)
+    assert analyses[0]["suspicion_level"] is None and analyses[1]["suspicion_level"] == 0.8
+
+
+def test_rows_from_legacy_history_snapshot():
+    legacy = {"deception_history": {"Bob": [{
+        "statement": "Trust me", "round": 1, "self_analysis": {"is_deceptive": 1},
+        "other_analyses": {"Alice": {"is_deceptive": 0, "suspicion_level": 0.2}},
+        "timestamp": "2026-01-02T03:04:06",
+    }]}}
+    statements, analyses = rows_from_snapshot(legacy, META)
+    assert statements[0]["statement_id"] == "s0" and statements[0]["speaker"] == "Bob"
+    assert [a["observer"] for a in analyses] == ["Bob", "Alice"]
+
+
+def test_export_writes_partitioned_parquet(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    run_dir = tmp_path / "r1"
+    run_dir.mkdir()
+    (run_dir / "run_meta.json").write_text(json.dumps(META))
+    (run_dir / "game_state.json").write_text(json.dumps(SNAPSHOT))
+    (tmp_path / "index.jsonl").write_text(json.dumps({
+        "run_id": "r1", "meta_path": str(run_dir / "run_meta.json"), "state_path": str(run_dir / "game_state.json"),
+    }) + "\n")
+
+    out = tmp_path / "export"
+    assert export(str(tmp_path), str(out)) == 1
+    assert export(str(tmp_path), str(out)) == 0
+    table = pq.read_table(str(out / "analyses" / "model=gpt-4o-mini" / "date=2026-01-02" / "r1.parquet"))
+    assert table.num_rows == 2
+    assert table.column("observer").to_pylist() == ["Bob", "Alice"]
@@ -14,31 +14,43 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from pydantic import BaseModel, Field
-from typing import Dict, List, Optional, Literal
+from pydantic import BaseModel, ConfigDict, Field, field_serializer, field_validator
+from typing import Any, Dict, List, Optional, Literal, Tuple
 from langchain_core.runnables import RunnableConfig
-import random, tqdm, json, os
+import random, tqdm, json, os, threading, time, uuid
 from langgraph.graph import StateGraph, END
 from collections import Counter
-from Bidding import get_bid, choose_next_speaker
-from concurrent.futures import ThreadPoolExecutor
-from logs import log_event, print_header, print_subheader, print_kv, print_list, print_matrix
-from deception_detection import DeceptionDetector, update_deception_history, compute_observer_accuracy
+from Bidding import bid_source, llm_bid, rule_based_bid, choose_next_speaker, shortlist_bidders
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from running_metrics import RunningMetrics
+from logs import log_event, write_final_metrics, print_header, print_subheader, print_kv, print_list, print_matrix
+from deception_detection import (
+    DeceptionDetector, update_deception_history,
+    deception_history_view, deception_iterations_view, ScoreMatrix,
+)
+from llm_calls import CallTimeout, call_context, current_call_context, submit, time_left
+from transcript import DebateTranscript
+from functools import wraps
 from datetime import datetime
 
 class GameState(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     round_num: int = 0
     players: List[str] = []  # all players
     alive_players: List[str] = []  # updated after each night/day
     villagers: List[str] = []
     werewolves: List[str] = []
-    seer: Optional[str] = None
-    doctor: Optional[str] = None
+    seers: List[str] = []
+    doctors: List[str] = []
+    seer: Optional[str] = None  # first of `seers`
+    doctor: Optional[str] = None  # first of `doctors`
     roles: Dict[str, str] = {}  # {name: role}
 
     # Logs
     eliminated: Optional[str] = None
     protected: Optional[str] = None
+    protected_players: List[str] = []  # every doctor's target this night
     unmasked: Optional[str] = None
     exiled: Optional[str] = None
     votes: Dict[str, str] = {}  # voter: target
@@ -55,165 +67,294 @@ class GameState(BaseModel):
     unmask_log: Optional[str] = None
 
     # Game logs 
-    game_logs: List[Dict] = Field(default_factory=list)
-
-    # Deception tracking
-    deception_history: Dict[str, List[Dict]] = Field(default_factory=dict)  # {player: [deception_records]}
-    deception_scores: Dict[str, Dict[str, float]] = Field(default_factory=dict)  # {observer: {target: score}}
-    # New: per-iteration summaries for quick inspection and export
-    deception_iterations: List[Dict] = Field(default_factory=list)
+    # The ever-growing containers are typed `Any` inside: LangGraph rebuilds the state
+    # before every node, and validating each entry makes large-roster games quadratic
+    game_logs: List[Any] = Field(default_factory=list)  # event dicts
+
+    # Deception tracking: normalized store, one row per analyzed statement and
+    # each analysis held once; `deception_history`/`deception_iterations` are views
+    deception_statements: List[Any] = Field(default_factory=list)  # statement row dicts
+    deception_analyses: Dict[str, Any] = Field(default_factory=dict)  # {statement_id: {observer: analysis}}
+    deception_scores: ScoreMatrix = Field(default_factory=ScoreMatrix)  # observer x target, reads as {observer: {target: score}}
+    running_metrics: RunningMetrics = Field(default_factory=RunningMetrics)  # updated per analyzed statement
     current_speaker: Optional[str] = None
     winner: Optional[Literal["Villagers", "Werewolves"]] = None
+    stop_reason: Optional[str] = None  # set when the game ends without a winner (e.g. "token_budget")
 
     phase: Literal[
         "eliminate", "protect", "unmask", "resolve_night",
         "check_winner_night", "debate", "vote", "exile",
-        "check_winner_day", "summarize"
+        "check_winner_day", "summarize", "end"
     ] = "eliminate"
     step: int = 0 
 
+    # Identifies the game to the call scheduler, live events and metrics, with or
+    # without file logging (run.py sets it to the run id when logging)
+    game_id: str = Field(default_factory=lambda: uuid.uuid4().hex[:12])
+
     # File logging configuration (optional)
     log_dir: Optional[str] = None
     log_run_id: Optional[str] = None
     log_paths: Dict[str, str] = Field(default_factory=dict)
 
+    @field_validator("deception_scores", mode="before")
+    @classmethod
+    def _scores_from_dict(cls, value):
+        return value if isinstance(value, ScoreMatrix) else ScoreMatrix.from_dict(value or {})
+
+    @field_serializer("deception_scores")
+    def _scores_to_dict(self, scores: ScoreMatrix) -> Dict[str, Dict[str, float]]:
+        return scores.to_dict()
+
+    @property
+    def deception_history(self) -> Dict[str, List[Dict]]:
+        """{player: [deception_records]} view over the deception store."""
+        return deception_history_view(self.deception_statements, self.deception_analyses)
+
+    @property
+    def deception_iterations(self) -> List[Dict]:
+        """Per-statement records in play order, a view over the deception store."""
+        return deception_iterations_view(self.deception_statements, self.deception_analyses)
+
+def _degradations(config: RunnableConfig) -> List[str]:
+    """Optional work to shed right now under the run's degradation policy (see degradation.py)."""
+    configurable = config.get("configurable", {})
+    policy = configurable.get("degradation")
+    return policy.active(configurable.get("call_meter")) if policy is not None else []
+
+def _short_prompt_budget(config: RunnableConfig, degraded: List[str]) -> Optional[int]:
+    """Transcript token budget under "short_prompts" degradation (None = the transcript's own)."""
+    if "short_prompts" not in degraded:
+        return None
+    return config.get("configurable", {}).get("degradation").short_prompt_tokens
+
+_SHARED_EXECUTORS: Dict[int, ThreadPoolExecutor] = {}
+_SHARED_EXECUTORS_LOCK = threading.Lock()
+
+def _call_executor(config: RunnableConfig) -> ThreadPoolExecutor:
+    """
+    Worker pool for a step's parallel model calls: the run's `call_executor`
+    (created by run.py), else a process-wide pool of `max_parallel_calls` workers.
+    Reused across steps, so no threads are started per turn; calls abandoned at
+    a deadline (`_gather`) free their worker at their own deadline-capped timeout.
+    Tasks on it must not wait on other tasks on it.
+    """
+    configurable = config.get("configurable", {})
+    executor = configurable.get("call_executor")
+    if executor is None:
+        workers = max(1, configurable.get("max_parallel_calls", 16))
+        with _SHARED_EXECUTORS_LOCK:
+            executor = _SHARED_EXECUTORS.get(workers)
+            if executor is None:
+                executor = _SHARED_EXECUTORS[workers] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="calls")
+    return executor
+
+def _gather(futures: Dict[str, Future], call_type: str) -> Tuple[Dict[str, Any], Dict[str, Exception], List[str]]:
+    """
+    Wait for `futures` until the call context's deadline. Returns results and
+    errors by key, plus the keys that ran out of time: still running at the
+    deadline (cancelled if not started) or failed with `CallTimeout`.
+    """
+    done, pending = wait(futures.values(), timeout=time_left())
+    ctx = current_call_context()
+    meter = ctx.get("meter")
+
+    def count_late(future: Future) -> None:
+        # A call that fails with CallTimeout has counted itself already
+        if meter is not None and (future.cancelled() or not isinstance(future.exception(), CallTimeout)):
+            meter.record_timeout(call_type, ctx.get("phase"))
+
+    results, errors, late = {}, {}, []
+    for key, future in futures.items():
+        if future in pending:
+            # Not started: cancelled; running: abandoned, counted once it ends
+            future.cancel()
+            future.add_done_callback(count_late)
+            late.append(key)
+        elif isinstance(future.exception(), CallTimeout):
+            late.append(key)
+        elif future.exception() is not None:
+            errors[key] = future.exception()
+        else:
+            results[key] = future.result()
+    return results, errors, late
+
+def _failed_analysis(reason: str, source: str) -> Dict:
+    """
+    Stand-in for an analysis that errored or ran out of time; its `source` is
+    one of deception_detection.FALLBACK_SOURCES, so it is stored but not counted.
+    """
+    return {
+        "chain_of_thought": reason,
+        "is_deceptive": 0,
+        "confidence": 0.0,
+        "deception_type": "none",
+        "reasoning": "Analysis timed out" if source == "timeout" else "Analysis error",
+        "suspicion_level": 0.5,
+        "source": source,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
 def analyze_statement_deception(state: GameState, speaker_name: str, statement: str, 
-                               player_objects: Dict, config: RunnableConfig) -> GameState:
+                               player_objects: Dict, config: RunnableConfig,
+                               self_report: Optional[bool] = None) -> GameState:
     """
     Analyze a statement for deception using self-analysis and peer analysis.
+    `self_report` is the speaker's own is_deceptive answer from the reply that
+    produced the statement; under degradation it replaces the self-analysis call.
+    """
+    return analyze_statements_deception(state, [(speaker_name, statement, self_report)], player_objects, config)
+
+def analyze_statements_deception(state: GameState, statements: List[Tuple[str, str, Optional[bool]]],
+                                 player_objects: Dict, config: RunnableConfig) -> GameState:
+    """
+    Analyze several (speaker, statement, self_report) at once, e.g. every vote's
+    reasoning: all their self and peer analyses run together on the run's worker
+    pool and share the phase deadline, then each statement is recorded in order.
     """
-    # Initialize deception detector 
-    detector = DeceptionDetector(player_objects[speaker_name].llm)
+    executor = _call_executor(config)
+    degraded = _degradations(config)
     
     context = f"Round {state.round_num}, Phase: {state.phase}. Alive players: {', '.join(state.alive_players)}."
     if state.debate_log:
         recent_dialogue = state.debate_log[-3:]  # Last 3 statements for context
         context += f" Recent dialogue: {'; '.join([f'{s}: {d}' for s, d in recent_dialogue])}"
-    
-    # Ask  speaker to analyze their own statement
-    self_analysis = detector.analyze_self_deception(speaker_name, statement, context)
-    
-    # Ask all other alive players to analyze the statement
-    other_players = [p for p in state.alive_players if p != speaker_name]
-    other_analyses = {}
-    
-    # Run analyses in parallel
-    with ThreadPoolExecutor(max_workers=max(1, len(other_players))) as executor:
-        futures = {}
+
+    classifier = config.get("configurable", {}).get("deception_classifier")
+    jobs = []
+    self_futures, peer_futures = {}, {}
+    for index, (speaker_name, statement, self_report) in enumerate(statements):
+        detector = DeceptionDetector(player_objects[speaker_name].llm, player_objects[speaker_name].models)
+        job = {"self_analysis": None, "other_analyses": {}, "observers": []}
+        jobs.append(job)
+
+        # Ask  speaker to analyze their own statement
+        if "skip_self_analysis" in degraded and self_report is not None:
+            job["self_analysis"] = {
+                "is_deceptive": 1 if self_report else 0,
+                "reasoning": "Self-analysis skipped under degradation; speaker's own is_deceptive reply",
+                "source": "self_report",
+                "timestamp": datetime.utcnow().isoformat(),
+            }
+        else:
+            self_futures[index] = submit(executor, detector.analyze_self_deception, speaker_name, statement, context)
+
+        # Ask all other alive players to analyze the statement
+        other_players = [p for p in state.alive_players if p != speaker_name]
+
+        # Optional local pre-classifier: confident statements skip LLM peer analysis
+        job["classifier_probability"] = classifier.predict_proba(statement) if classifier else None
+        job["escalated"] = classifier is None or classifier.is_uncertain(job["classifier_probability"])
+        if not job["escalated"]:
+            for observer in other_players:
+                analysis = classifier.classify(statement, job["classifier_probability"])
+                analysis["timestamp"] = datetime.utcnow().isoformat()
+                job["other_analyses"][observer] = analysis
+            other_players = []
+
+        if "sample_observers" in degraded:
+            policy = config.get("configurable", {}).get("degradation")
+            other_players = policy.sample_observers(other_players)
+
+        # Speaker's earlier analyzed statements, shared by every observer
+        # (only the recent ones are prompted, so avoid building the whole history view)
+        speaker_history = []
+        if other_players:
+            rows = [row for row in state.deception_statements if row["speaker"] == speaker_name][-3:]
+            speaker_history = deception_iterations_view(rows, state.deception_analyses)
+
+        job["observers"] = other_players
         for observer in other_players:
-            # Get observer's history 
-            speaker_history = state.deception_history.get(speaker_name, [])
-            futures[observer] = executor.submit(
-                detector.analyze_other_deception,
+            peer_futures[(index, observer)] = submit(
+                executor, detector.analyze_other_deception,
                 observer, speaker_name, statement, context, speaker_history
             )
-        
-        for observer, future in futures.items():
-            try:
-                analysis = future.result()
+
+    # Analyses still running at the phase deadline are dropped
+    self_results, self_errors, self_late = _gather(self_futures, "self_analysis")
+    peer_results, peer_errors, peer_late = _gather(peer_futures, "peer_analysis")
+    if self_errors:
+        raise next(iter(self_errors.values()))
+
+    for index, (speaker_name, statement, _self_report) in enumerate(statements):
+        job = jobs[index]
+        self_analysis = job["self_analysis"]
+        if index in self_results:
+            self_analysis = self_results[index]
+        elif index in self_late:
+            self_analysis = _failed_analysis("Self-analysis timed out at the phase deadline", "timeout")
+
+        other_analyses = job["other_analyses"]
+        timed_out = []
+        for observer in job["observers"]:
+            key = (index, observer)
+            if key in peer_results:
+                analysis = peer_results[key]
                 analysis["timestamp"] = datetime.utcnow().isoformat()
                 other_analyses[observer] = analysis
-            except Exception as e:
-                # Fallback 
-                other_analyses[observer] = {
-                    "chain_of_thought": f"Analysis failed: {str(e)}",
-                    "is_deceptive": 0,
-                    "confidence": 0.0,
-                    "deception_type": "none",
-                    "reasoning": "Analysis error",
-                    "suspicion_level": 0.5,
-                    "timestamp": datetime.utcnow().isoformat()
-                }
-    
-    # Update rich history and scores
-    state = update_deception_history(state, speaker_name, statement, self_analysis, other_analyses)
-
-    # Compute iteration-level summary metrics
-    observer_count = len(other_analyses)
-    observer_deceptive_count = sum(1 for a in other_analyses.values() if a.get("is_deceptive", 0) == 1)
-    suspicion_levels = {name: a.get("suspicion_level", 0.5) for name, a in other_analyses.items()}
-    avg_suspicion = (sum(suspicion_levels.values()) / observer_count) if observer_count else 0.0
-
-    iteration_record = {
-        "round": state.round_num,
-        "phase": state.phase,
-        "step": state.step,
-        "speaker": speaker_name,
-        "statement": statement,
-        "self_analysis": self_analysis,
-        "other_analyses": other_analyses,
-        "observer_count": observer_count,
-        "observer_deceptive_count": observer_deceptive_count,
-        "observer_deceptive_fraction": (observer_deceptive_count / observer_count) if observer_count else 0.0,
-        "suspicion_levels": suspicion_levels,
-        "average_suspicion": avg_suspicion,
-        "timestamp": datetime.utcnow().isoformat(),
-    }
+            elif key in peer_errors:
+                other_analyses[observer] = _failed_analysis(f"Analysis failed: {peer_errors[key]}", "error")
+            else:
+                other_analyses[observer] = _failed_analysis("Analysis timed out at the phase deadline", "timeout")
+                timed_out.append(observer)
+
+        # Escalated statements feed their LLM labels back into the pre-classifier
+        if classifier and job["escalated"]:
+            classifier.partial_fit([
+                (statement, a.get("is_deceptive", 0)) for a in other_analyses.values() if a.get("source") == "llm"
+            ])
+
+        # Record the statement and its analyses once in the store and update scores
+        state = update_deception_history(
+            state, speaker_name, statement, self_analysis, other_analyses,
+            classifier_probability=job["classifier_probability"], escalated=job["escalated"], degraded=degraded,
+        )
+        row = state.deception_statements[-1]
+
+        # The event references the stored statement; the NDJSON stream also gets
+        # the full analyses so it stays self-contained
+        state = log_event(state, "deception_analysis", speaker_name, {
+            "statement_id": row["id"],
+            "observer_count": row["observer_count"],
+            "observer_deceptive_count": row["observer_deceptive_count"],
+            "observer_deceptive_fraction": row["observer_deceptive_fraction"],
+            "average_suspicion": row["average_suspicion"],
+            "classifier_probability": job["classifier_probability"],
+            "escalated": job["escalated"],
+            "degraded": degraded,
+            "timed_out": timed_out,
+        }, stream_details={
+            "statement": statement,
+            "self_analysis": self_analysis,
+            "other_analyses": other_analyses,
+        })
 
-    state = state.model_copy(update={
-        "deception_iterations": state.deception_iterations + [iteration_record]
-    })
-    
-    state = log_event(state, "deception_analysis", speaker_name, {
-        "statement": statement,
-        "self_analysis": self_analysis,
-        "other_analyses": other_analyses,
-        "observer_count": observer_count,
-        "observer_deceptive_count": observer_deceptive_count,
-        "observer_deceptive_fraction": (observer_deceptive_count / observer_count) if observer_count else 0.0,
-        "average_suspicion": avg_suspicion,
-    })
-    
-    # Print summary 
-    deception_count = sum(1 for analysis in other_analyses.values() if analysis.get("is_deceptive", 0) == 1)
-    tqdm.tqdm.write(f"   Deception Analysis: {deception_count}/{len(other_analyses)} observers think it's deceptive")
+        # Print summary 
+        deception_count = sum(1 for analysis in other_analyses.values() if analysis.get("is_deceptive", 0) == 1)
+        source = "LLM" if job["escalated"] else "pre-classifier"
+        tqdm.tqdm.write(f"   Deception Analysis ({source}): {deception_count}/{len(other_analyses)} observers think it's deceptive")
     
     return state
 def generate_deception_summary(state: GameState) -> Dict:
     """
     Generate a summary of deception patterns and perceptions throughout the game.
     """
-    summary = {
-        "total_statements_analyzed": 0,
-        "deception_by_player": {},
-        "final_deception_scores": state.deception_scores,
+    return {
+        "total_statements_analyzed": state.running_metrics.num_statements,
+        "deception_by_player": state.running_metrics.per_player(),
+        "final_deception_scores": state.deception_scores.to_dict(),
         "deception_patterns": {}
     }
-    
-    # Analyze deception history
-    for player, history in state.deception_history.items():
-        player_summary = {
-            "total_statements": len(history),
-            "self_reported_deceptions": 0,
-            "peer_detected_deceptions": 0,
-            "average_suspicion": 0.0
-        }
-        
-        total_suspicion = 0
-        suspicion_count = 0
-        
-        for record in history:
-            # Count self-reported deceptions
-            if record["self_analysis"].get("is_deceptive", 0) == 1:
-                player_summary["self_reported_deceptions"] += 1
-            
-            # Count peer-detected deceptions
-            for peer_analysis in record["other_analyses"].values():
-                if peer_analysis.get("is_deceptive", 0) == 1:
-                    player_summary["peer_detected_deceptions"] += 1
-                
-                # Track suspicion levels
-                suspicion = peer_analysis.get("suspicion_level", 0.5)
-                total_suspicion += suspicion
-                suspicion_count += 1
-        
-        if suspicion_count > 0:
-            player_summary["average_suspicion"] = total_suspicion / suspicion_count
-            
-        summary["deception_by_player"][player] = player_summary
-        summary["total_statements_analyzed"] += len(history)
-    
-    return summary
+def get_transcript(state: GameState, config: RunnableConfig) -> DebateTranscript:
+    """
+    The run's bounded debate transcript (created by run.py). Without one, a
+    throwaway transcript is rebuilt from `debate_log`, so nodes still work standalone.
+    """
+    transcript = config.get("configurable", {}).get("transcript")
+    if transcript is None:
+        transcript = DebateTranscript.from_log(state.debate_log, state.round_num)
+    return transcript
+
 def _compute_current_winner(state: GameState) -> Optional[Literal["Villagers", "Werewolves"]]:
     """Compute winner based on current alive players.
 
@@ -291,75 +432,87 @@ def eliminate_node(state: GameState, config: RunnableConfig) -> GameState:
     
     return state
     
+def _role_holders(state: GameState, many: List[str], one: Optional[str]) -> List[str]:
+    """Alive holders of a role that may have several players (seers/doctors)."""
+    return [p for p in (many or ([one] if one else [])) if p in state.alive_players]
+
 def protect_node(state: GameState, config: RunnableConfig) -> GameState:
-    """Doctor chooses a player to save during the same night."""
+    """Each alive Doctor chooses a player to save during the same night."""
     player_objects = config.get("configurable", {}).get("player_objects", {})
-    doctor_name = state.doctor
+    doctors = _role_holders(state, state.doctors, state.doctor)
 
-    # check if doctor was killed 
-    if doctor_name not in state.alive_players:
-        return state.model_copy(update={"phase": "unmask"})
+    # all doctors dead
+    if not doctors:
+        return state.model_copy(update={"protected": None, "protected_players": [], "phase": "unmask"})
 
-    protect_target, log = player_objects[doctor_name].save(state.alive_players)
+    executor = _call_executor(config)
+    futures = {d: submit(executor, player_objects[d].save, state.alive_players) for d in doctors}
+    choices = {d: f.result() for d, f in futures.items()}
 
-    if not protect_target:
-        raise ValueError(f"{doctor_name} failed to specify a protection target.")
+    protected_players = []
+    for doctor_name, (protect_target, log) in choices.items():
+        if not protect_target:
+            raise ValueError(f"{doctor_name} failed to specify a protection target.")
 
-    tqdm.tqdm.write(f"{doctor_name} protected {protect_target}")
+        tqdm.tqdm.write(f"{doctor_name} protected {protect_target}")
+        protected_players.append(protect_target)
+
+        state = log_event(state, "protect", doctor_name, {
+        "target": protect_target,
+        "raw_output": log
+        })
 
     # Convert log to string if it's a dict
-    log_str = str(log) if isinstance(log, dict) else log
+    first_log = choices[doctors[0]][1]
+    log_str = str(first_log) if isinstance(first_log, dict) else first_log
     
-    state =  state.model_copy(update={
-        "protected": protect_target,
+    return state.model_copy(update={
+        "protected": protected_players[0],
+        "protected_players": protected_players,
         "protect_log": log_str,
         "phase": "unmask"
     })
-
-    state = log_event(state, "protect", doctor_name, {
-    "target": protect_target,
-    "raw_output": log
-    })
-
-    return state
     
 def unmask_node(state: GameState, config: RunnableConfig) -> GameState:
-    """Seer investigates one player each night."""
+    """Each alive Seer investigates one player each night."""
     player_objects = config.get("configurable", {}).get("player_objects", {})
-    seer_name = state.seer
+    seers = _role_holders(state, state.seers, state.seer)
 
-    # check if seer is dead
-    if seer_name not in state.alive_players:
+    # all seers dead
+    if not seers:
         return state.model_copy(update={"phase": "resolve_night"})
 
-    target, log = player_objects[seer_name].unmask(state.alive_players)
-    if not target:
-        raise ValueError(f"{seer_name} failed to return a target.")
+    executor = _call_executor(config)
+    futures = {s: submit(executor, player_objects[s].unmask, state.alive_players) for s in seers}
+    choices = {s: f.result() for s, f in futures.items()}
+
+    for seer_name, (target, log) in choices.items():
+        if not target:
+            raise ValueError(f"{seer_name} failed to return a target.")
+
+        # reveal to seer 
+        player_objects[seer_name].reveal_and_update(target, state.roles[target])
 
-    # reveal to seer 
-    role_revealed = state.roles[target]
-    player_objects[seer_name].reveal_and_update(target, role_revealed)
+        state = log_event(state, "unmask", seer_name, {
+        "target": target,
+        "revealed_role": state.roles[target],
+        "raw_output": log
+        })
 
     # Convert log to string if it's a dict
-    log_str = str(log) if isinstance(log, dict) else log
+    first_target, first_log = choices[seers[0]]
+    log_str = str(first_log) if isinstance(first_log, dict) else first_log
     
-    state =  state.model_copy(update={
-        "unmasked": target,
+    return state.model_copy(update={
+        "unmasked": first_target,
         "unmask_log": log_str,
         "phase": "resolve_night"
     })
-
-    state = log_event(state, "unmask", seer_name, {
-    "target": target,
-    "revealed_role": state.roles[target],
-    "raw_output": log
-    })
-    
-    return state
     
 def night_node(state: GameState, config: RunnableConfig) -> GameState:
     """Apply elimination/protection outcome and broadcast announcement."""
-    if state.eliminated and state.eliminated != state.protected:
+    protected = state.protected_players or ([state.protected] if state.protected else [])
+    if state.eliminated and state.eliminated not in protected:
         # death of victim
         new_alive = [p for p in state.alive_players if p != state.eliminated]
         announcement = (
@@ -402,45 +555,88 @@ def checkwinner_node(state: GameState, config: RunnableConfig) -> GameState:
 def debate_node(state: GameState, config: RunnableConfig) -> GameState:
     player_objects = config.get("configurable", {}).get("player_objects", {})
     MAX_DEBATE_TURNS = config.get("configurable", {}).get("MAX_DEBATE_TURNS", 6)
-
-    dialogue_history = "\n".join([f"{s}: {t}" for s, t in state.debate_log])
-    last_speaker = state.debate_log[-1][0] if state.debate_log else None
+    bid_strategy = config.get("configurable", {}).get("bid_strategy") or llm_bid
+    bid_shortlist = config.get("configurable", {}).get("bid_shortlist")
+    controller = config.get("configurable", {}).get("debate_controller")
+    meter = config.get("configurable", {}).get("call_meter")
+    transcript = get_transcript(state, config)
+    if state.step == 0:
+        transcript.start_round(state.round_num)
+        if controller is not None:
+            controller.start_round(state.round_num, meter)
+    degraded = _degradations(config)
+    if "heuristic_bids" in degraded:
+        bid_strategy = rule_based_bid
+
+    # Bounded prompt view: summaries of earlier rounds + recent lines of this one
+    dialogue_history = transcript.render(_short_prompt_budget(config, degraded))
+    recent = transcript.recent(1)
+    last_speaker = recent[-1][0] if recent else None
 
     alive_players = [p for p in state.alive_players if p != last_speaker]
     bid_logs = []
     bid_dict = {}
-
-    # Run bids in parallel
-    with ThreadPoolExecutor(max_workers=len(alive_players)) as executor:
-        futures = {name: executor.submit(get_bid, name, dialogue_history) for name in alive_players}
-        for name, future in futures.items():
-            bid, raw_output = future.result()
-            bid_dict[name] = bid
-            bid_logs.append(f"{name} bid {bid} – {raw_output}")
+    bid_sources = {}
+
+    # Hierarchical bidding: only a locally shortlisted few place (model) bids
+    candidates, skipped = shortlist_bidders(alive_players, state.debate_log, bid_shortlist)
+
+    # Run bids in parallel; bids missing the turn's deadline count as 0
+    executor = _call_executor(config)
+    futures = {name: submit(executor, bid_strategy, name, state.debate_log, dialogue_history) for name in candidates}
+    results, errors, bid_timeouts = _gather(futures, "bid")
+    if errors:
+        raise next(iter(errors.values()))
+    for name in candidates:
+        bid, raw_output = results.get(name, (0, "timed out"))
+        bid_dict[name] = bid
+        bid_sources[name] = bid_source(bid_strategy, raw_output) if name in results else "timeout"
+        bid_logs.append(f"{name} bid {bid} – {raw_output}")
 
     next_speaker = choose_next_speaker(bid_dict, dialogue_history)
-    dialogue, log = player_objects[next_speaker].debate(state.debate_log)
+    dialogue, log = player_objects[next_speaker].debate(dialogue_history)
     if not dialogue:
         raise ValueError(f"{next_speaker} failed to produce a debate line.")
 
     tqdm.tqdm.write(f"{next_speaker}: {dialogue}")
 
+    transcript.add(state.round_num, next_speaker, dialogue)
+
     # DECEPTION ANALYSIS: Analyze the statement made by the speaker
-    state = analyze_statement_deception(state, next_speaker, dialogue, player_objects, config)
+    state = analyze_statement_deception(state, next_speaker, dialogue, player_objects, config,
+                                        self_report=log.get("is_deceptive"))
     
+    # Debate length: fixed MAX_DEBATE_TURNS, or adaptive when a controller is configured
+    turns = state.step + 1
+    if controller is not None:
+        earlier = [line for _, line in state.debate_log[-state.step:]] if state.step else []
+        stop_reason = controller.stop_reason(state.round_num, turns, bid_dict, dialogue, earlier, meter)
+    else:
+        stop_reason = "max_turns" if turns >= MAX_DEBATE_TURNS else None
+
     state = state.model_copy(update={
         "debate_log": state.debate_log + [[next_speaker, dialogue]],
         "bid_logs": state.bid_logs + bid_logs,
         "current_speaker": next_speaker,
-        "step": state.step + 1,
-        "phase": "vote" if state.step + 1 >= MAX_DEBATE_TURNS else "debate"
+        "step": turns,
+        "phase": "vote" if stop_reason else "debate"
     })
     
-    state = log_event(state, "debate", next_speaker, {
+    details = {
     "dialogue": dialogue,
     "bids": bid_dict,
+    "bid_sources": bid_sources,
     "raw_output": log
-    })
+    }
+    if bid_shortlist:
+        details.update({"bid_candidates": candidates, "bid_skipped": skipped})
+    if stop_reason:
+        details["stop_reason"] = stop_reason
+    if degraded:
+        details["degraded"] = degraded
+    if bid_timeouts:
+        details["bid_timeouts"] = bid_timeouts
+    state = log_event(state, "debate", next_speaker, details)
     
     return state
 
@@ -448,28 +644,36 @@ def vote_node(state: GameState, config: RunnableConfig) -> GameState:
     player_objects = config.get("configurable", {}).get("player_objects", {})
     votes = {}
     logs = []
-
-    for voter in state.alive_players:
-        
-        vote, log = player_objects[voter].vote(state.deception_scores)
+    degraded = _degradations(config)
+    dialogue_history = get_transcript(state, config).render(_short_prompt_budget(config, degraded))
+
+    # Everyone votes at once on the suspicion left by the debate
+    executor = _call_executor(config)
+    futures = {voter: submit(executor, player_objects[voter].vote, state.deception_scores, dialogue_history,
+                             state.alive_players)
+               for voter in state.alive_players}
+    vote_statements = []
+    for voter, future in futures.items():
+        vote, log = future.result()
         votes[voter] = vote
         logs.append(f"{voter} voted for {vote} – {log}")
-       
+
         # DECEPTION ANALYSIS: Analyze voting statements (if they contain reasoning)
         # Note: Votes might not always warrant deception analysis unless they include reasoning
-        vote_statement = f"I vote for {vote}"
-        if "reasoning" in log and log.get("reasoning"):
-            vote_statement += f" because {log.get('reasoning', '')}"
-            state = analyze_statement_deception(state, voter, vote_statement, player_objects, config)
+        if "reasoning" in log and log.get("reasoning") and "skip_vote_analysis" not in degraded:
+            vote_statements.append((voter, f"I vote for {vote} because {log.get('reasoning', '')}", log.get("is_deceptive")))
+    # The votes' reasoning is analyzed together, all on the pool at once
+    state = analyze_statements_deception(state, vote_statements, player_objects, config)
     state = state.model_copy(update={
         "votes": votes,
         "vote_logs": logs,
         "phase": "exile"
     })
 
-    state = log_event(state, "vote", "system", {
-    "votes": votes
-    })
+    details = {"votes": votes}
+    if degraded:
+        details["degraded"] = degraded
+    state = log_event(state, "vote", "system", details)
     
     return state
     
@@ -513,21 +717,28 @@ def check_winner_day_node(state: GameState, config: RunnableConfig) -> GameState
     state = state.model_copy(update={
         "winner": winner,
         "phase": "summarize" if winner else "eliminate",
+        "round_num": state.round_num if winner else state.round_num + 1,
         "step": 0  
     })
 
     state = log_event(state, "check_winner_day", "system", {
     "winner": winner
     })
+
+    # Running metrics make a mid-game final_metrics.json cheap; refresh it every round
+    configurable = config.get("configurable", {})
+    if configurable.get("metrics_every_round"):
+        write_final_metrics(state, configurable.get("call_meter"), configurable.get("call_scheduler"))
     
     return state
 
 def summary_node(state: GameState, config: RunnableConfig) -> GameState:
     player_objects = config.get("configurable", {}).get("player_objects", {})
     logs = []
+    dialogue_history = get_transcript(state, config).render()
 
     for player in state.alive_players:
-        summary, log = player_objects[player].summarize()
+        summary, log = player_objects[player].summarize(dialogue_history)
         logs.append(f"{player}: {summary} – {log}")
     
     # Generate deception summary
@@ -570,7 +781,7 @@ def end_node(state: GameState, config: RunnableConfig) -> GameState:
     print_matrix("Final deception scores (observer -> target perception)", state.deception_scores, indent=2)
 
     # Observer accuracy
-    observer_metrics = compute_observer_accuracy(state)
+    observer_metrics = state.running_metrics.accuracy_by_observer()
     print_subheader("Observer Accuracy by Player")
     for observer, stat in observer_metrics.items():
         print_kv(observer, "", indent=0)
@@ -590,21 +801,54 @@ def end_node(state: GameState, config: RunnableConfig) -> GameState:
         print_kv("Run Metadata", paths.get('meta'), indent=2)
     return state
 
+def with_call_context(node):
+    """
+    Run a node inside an LLM call context carrying run/round/phase attribution
+    and per-run call settings from the config (see llm_calls.py). A phase with
+    an entry in `phase_deadlines` gives every call in this step one shared deadline.
+    """
+    @wraps(node)
+    def wrapper(state: GameState, config: RunnableConfig) -> GameState:
+        configurable = config.get("configurable", {})
+        meter = configurable.get("call_meter")
+        exceeded = meter.over_budget() if meter is not None and state.phase != "end" else None
+        deadline = (configurable.get("phase_deadlines") or {}).get(state.phase)
+        with call_context(
+            game=state.game_id,
+            round=state.round_num,
+            phase=state.phase,
+            meter=meter,
+            stream=configurable.get("stream_responses", False),
+            blobs=configurable.get("blob_store"),
+            call_timeouts=configurable.get("call_timeouts"),
+            scheduler=configurable.get("call_scheduler"),
+            events=configurable.get("event_hub"),
+            deadline=time.monotonic() + deadline if deadline is not None else None,
+        ):
+            if exceeded:
+                # Out of budget: skip the remaining work and end the game at this step
+                state = state.model_copy(update={"phase": "end", "stop_reason": exceeded})
+                return log_event(state, "budget_exhausted", "system", {
+                    "reason": exceeded, "skipped_phase": node.__name__, "usage": meter.totals()
+                })
+            return node(state, config)
+    return wrapper
+
 #game state LangChain graph
 
 graph = StateGraph(GameState)
 
-graph.add_node("eliminate", eliminate_node)
-graph.add_node("protect", protect_node)
-graph.add_node("unmask", unmask_node)
-graph.add_node("resolve_night", night_node)
-graph.add_node("check_winner_night", checkwinner_node)
-graph.add_node("debate", debate_node)
-graph.add_node("vote", vote_node)
-graph.add_node("exile", exile_node)
-graph.add_node("check_winner_day", check_winner_day_node)
-graph.add_node("summarize", summary_node)
-graph.add_node("end", end_node)
+graph.add_node("eliminate", with_call_context(eliminate_node))
+graph.add_node("protect", with_call_context(protect_node))
+graph.add_node("unmask", with_call_context(unmask_node))
+graph.add_node("resolve_night", with_call_context(night_node))
+graph.add_node("check_winner_night", with_call_context(checkwinner_node))
+graph.add_node("debate", with_call_context(debate_node))
+graph.add_node("vote", with_call_context(vote_node))
+graph.add_node("exile", with_call_context(exile_node))
+graph.add_node("check_winner_day", with_call_context(check_winner_day_node))
+graph.add_node("summarize", with_call_context(summary_node))
+graph.add_node("end", with_call_context(end_node))
 
 graph.set_entry_point("eliminate")
 
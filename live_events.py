@@ -0,0 +1,194 @@
+import json
+import threading
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, TextIO, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+class Subscription:
+    """
+    One subscriber's bounded event buffer. When the buffer is full the oldest
+    event is dropped and counted, so a slow reader never blocks the games;
+    `get` returns the number dropped since the previous read with each event.
+    """
+
+    def __init__(self, buffer_size: int, game: Optional[str] = None):
+        self.game = game
+        self._events = deque()
+        self._size = buffer_size
+        self._dropped = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def put(self, event: Dict) -> None:
+        with self._cond:
+            if len(self._events) >= self._size:
+                self._events.popleft()
+                self._dropped += 1
+            self._events.append(event)
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Tuple[Dict, int]]:
+        """(event, dropped before it), or None on timeout or once closed and drained."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._events or self._closed, timeout) or not self._events:
+                return None
+            dropped, self._dropped = self._dropped, 0
+            return self._events.popleft(), dropped
+
+    @property
+    def closed(self) -> bool:
+        return self._closed and not self._events
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class EventHub:
+    """
+    Fan-out of live game events (`log_event` entries and graph node updates)
+    to subscribers, shared by every game in the process. Each event carries its
+    `game` (game id); subscribers may follow one game. The latest event of each
+    game is kept for `status`.
+    """
+
+    def __init__(self, buffer_size: int = 1000):
+        self.buffer_size = buffer_size
+        self._subscribers = []
+        self._status: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, event: Dict) -> None:
+        with self._lock:
+            game = event.get("game")
+            if game is not None:
+                self._status[game] = {k: event.get(k) for k in ("timestamp", "round", "phase", "event", "node")}
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            if sub.game is None or sub.game == event.get("game"):
+                sub.put(event)
+
+    def subscribe(self, game: Optional[str] = None, buffer_size: Optional[int] = None) -> Subscription:
+        sub = Subscription(buffer_size or self.buffer_size, game)
+        with self._lock:
+            self._subscribers.append(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
+        sub.close()
+
+    def status(self) -> Dict[str, Dict]:
+        """Latest event summary per game."""
+        with self._lock:
+            return {game: dict(status) for game, status in self._status.items()}
+
+    def close(self) -> None:
+        """End every subscription once its buffered events are read."""
+        with self._lock:
+            subscribers, self._subscribers = self._subscribers, []
+        for sub in subscribers:
+            sub.close()
+
+
+def write_ndjson(sub: Subscription, out: TextIO) -> None:
+    """Write a subscription to `out` as NDJSON until it is closed (run in a thread)."""
+    while not sub.closed:
+        item = sub.get(timeout=1.0)
+        if item is None:
+            continue
+        event, dropped = item
+        if dropped:
+            out.write(json.dumps({"event": "dropped", "count": dropped}) + "\n")
+        out.write(json.dumps(event, ensure_ascii=False, default=str) + "\n")
+        out.flush()
+
+
+class _SSEHandler(BaseHTTPRequestHandler):
+    hub: EventHub = None  # set per server class
+    keepalive = 15.0
+
+    def log_message(self, format, *args):  # quiet
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/games":
+            data = json.dumps(self.hub.status()).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        if url.path != "/events":
+            self.send_error(404)
+            return
+        game = parse_qs(url.query).get("game", [None])[0]
+        sub = self.hub.subscribe(game)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        try:
+            while not sub.closed:
+                item = sub.get(timeout=self.keepalive)
+                if item is None:
+                    self.wfile.write(b": keepalive\n\n")
+                else:
+                    event, dropped = item
+                    if dropped:
+                        self.wfile.write(f"event: dropped\ndata: {json.dumps({'count': dropped})}\n\n".encode("utf-8"))
+                    payload = json.dumps(event, ensure_ascii=False, default=str)
+                    self.wfile.write(f"event: {event.get('event', 'message')}\ndata: {payload}\n\n".encode("utf-8"))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.hub.unsubscribe(sub)
+
+
+def serve_sse(hub: EventHub, host: str = "127.0.0.1", port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Serve `hub` over server-sent events in a daemon thread: GET /events (all
+    games, or ?game=<game_id>) and GET /games (latest status per game). Port 0
+    picks a free port. Returns the server and its base URL.
+    """
+    handler = type("BoundSSEHandler", (_SSEHandler,), {"hub": hub})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+# GameState fields summarized in node_update events, as named there (the full state stays in the logs)
+NODE_FIELDS = {"round_num": "round", "phase": "phase", "step": "step", "alive_players": "alive_players",
+               "winner": "winner", "exiled": "exiled", "stop_reason": "stop_reason"}
+
+
+def stream_graph(runnable, state, config: Dict, hub: EventHub, game: Optional[str]):
+    """
+    Drive a compiled graph with `runnable.stream`, publishing a `node_update`
+    event per node as it finishes. Returns the final state values, like `invoke`.
+    """
+    final = None
+    for mode, chunk in runnable.stream(state, config=config, stream_mode=["updates", "values"]):
+        if mode == "values":
+            final = chunk
+            continue
+        for node, update in chunk.items():
+            update = update if isinstance(update, dict) else getattr(update, "__dict__", {})
+            hub.publish({
+                "game": game,
+                "timestamp": datetime.utcnow().isoformat(),
+                "event": "node_update",
+                "node": node,
+                **{name: update[field] for field, name in NODE_FIELDS.items() if field in update},
+            })
+    return final
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests for live event streaming (no LLM calls).
+"""
+
+import io
+import json
+import threading
+import urllib.request
+from typing import List
+
+from langgraph.graph import END, StateGraph
+from pydantic import BaseModel
+
+from live_events import EventHub, serve_sse, stream_graph, write_ndjson
+from llm_calls import call_context
+from logs import log_event
+
+
+class State(BaseModel):
+    round_num: int = 0
+    step: int = 0
+    phase: str = "debate"
+    log_run_id: str = "g1"
+    game_logs: List = []
+
+
+def test_slow_subscriber_drops_oldest_and_is_told():
+    hub = EventHub(buffer_size=2)
+    everything, one_game = hub.subscribe(), hub.subscribe(game="g2")
+    for n in range(5):
+        hub.publish({"game": "g1" if n < 4 else "g2", "n": n})
+    assert everything.get(0) == ({"game": "g1", "n": 3}, 3)
+    assert everything.get(0) == ({"game": "g2", "n": 4}, 0)
+    assert one_game.get(0) == ({"game": "g2", "n": 4}, 0)
+    assert everything.get(0) is None
+    assert hub.status()["g1"]["event"] is None and set(hub.status()) == {"g1", "g2"}
+
+
+def test_log_event_publishes_and_ndjson_writer_drains():
+    hub = EventHub()
+    out = io.StringIO()
+    writer = threading.Thread(target=write_ndjson, args=(hub.subscribe(), out))
+    writer.start()
+    with call_context(events=hub):
+        state = log_event(State(), "debate", "Alice", {"dialogue": "hi"}, stream_details={"extra": 1})
+    log_event(state, "vote", "system", {})  # outside a call context: not published
+    hub.close()
+    writer.join(5)
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert len(lines) == 1
+    assert lines[0]["game"] == "g1" and lines[0]["event"] == "debate" and lines[0]["details"] == {"dialogue": "hi", "extra": 1}
+
+
+def test_stream_graph_publishes_node_updates_over_sse():
+    def advance(state: State) -> State:
+        return state.model_copy(update={"step": state.step + 1, "phase": "vote" if state.step else "debate"})
+
+    graph = StateGraph(State)
+    graph.add_node("debate", advance)
+    graph.add_conditional_edges("debate", lambda s: s.phase, {"debate": "debate", "vote": END})
+    graph.set_entry_point("debate")
+
+    hub = EventHub()
+    server, url = serve_sse(hub)
+    response = urllib.request.urlopen(url + "/events?game=g1", timeout=5)
+    final = stream_graph(graph.compile(), State(round_num=1, step=0), {}, hub, "g1")
+    hub.close()
+    body = response.read().decode("utf-8")
+    server.shutdown()
+    server.server_close()
+    assert final["step"] == 2 and final["phase"] == "vote"
+    events = [json.loads(line[len("data: "):]) for line in body.splitlines() if line.startswith("data: ")]
+    assert [(e["node"], e["step"], e["phase"]) for e in events] == [("debate", 1, "debate"), ("debate", 2, "vote")]
@@ -0,0 +1,369 @@
+import contextvars
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from prompts import estimate_tokens, render_messages
+from response_parsing import JSONStreamScanner, count_parse, model_name_of, validate
+
+# Per-call settings and attribution (game, round, phase, meter, stream, ...).
+# Set by game nodes via `call_context`; thread pools must use `submit` to carry it over.
+_CALL_CONTEXT: contextvars.ContextVar = contextvars.ContextVar("llm_call_context", default={})
+
+
+@contextmanager
+def call_context(**attrs):
+    """Layer `attrs` over the current call context for the duration of the block."""
+    token = _CALL_CONTEXT.set({**_CALL_CONTEXT.get(), **attrs})
+    try:
+        yield
+    finally:
+        _CALL_CONTEXT.reset(token)
+
+
+def current_call_context() -> Dict[str, Any]:
+    return _CALL_CONTEXT.get()
+
+
+def submit(executor, fn: Callable, *args, **kwargs):
+    """`executor.submit` that runs `fn` inside a copy of the caller's call context."""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def time_left() -> Optional[float]:
+    """Seconds until the call context's `deadline` (a time.monotonic value), None without one."""
+    deadline = current_call_context().get("deadline")
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def is_timeout(error: BaseException) -> bool:
+    """Whether an error from a client or future is a timeout (builtin, httpx or provider SDK)."""
+    return isinstance(error, TimeoutError) or "Timeout" in type(error).__name__
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an error is a transient provider failure worth retrying (rate limit, 5xx, dropped connection)."""
+    name = type(error).__name__
+    return not is_timeout(error) and any(kind in name for kind in _RETRYABLE)
+
+
+_RETRYABLE = ("RateLimit", "APIConnection", "InternalServer", "ServiceUnavailable", "ResourceExhausted")
+MAX_RETRIES = 2
+RETRY_BACKOFF = 0.5  # seconds before the first retry, doubled after each
+
+
+def usage_of(message) -> Optional[Dict[str, int]]:
+    """Token usage from a LangChain message's `usage_metadata` (None if the provider sent none)."""
+    meta = getattr(message, "usage_metadata", None)
+    if not meta:
+        return None
+    details = meta.get("input_token_details") or {}
+    return {
+        "prompt_tokens": int(meta.get("input_tokens", 0) or 0),
+        "completion_tokens": int(meta.get("output_tokens", 0) or 0),
+        "cached_tokens": int(details.get("cache_read", 0) or 0),
+    }
+
+
+class CallTimeout(TimeoutError):
+    """A model call ran out of time (its own timeout or the phase deadline)."""
+
+
+class BudgetExceeded(RuntimeError):
+    """A run or batch has used up its token/cost budget."""
+
+
+USAGE_KEYS = ("prompt_tokens", "completion_tokens", "cached_tokens")
+
+
+def call_cost(usage: Dict[str, int], price: Optional[Dict[str, float]]) -> float:
+    """
+    USD cost of one call's usage given a model's `price_per_mtok`
+    ({"input", "cached_input", "output"} per million tokens); 0.0 when unpriced.
+    """
+    if not usage or not price:
+        return 0.0
+    cached = usage.get("cached_tokens", 0)
+    fresh = usage.get("prompt_tokens", 0) - cached
+    return (fresh * price.get("input", 0.0)
+            + cached * price.get("cached_input", price.get("input", 0.0))
+            + usage.get("completion_tokens", 0) * price.get("output", 0.0)) / 1_000_000
+
+
+class CallMeter:
+    """
+    Thread-safe per-game aggregate of LLM call timings and token usage, keyed by
+    call type. Snapshot goes to final_metrics.json under "llm_calls".
+
+    Usage is also attributed to the round, phase and player of each call (from
+    the call context) and priced by the call's model in `prices`, else with
+    `price` (see `call_cost`). Optional `token_budget`/`cost_budget` caps are
+    checked with `over_budget`. Calls that time out are counted separately
+    (`record_timeout`) since they return no usage. Parse outcomes of the
+    game's replies are counted with `record_parse`.
+    """
+
+    ATTRIBUTION = ("round", "phase", "player")
+
+    def __init__(self, price: Optional[Dict[str, float]] = None, token_budget: Optional[int] = None,
+                 cost_budget: Optional[float] = None, prices: Optional[Dict[str, Dict[str, float]]] = None):
+        self._lock = threading.Lock()
+        self._by_type: Dict[str, Dict[str, float]] = {}
+        self._by_attr: Dict[str, Dict[str, Dict[str, float]]] = {key: {} for key in self.ATTRIBUTION}
+        self._totals = {"calls": 0, **{key: 0 for key in USAGE_KEYS}, "cost_usd": 0.0}
+        self._recent_latency = deque(maxlen=20)  # seconds, most recent calls
+        self._timeouts: Dict[str, Dict[str, int]] = {"by_call_type": {}, "by_phase": {}}
+        self._parsing: Dict[str, Dict[str, Dict[str, int]]] = {}  # {model: {call_type: counters}}
+        self.price = price
+        self.prices = prices or {}  # {model name: price}, for calls routed to other models
+        self.token_budget = token_budget
+        self.cost_budget = cost_budget
+
+    def record(self, call_type: str, info: Dict) -> None:
+        usage = info.get("usage") or {}
+        cost = call_cost(usage, self.prices.get(info.get("model"), self.price))
+        with self._lock:
+            stat = self._by_type.setdefault(call_type, {
+                "calls": 0, "streamed": 0, "early_stops": 0, "usage_estimated": 0,
+                "elapsed_sum": 0.0, "ttft_sum": 0.0, "ttft_n": 0,
+                "complete_sum": 0.0, "complete_n": 0,
+                "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0, "cost_usd": 0.0,
+            })
+            stat["calls"] += 1
+            stat["elapsed_sum"] += info.get("elapsed", 0.0)
+            self._recent_latency.append(info.get("elapsed", 0.0))
+            if info.get("streamed"):
+                stat["streamed"] += 1
+            if info.get("early_stop"):
+                stat["early_stops"] += 1
+            if info.get("usage_estimated"):
+                stat["usage_estimated"] += 1
+            if info.get("ttft") is not None:
+                stat["ttft_sum"] += info["ttft"]
+                stat["ttft_n"] += 1
+            if info.get("complete_object_at") is not None:
+                stat["complete_sum"] += info["complete_object_at"]
+                stat["complete_n"] += 1
+            buckets = [stat, self._totals]
+            for key in self.ATTRIBUTION:
+                if info.get(key) is not None:
+                    buckets.append(self._by_attr[key].setdefault(
+                        str(info[key]), {"calls": 0, **{k: 0 for k in USAGE_KEYS}, "cost_usd": 0.0}))
+            for bucket in buckets:
+                if bucket is not stat:
+                    bucket["calls"] += 1
+                for key in USAGE_KEYS:
+                    bucket[key] += usage.get(key, 0)
+                bucket["cost_usd"] += cost
+
+    def record_timeout(self, call_type: str, phase: Optional[str] = None) -> None:
+        with self._lock:
+            by_type, by_phase = self._timeouts["by_call_type"], self._timeouts["by_phase"]
+            by_type[call_type] = by_type.get(call_type, 0) + 1
+            if phase is not None:
+                by_phase[phase] = by_phase.get(phase, 0) + 1
+
+    def record_parse(self, model: Optional[str], call_type: str, ok: bool, recovered: bool) -> None:
+        with self._lock:
+            count_parse(self._parsing, model, call_type, ok, recovered)
+
+    def parse_stats(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """This game's parse counters, in the layout of `response_parsing.parse_stats`."""
+        with self._lock:
+            return {model: {ct: dict(stat) for ct, stat in by_type.items()} for model, by_type in self._parsing.items()}
+
+    def timeouts(self) -> Dict:
+        """Timed-out calls: total, by call type and by phase."""
+        with self._lock:
+            report = {key: dict(counts) for key, counts in self._timeouts.items()}
+        return {"total": sum(report["by_call_type"].values()), **report}
+
+    def totals(self) -> Dict[str, float]:
+        """Calls, tokens (prompt + completion), token kinds and cost over all call types so far."""
+        with self._lock:
+            totals = dict(self._totals)
+        totals["tokens"] = totals["prompt_tokens"] + totals["completion_tokens"]
+        return totals
+
+    def over_budget(self) -> Optional[str]:
+        """"token_budget" or "cost_budget" once that cap is reached, else None."""
+        totals = self.totals()
+        if self.token_budget is not None and totals["tokens"] >= self.token_budget:
+            return "token_budget"
+        if self.cost_budget is not None and totals["cost_usd"] >= self.cost_budget:
+            return "cost_budget"
+        return None
+
+    def budget_fraction(self) -> float:
+        """Largest share of the token or cost budget used so far (0.0 without budgets)."""
+        totals = self.totals()
+        shares = [0.0]
+        if self.token_budget:
+            shares.append(totals["tokens"] / self.token_budget)
+        if self.cost_budget:
+            shares.append(totals["cost_usd"] / self.cost_budget)
+        return max(shares)
+
+    def recent_latency(self) -> Optional[float]:
+        """Mean latency in seconds of the last calls (None before any call)."""
+        with self._lock:
+            recent = list(self._recent_latency)
+        return sum(recent) / len(recent) if recent else None
+
+    def usage_report(self) -> Dict:
+        """Totals, budgets and per round/phase/player usage for final_metrics.json."""
+        with self._lock:
+            by_attr = {f"by_{key}": {k: dict(v) for k, v in buckets.items()} for key, buckets in self._by_attr.items()}
+        return {
+            "totals": self.totals(),
+            "budget": {"tokens": self.token_budget, "cost_usd": self.cost_budget, "exceeded": self.over_budget()},
+            **by_attr,
+        }
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            out = {}
+            for call_type, stat in self._by_type.items():
+                out[call_type] = {
+                    "calls": stat["calls"],
+                    "streamed": stat["streamed"],
+                    "early_stops": stat["early_stops"],
+                    "usage_estimated": stat["usage_estimated"],
+                    "timeouts": self._timeouts["by_call_type"].get(call_type, 0),
+                    "avg_latency_s": stat["elapsed_sum"] / stat["calls"] if stat["calls"] else 0.0,
+                    "avg_time_to_first_token_s": stat["ttft_sum"] / stat["ttft_n"] if stat["ttft_n"] else None,
+                    "avg_time_to_complete_object_s": stat["complete_sum"] / stat["complete_n"] if stat["complete_n"] else None,
+                    "prompt_tokens": stat["prompt_tokens"],
+                    "completion_tokens": stat["completion_tokens"],
+                    "cached_tokens": stat["cached_tokens"],
+                    "cost_usd": stat["cost_usd"],
+                    # Share of prompt tokens served from the provider's prefix cache
+                    "cached_token_ratio": stat["cached_tokens"] / stat["prompt_tokens"] if stat["prompt_tokens"] else 0.0,
+                }
+            return out
+
+
+def _stream(llm, prompt, call_type: str, **kwargs) -> Tuple[str, Dict]:
+    """
+    Consume a token stream, stopping as soon as a complete JSON object that
+    validates against `call_type`'s schema has arrived.
+
+    Usage arrives on a trailing chunk, which an early stop never reads; then
+    prompt and completion tokens are estimated from the text (`usage_estimated`),
+    so budgets still count streamed calls.
+    """
+    started = time.monotonic()
+    info = {"streamed": True, "ttft": None, "complete_object_at": None, "early_stop": False, "usage": None}
+    scanner = JSONStreamScanner()
+    parts = []
+    chunks = llm.stream(prompt, **kwargs)
+    try:
+        for chunk in chunks:
+            info["usage"] = usage_of(chunk) or info["usage"]
+            piece = chunk.content if isinstance(chunk.content, str) else ""
+            if not piece:
+                continue
+            if info["ttft"] is None:
+                info["ttft"] = time.monotonic() - started
+            parts.append(piece)
+            candidate = scanner.feed(piece)
+            if candidate is not None and not validate(json.loads(candidate), call_type)[1]:
+                info["complete_object_at"] = time.monotonic() - started
+                info["early_stop"] = True
+                break
+    finally:
+        # Closing the generator drops the HTTP stream instead of reading the tail
+        close = getattr(chunks, "close", None)
+        if close:
+            close()
+    if info["usage"] is None:
+        info["usage"] = {"prompt_tokens": estimate_tokens(render_messages(prompt)),
+                         "completion_tokens": estimate_tokens("".join(parts)), "cached_tokens": 0}
+        info["usage_estimated"] = True
+    info["elapsed"] = time.monotonic() - started
+    return "".join(parts), info
+
+
+def _effective_timeout(call_type: str, timeout: Optional[float], ctx: Dict[str, Any]) -> Optional[float]:
+    """`timeout`, else the context's `call_timeouts` entry, cut to the time left before its deadline."""
+    if timeout is None:
+        timeouts = ctx.get("call_timeouts") or {}
+        timeout = timeouts.get(call_type, timeouts.get("default"))
+    left = time_left()
+    if left is not None:
+        timeout = left if timeout is None else min(timeout, left)
+    return timeout
+
+
+def _call(llm, prompt, call_type: str, stream: bool, kwargs: Dict) -> Tuple[str, Dict]:
+    if stream and hasattr(llm, "stream"):
+        return _stream(llm, prompt, call_type, **kwargs)
+    started = time.monotonic()
+    message = llm.invoke(prompt, **kwargs)
+    return message.content, {"streamed": False, "ttft": None, "complete_object_at": None, "early_stop": False,
+                             "elapsed": time.monotonic() - started, "usage": usage_of(message)}
+
+
+def invoke_llm(llm, prompt, call_type: str, max_tokens: Optional[int] = None, timeout: Optional[float] = None,
+               stream: Optional[bool] = None, player: Optional[str] = None, **kwargs) -> Tuple[str, Dict]:
+    """
+    Single entry point for model calls. Returns (stripped text, call info).
+
+    Streaming is used when `stream` is True or, if unset, when the current call
+    context has `stream=True`. Timing and token usage are recorded on the
+    context's `meter` (a CallMeter) when one is set, attributed to the
+    context's round/phase and to `player` (the player the call acts for).
+
+    Without a `timeout`, the context's `call_timeouts` give one per call type.
+    The timeout is cut to the time left before the context's `deadline`; a
+    call that runs out of time is counted on the meter and raises `CallTimeout`.
+    Transient errors (`is_retryable`) are retried up to MAX_RETRIES times, but
+    only while the backoff fits in what is left of that timeout, so retries never
+    stretch a call past it (registry clients have SDK retries off).
+    With a `scheduler` in the context (scheduler.CallScheduler), the call first
+    waits for a slot in its priority class; the wait counts against the deadline.
+    """
+    ctx = current_call_context()
+    meter = ctx.get("meter")
+    if stream is None:
+        stream = bool(ctx.get("stream"))
+    if max_tokens is not None:
+        kwargs["max_tokens"] = max_tokens
+    scheduler = ctx.get("scheduler")
+    try:
+        # With a scheduler, wait for a call slot first (bounded by the deadline)
+        with scheduler.slot(call_type, ctx.get("game"), time_left()) if scheduler is not None else nullcontext():
+            timeout = _effective_timeout(call_type, timeout, ctx)
+            if timeout is not None and timeout <= 0:
+                raise CallTimeout(f"{call_type} call skipped: phase deadline passed")
+            ends = None if timeout is None else time.monotonic() + timeout
+            for attempt in range(MAX_RETRIES + 1):
+                if ends is not None:
+                    kwargs["timeout"] = timeout if attempt == 0 else ends - time.monotonic()
+                try:
+                    text, info = _call(llm, prompt, call_type, stream, kwargs)
+                    break
+                except Exception as e:
+                    backoff = RETRY_BACKOFF * 2 ** attempt
+                    if (not is_retryable(e) or attempt == MAX_RETRIES
+                            or (ends is not None and ends - time.monotonic() <= backoff)):
+                        raise
+                    time.sleep(backoff)
+    except Exception as e:
+        if not is_timeout(e):
+            raise
+        if meter is not None:
+            meter.record_timeout(call_type, ctx.get("phase"))
+        if isinstance(e, CallTimeout):
+            raise
+        raise CallTimeout(f"{call_type} call timed out: {e}") from e
+
+    info["call_type"] = call_type
+    info["model"] = model_name_of(llm)
+    info.update({"round": ctx.get("round"), "phase": ctx.get("phase"), "player": player or ctx.get("player")})
+    if meter is not None:
+        meter.record(call_type, info)
+    return text.strip(), info
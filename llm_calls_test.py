@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Tests for the LLM call layer using a fake streaming model (no API calls).
+"""
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from response_parsing import extract_json, parse_response
+from llm_calls import CallMeter, CallTimeout, call_context, call_cost, current_call_context, invoke_llm, submit
+
+REPLY = json.dumps({"summary": "done", "is_deceptive": False, "analysis": "short"}) + " Anything else I can help with?" * 20
+
+class FakeChunk:
+    def __init__(self, content):
+        self.content = content
+
+class FakeUsageMessage(FakeChunk):
+    usage_metadata = {"input_tokens": 1000, "output_tokens": 100, "input_token_details": {"cache_read": 400}}
+
+class FakeStreamingLLM:
+    """Streams REPLY in small chunks and remembers how much was consumed."""
+    def __init__(self):
+        self.consumed = 0
+        self.closed = False
+
+    def invoke(self, prompt, **kwargs):
+        return FakeChunk(REPLY)
+
+    def stream(self, prompt, **kwargs):
+        try:
+            for i in range(0, len(REPLY), 5):
+                self.consumed = i + 5
+                yield FakeChunk(REPLY[i:i + 5])
+        finally:
+            self.closed = True
+
+def test_streaming_stops_after_complete_object():
+    llm = FakeStreamingLLM()
+    meter = CallMeter()
+    with call_context(meter=meter, stream=True):
+        text, info = invoke_llm(llm, "prompt", "summary", max_tokens=50)
+    assert extract_json(text)[0]["summary"] == "done"
+    assert info["early_stop"] and info["ttft"] is not None
+    assert llm.closed and llm.consumed < len(REPLY)
+    stats = meter.snapshot()["summary"]
+    assert stats["calls"] == 1 and stats["early_stops"] == 1
+    # The trailing usage chunk was never read, so usage is estimated from the text
+    assert info["usage_estimated"] and stats["usage_estimated"] == 1
+    assert info["usage"] == {"prompt_tokens": 2, "completion_tokens": (len(text) + 3) // 4, "cached_tokens": 0}
+    assert meter.totals()["tokens"] > 0
+
+def test_blocking_mode_returns_full_text():
+    text, info = invoke_llm(FakeStreamingLLM(), "prompt", "summary")
+    assert text == REPLY.strip()
+    assert not info["streamed"]
+
+def test_context_propagates_into_thread_pool():
+    with call_context(game="g1", round=2):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            ctx = submit(executor, current_call_context).result()
+    assert ctx["game"] == "g1" and ctx["round"] == 2
+    assert "game" not in current_call_context()
+
+def test_usage_is_attributed_priced_and_budgeted():
+    class UsageLLM:
+        def invoke(self, prompt, **kwargs):
+            return FakeUsageMessage("{}")
+
+    price = {"input": 2.0, "cached_input": 1.0, "output": 10.0}
+    meter = CallMeter(price=price, token_budget=2000)
+    with call_context(meter=meter, round=1, phase="debate"):
+        invoke_llm(UsageLLM(), "prompt", "bid", player="Alice")
+        assert meter.over_budget() is None
+        invoke_llm(UsageLLM(), "prompt", "peer_analysis", player="Bob")
+    report = meter.usage_report()
+    assert report["totals"]["tokens"] == 2200 and report["totals"]["cached_tokens"] == 800
+    assert report["by_player"]["Alice"]["prompt_tokens"] == 1000
+    assert report["by_round"]["1"]["calls"] == 2 and report["by_phase"]["debate"]["calls"] == 2
+    cost = call_cost({"prompt_tokens": 1000, "completion_tokens": 100, "cached_tokens": 400}, price)
+    assert abs(cost - (600 * 2 + 400 * 1 + 100 * 10) / 1e6) < 1e-12
+    assert abs(report["totals"]["cost_usd"] - 2 * cost) < 1e-12
+    assert meter.over_budget() == "token_budget" and report["budget"]["exceeded"] == "token_budget"
+
+class SlowLLM:
+    """Takes `delay` seconds; like a client, gives up with a timeout error at its `timeout`."""
+    def __init__(self, delay):
+        self.delay = delay
+        self.timeouts = []
+
+    def invoke(self, prompt, timeout=None, **kwargs):
+        self.timeouts.append(timeout)
+        if timeout is not None and timeout < self.delay:
+            time.sleep(timeout)
+            raise TimeoutError("request timed out")
+        time.sleep(self.delay)
+        return FakeChunk("{}")
+
+def test_timeouts_come_from_config_and_deadline():
+    llm, meter = SlowLLM(0.3), CallMeter()
+    with call_context(meter=meter, phase="debate", call_timeouts={"default": 5, "bid": 0.05}):
+        invoke_llm(llm, "prompt", "vote")
+        with pytest.raises(CallTimeout):
+            invoke_llm(llm, "prompt", "bid")
+        with call_context(deadline=time.monotonic() + 0.1):
+            with pytest.raises(CallTimeout):
+                invoke_llm(llm, "prompt", "peer_analysis")
+            time.sleep(0.1)
+            with pytest.raises(CallTimeout):  # deadline passed: not even sent
+                invoke_llm(llm, "prompt", "peer_analysis")
+    assert llm.timeouts[0] == 5 and llm.timeouts[1] == 0.05 and llm.timeouts[2] <= 0.1
+    assert len(llm.timeouts) == 3
+    assert meter.timeouts() == {"total": 3, "by_call_type": {"bid": 1, "peer_analysis": 2}, "by_phase": {"debate": 3}}
+    assert meter.snapshot()["vote"]["timeouts"] == 0
+
+def test_gather_drops_calls_late_for_the_deadline():
+    from game_graph import _gather
+
+    meter = CallMeter()
+    with call_context(meter=meter, phase="debate", deadline=time.monotonic() + 0.2):
+        executor = ThreadPoolExecutor(max_workers=1)
+        futures = {name: submit(executor, invoke_llm, SlowLLM(delay), "p", "peer_analysis")
+                   for name, delay in [("fast", 0.01), ("slow", 1.0), ("queued", 0.01)]}
+        started = time.monotonic()
+        results, errors, late = _gather(futures, "peer_analysis")
+        executor.shutdown(wait=False, cancel_futures=True)
+    assert time.monotonic() - started < 0.5
+    assert list(results) == ["fast"] and not errors and late == ["slow", "queued"]
+    # "queued" never started; "slow" hits its deadline-capped timeout itself
+    time.sleep(0.3)
+    assert meter.timeouts()["by_call_type"] == {"peer_analysis": 2}
+
+def test_parse_outcomes_are_counted_per_game():
+    meters = [CallMeter(), CallMeter()]
+    for meter, reply in zip(meters, ['{"summary": "s", "is_deceptive": false, "analysis": "a"}', "no json"]):
+        with call_context(meter=meter):
+            parse_response(reply, "summary", "m1")
+    assert meters[0].parse_stats() == {"m1": {"summary": {"calls": 1, "failures": 0, "recovered": 0}}}
+    assert meters[1].parse_stats() == {"m1": {"summary": {"calls": 1, "failures": 1, "recovered": 0}}}
+
+if __name__ == "__main__":
+    test_streaming_stops_after_complete_object()
+    test_blocking_mode_returns_full_text()
+    test_context_propagates_into_thread_pool()
+    test_usage_is_attributed_priced_and_budgeted()
+    test_timeouts_come_from_config_and_deadline()
+    test_gather_drops_calls_late_for_the_deadline()
+    test_parse_outcomes_are_counted_per_game()
+    print("LLM call layer tests passed")
@@ -0,0 +1,149 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+# LangChain message types -> chat template roles
+_ROLES = {"system": "system", "human": "user", "ai": "assistant"}
+
+# One engine per model path, shared by every registry (and game) in the process
+_ENGINES: Dict[str, "BatchingEngine"] = {}
+_ENGINES_LOCK = threading.Lock()
+
+
+class TransformersRuntime:
+    """
+    Small instruction-tuned causal LM run on CPU with Hugging Face transformers.
+    `generate` runs a left-padded batch of conversations in one forward pass per token.
+    """
+
+    def __init__(self, model_path: str, threads: Optional[int] = None):
+        try:
+            import torch
+            from transformers import AutoModelForCausalLM, AutoTokenizer
+        except ImportError as e:
+            raise ImportError("The local backend needs transformers and torch: pip install transformers torch") from e
+        if threads:
+            torch.set_num_threads(threads)
+        self.torch = torch
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path, padding_side="left")
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        self.model = AutoModelForCausalLM.from_pretrained(model_path, torch_dtype=torch.float32)
+        self.model.eval()
+
+    def generate(self, conversations: List[List[Dict[str, str]]], max_tokens: List[int],
+                 temperature: float) -> List[Tuple[str, Dict[str, int]]]:
+        prompts = [self.tokenizer.apply_chat_template(c, tokenize=False, add_generation_prompt=True)
+                   for c in conversations]
+        batch = self.tokenizer(prompts, return_tensors="pt", padding=True)
+        sample = temperature > 0
+        with self.torch.inference_mode():
+            output = self.model.generate(
+                **batch, max_new_tokens=max(max_tokens), do_sample=sample,
+                temperature=temperature if sample else None, pad_token_id=self.tokenizer.pad_token_id,
+            )
+        width = batch["input_ids"].shape[1]
+        results = []
+        for i, row in enumerate(output):
+            new = row[width:][:max_tokens[i]]
+            new = new[new != self.tokenizer.pad_token_id]
+            usage = {"prompt_tokens": int(batch["attention_mask"][i].sum()), "completion_tokens": int(new.numel())}
+            results.append((self.tokenizer.decode(new, skip_special_tokens=True), usage))
+        return results
+
+
+class BatchingEngine:
+    """
+    Groups concurrent requests for one runtime into batches.
+
+    A single worker thread takes the first waiting request, keeps collecting
+    for up to `max_wait` seconds or until `max_batch` requests are in hand,
+    then runs each temperature group as one batched generation. Requests from
+    every player, worker thread and game in the process share the engine, so
+    cores stay busy while individual games wait on their own calls.
+    """
+
+    def __init__(self, runtime, max_batch: int = 8, max_wait: float = 0.02):
+        self.runtime = runtime
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.stats = {"requests": 0, "batches": 0}
+        self._queue: "queue.Queue[Tuple[List[Dict[str, str]], int, float, Future]]" = queue.Queue()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, conversation: List[Dict[str, str]], max_tokens: int, temperature: float) -> Future:
+        """Queue one conversation; the future resolves to (text, usage)."""
+        future: Future = Future()
+        self._queue.put((conversation, max_tokens, temperature, future))
+        return future
+
+    def _collect(self) -> List[Tuple]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            groups: Dict[float, List[Tuple]] = {}
+            for request in self._collect():
+                groups.setdefault(request[2], []).append(request)
+            for temperature, requests in groups.items():
+                self.stats["requests"] += len(requests)
+                self.stats["batches"] += 1
+                try:
+                    results = self.runtime.generate([r[0] for r in requests], [r[1] for r in requests], temperature)
+                except Exception as e:  # hand the failure to every caller in the batch
+                    for r in requests:
+                        r[3].set_exception(e)
+                    continue
+                for r, result in zip(requests, results):
+                    r[3].set_result(result)
+
+
+def get_engine(model_path: str, max_batch: int = 8, max_wait: float = 0.02, threads: Optional[int] = None,
+               runtime_factory: Callable[..., Any] = TransformersRuntime) -> BatchingEngine:
+    """The process-wide engine for `model_path`, loading the model on first use."""
+    with _ENGINES_LOCK:
+        if model_path not in _ENGINES:
+            _ENGINES[model_path] = BatchingEngine(runtime_factory(model_path, threads=threads), max_batch, max_wait)
+        return _ENGINES[model_path]
+
+
+class LocalChatModel(BaseChatModel):
+    """Chat model backed by a local `BatchingEngine`; usable wherever a provider client is."""
+
+    model_name: str
+    engine: Any
+    temperature: float = 0.7
+    max_tokens: Optional[int] = 256
+
+    @property
+    def _llm_type(self) -> str:
+        return "local"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs) -> ChatResult:
+        conversation = [{"role": _ROLES.get(m.type, "user"), "content": m.content} for m in messages]
+        max_tokens = kwargs.get("max_tokens") or self.max_tokens or 256
+        future = self.engine.submit(conversation, max_tokens, self.temperature)
+        text, usage = future.result(timeout=kwargs.get("timeout"))
+        message = AIMessage(content=text, usage_metadata={
+            "input_tokens": usage["prompt_tokens"],
+            "output_tokens": usage["completion_tokens"],
+            "total_tokens": usage["prompt_tokens"] + usage["completion_tokens"],
+        })
+        return ChatResult(generations=[ChatGeneration(message=message)])
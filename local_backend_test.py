@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Tests for the local CPU model backend using a fake runtime (no model weights).
+"""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from llm_calls import CallMeter, call_context, invoke_llm
+from local_backend import BatchingEngine, LocalChatModel, get_engine
+from models import ModelRegistry
+
+
+class FakeRuntime:
+    """Echoes the last message's length; remembers batch sizes."""
+    def __init__(self, model_path=None, threads=None):
+        self.batch_sizes = []
+        self.release = threading.Event()
+
+    def generate(self, conversations, max_tokens, temperature):
+        self.release.wait(5)
+        self.batch_sizes.append(len(conversations))
+        return [(json.dumps({"n": len(c[-1]["content"])}), {"prompt_tokens": 10, "completion_tokens": 3})
+                for c in conversations]
+
+
+def test_concurrent_requests_are_batched():
+    runtime = FakeRuntime()
+    engine = BatchingEngine(runtime, max_batch=4, max_wait=0.2)
+    llm = LocalChatModel(model_name="local-test", engine=engine)
+    meter = CallMeter()
+    with call_context(meter=meter), ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(invoke_llm, llm, "x" * n, "bid", max_tokens=5) for n in range(1, 5)]
+        runtime.release.set()
+        texts = sorted(json.loads(f.result()[0])["n"] for f in futures)
+    assert texts == [1, 2, 3, 4]
+    assert runtime.batch_sizes == [4]
+    assert engine.stats == {"requests": 4, "batches": 1}
+
+
+def test_registry_builds_local_clients_on_shared_engine():
+    models = {"tiny": {"name": "tiny", "provider": "local", "model_path": "fake/tiny", "temperature": 0.0,
+                       "batching": {"max_wait": 0.0}}}
+    engine = get_engine("fake/tiny", runtime_factory=FakeRuntime)
+    engine.runtime.release.set()
+    first, second = ModelRegistry("tiny", models=models), ModelRegistry("tiny", models=models)
+    assert first.providers() == {"local"}
+    assert first.client("tiny").engine is second.client("tiny").engine is engine
+    meter = CallMeter()
+    with call_context(meter=meter):
+        text, info = invoke_llm(first.client("tiny"), "hello", "vote")
+    assert json.loads(text) == {"n": 5}
+    assert info["model"] == "tiny" and meter.totals()["prompt_tokens"] == 10
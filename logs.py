@@ -3,9 +3,21 @@ import json
 import threading
 from datetime import datetime
 from typing import Dict, Optional
+from response_parsing import parse_stats
+from llm_calls import current_call_context
+from catalog import RunCatalog, backfill, run_ended
 
 # global lock to ensure concurrent threads don't corrupt log files
 _FILE_LOCK = threading.Lock()
+# open SQLite run catalogs by path, shared by concurrent games
+_CATALOGS: Dict[str, RunCatalog] = {}
+
+
+def _catalog(path: str) -> RunCatalog:
+    with _FILE_LOCK:
+        if path not in _CATALOGS:
+            _CATALOGS[path] = RunCatalog(path)
+        return _CATALOGS[path]
 
 
 def _ensure_dirs(path: str) -> None:
@@ -16,7 +28,8 @@ def _default_run_id() -> str:
     return datetime.utcnow().strftime("%Y%m%d-%H%M%S-%f")
 
 
-def init_logging_state(state, log_dir: Optional[str] = None, enable_file_logging: bool = True):
+def init_logging_state(state, log_dir: Optional[str] = None, enable_file_logging: bool = True,
+                       run_meta: Optional[Dict] = None, catalog: bool = False):
     """
     Initialize per-run logging paths on the game state. Returns a new updated state.
 
@@ -24,7 +37,9 @@ def init_logging_state(state, log_dir: Optional[str] = None, enable_file_logging
     - Prepares three files:
       - events_path: NDJSON stream of event entries (one per line)
       - state_path: full-game-state JSON snapshot (written at end, can be updated incrementally)
-      - meta_path: run metadata (players, roles, model, timestamps)
+      - meta_path: run metadata (players, roles, model, timestamps); `run_meta` overrides defaults
+    - With `catalog`, also registers the run in `log_dir`/catalog.sqlite, which then
+      receives every event and the final outcome (see catalog.py)
     """
     if not enable_file_logging:
         return state
@@ -43,6 +58,7 @@ def init_logging_state(state, log_dir: Optional[str] = None, enable_file_logging
         "meta": os.path.join(folder, "run_meta.json"),
         "metrics": os.path.join(folder, "final_metrics.json"),
         "index": os.path.join(base_dir, "index.jsonl"),  # global index of runs
+        "blobs": os.path.join(base_dir, "blobs.sqlite"),  # prompt/response blob store shared by runs
     }
 
     # Write meta and append to index
@@ -55,7 +71,10 @@ def init_logging_state(state, log_dir: Optional[str] = None, enable_file_logging
         "config": {
             "max_debate_turns": getattr(state, "step", None),
         },
+        **(run_meta or {}),
     }
+    if catalog:
+        paths["catalog"] = os.path.join(base_dir, "catalog.sqlite")
     with _FILE_LOCK:
         with open(paths["meta"], "w", encoding="utf-8") as f:
             json.dump(meta, f, ensure_ascii=False, indent=2)
@@ -81,6 +100,9 @@ def init_logging_state(state, log_dir: Optional[str] = None, enable_file_logging
                     "metrics_path": paths["metrics"],
                 }) + "\n")
 
+    if catalog:
+        _catalog(paths["catalog"]).add_run(meta, folder=folder)
+
     return state.model_copy(update={
         "log_dir": base_dir,
         "log_run_id": run_id,
@@ -109,119 +131,62 @@ def write_final_state(state) -> None:
         return
     _persist_full_state(state, paths["state"])
 
-def _summarize_deception_by_player(state) -> Dict[str, Dict[str, float]]:
-    """Aggregate per-player deception counts and average suspicion from state.deception_history.
-
-    Returns a mapping of player name to summary dict with keys:
-    total_statements, self_reported_deceptions, peer_detected_deceptions, average_suspicion
-    """
-    summary: Dict[str, Dict[str, float]] = {}
-    history: Dict[str, List[Dict]] = getattr(state, "deception_history", {}) or {}
-
-    for player, records in history.items():
-        total_statements = len(records)
-        self_deceptions = 0
-        peer_detected = 0
-        suspicion_values: List[float] = []
-
-        for rec in records:
-            if (rec.get("self_analysis", {}) or {}).get("is_deceptive", 0) == 1:
-                self_deceptions += 1
-            for peer in (rec.get("other_analyses", {}) or {}).values():
-                if peer.get("is_deceptive", 0) == 1:
-                    peer_detected += 1
-                susp = float(peer.get("suspicion_level", 0.5))
-                suspicion_values.append(susp)
-
-        avg_susp = mean(suspicion_values) if suspicion_values else 0.0
-        summary[player] = {
-            "total_statements": total_statements,
-            "self_reported_deceptions": self_deceptions,
-            "peer_detected_deceptions": peer_detected,
-            "average_suspicion": avg_susp,
-        }
-
-    return summary
-
-
 def _compute_trends(state) -> Dict:
-    """Compute suspicion and deception-flagging trends over time and by round from state.deception_iterations."""
-    iterations: List[Dict] = getattr(state, "deception_iterations", []) or []
-    timepoints: List[Dict] = []
-    by_round: Dict[str, Dict[str, float]] = {}
-
-    for idx, it in enumerate(iterations):
-        round_num = int(it.get("round", 0))
-        avg_susp = float(it.get("average_suspicion", 0.0))
-        frac_flag = float(it.get("observer_deceptive_fraction", 0.0))
-        timepoints.append({
+    """Suspicion and deception-flagging trends: one timepoint per analyzed statement, plus per-round and overall aggregates from the running metrics."""
+    timepoints = [
+        {
             "t": idx,
-            "round": round_num,
+            "round": int(it.get("round", 0)),
             "phase": it.get("phase"),
             "speaker": it.get("speaker"),
-            "average_suspicion": avg_susp,
-            "observer_deceptive_fraction": frac_flag,
-        })
-
-        key = str(round_num)
-        r = by_round.setdefault(key, {"avg_suspicion_sum": 0.0, "avg_flag_sum": 0.0, "n": 0})
-        r["avg_suspicion_sum"] += avg_susp
-        r["avg_flag_sum"] += frac_flag
-        r["n"] += 1
-
-    by_round_final: Dict[str, Dict[str, float]] = {}
-    for rnd, agg in by_round.items():
-        n = agg.get("n", 0)
-        by_round_final[rnd] = {
-            "num_statements": n,
-            "avg_suspicion": (agg["avg_suspicion_sum"] / n) if n else 0.0,
-            "avg_observer_deceptive_fraction": (agg["avg_flag_sum"] / n) if n else 0.0,
+            "average_suspicion": float(it.get("average_suspicion", 0.0)),
+            "observer_deceptive_fraction": float(it.get("observer_deceptive_fraction", 0.0)),
         }
-
-    overall = {
-        "num_timepoints": len(timepoints),
-        "global_avg_suspicion": (mean([tp["average_suspicion"] for tp in timepoints]) if timepoints else 0.0),
-        "global_avg_observer_deceptive_fraction": (mean([tp["observer_deceptive_fraction"] for tp in timepoints]) if timepoints else 0.0),
-    }
-
+        for idx, it in enumerate(getattr(state, "deception_statements", []) or [])
+    ]
+    running = state.running_metrics
     return {
         "timepoints": timepoints,
-        "by_round": by_round_final,
-        "overall": overall,
+        "by_round": running.by_round(),
+        "overall": running.overall(),
     }
 
 
-def compute_final_metrics(state) -> Dict:
-    """Compute organized final metrics for the run without raw prompts or model outputs."""
+def compute_final_metrics(state, call_meter=None, scheduler=None) -> Dict:
+    """Compute organized final metrics for the run without raw prompts or model outputs.
+
+    `call_meter` (llm_calls.CallMeter) adds per-call-type latency/streaming stats
+    and token/cost usage attributed by round, phase and player. `scheduler`
+    (scheduler.CallScheduler) adds this game's slot wait times per priority class.
+    """
     run_id = getattr(state, "log_run_id", None)
+    game_id = getattr(state, "game_id", run_id)
     roles = getattr(state, "roles", {}) or {}
     players = getattr(state, "players", []) or []
     created_at = datetime.utcnow().isoformat()
 
-    deception_by_player = _summarize_deception_by_player(state)
+    # Counters maintained during play (running_metrics.py), so this is cheap mid-game too
+    running = state.running_metrics
+    deception_by_player = running.per_player()
     trends = _compute_trends(state)
 
-    # Cross-perception scores as of the end
-    deception_scores = getattr(state, "deception_scores", {}) or {}
-
-    # Accuracy by observer (if available)
-    accuracy_by_observer: Dict = {}
-    try:
-        if compute_observer_accuracy is not None:
-            accuracy_by_observer = compute_observer_accuracy(state)
-    except Exception:
-        accuracy_by_observer = {}
+    # Cross-perception scores as of now
+    deception_scores = dict(getattr(state, "deception_scores", {}) or {})
 
-    total_statements = sum(p["total_statements"] for p in deception_by_player.values()) if deception_by_player else 0
+    total_statements = running.num_statements
 
     metrics = {
         "schema_version": 1,
         "run": {
             "run_id": run_id,
+            "game_id": game_id,
             "created_at_utc": created_at,
             "num_players": len(players),
             "num_alive_end": len(getattr(state, "alive_players", []) or []),
+            "num_rounds": getattr(state, "round_num", None),
             "winner": getattr(state, "winner", None),
+            "finished": getattr(state, "winner", None) is not None,
+            "stop_reason": getattr(state, "stop_reason", None),
         },
         "roster": {
             "players": players,
@@ -233,29 +198,73 @@ def compute_final_metrics(state) -> Dict:
         "deception": {
             "per_player": deception_by_player,
             "cross_perception_scores": deception_scores,
-            "accuracy_by_observer": accuracy_by_observer,
+            "accuracy_by_observer": running.accuracy_by_observer(),
             "trends": trends,
         },
+        # Parse outcomes per model and call type (failures mean a fallback was used)
+        "parsing": call_meter.parse_stats() if call_meter is not None else parse_stats(),
+        "llm_calls": call_meter.snapshot() if call_meter is not None else {},
+        "usage": call_meter.usage_report() if call_meter is not None else {},
+        # Calls that hit their timeout or the phase deadline (a fallback was used)
+        "timeouts": call_meter.timeouts() if call_meter is not None else {},
+        "scheduler": scheduler.stats(game_id) if scheduler is not None else {},
     }
 
     return metrics
 
 
-def write_final_metrics(state) -> Optional[str]:
-    """Write a clean, organized final-metrics JSON file. Returns path if written."""
+def write_final_metrics(state, call_meter=None, scheduler=None) -> Optional[str]:
+    """
+    Write a clean, organized final-metrics JSON file. Returns path if written.
+    Also called every round; the run catalog's usage totals are updated each time,
+    its outcome columns only once the game has ended.
+    """
     paths = getattr(state, "log_paths", None)
     if not paths or not paths.get("metrics"):
         return None
 
-    metrics = compute_final_metrics(state)
+    metrics = compute_final_metrics(state, call_meter, scheduler)
     with _FILE_LOCK:
         with open(paths["metrics"], "w", encoding="utf-8") as f:
             json.dump(metrics, f, ensure_ascii=False, indent=2)
+    if paths.get("catalog"):
+        _catalog(paths["catalog"]).update_usage(metrics)
+        if run_ended(metrics):
+            _catalog(paths["catalog"]).finish_run(metrics)
     return paths["metrics"]
 
-def log_event(state, event_type: str, actor: Optional[str], content: Dict):
+def update_run_meta(state, updates: Dict) -> None:
+    """Merge `updates` into the run's run_meta.json (e.g. final token usage)."""
+    paths = getattr(state, "log_paths", None)
+    if not paths or not paths.get("meta"):
+        return
+    with _FILE_LOCK:
+        with open(paths["meta"], "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        meta.update(updates)
+        with open(paths["meta"], "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+
+
+def batch_usage(log_dir: str, batch: str) -> Dict[str, float]:
+    """
+    Calls, tokens and cost already spent by the runs of `batch` in `log_dir`, from
+    its run catalog (runs of a batch are always cataloged, with usage updated every
+    round while playing). Runs on disk but not in the catalog yet are backfilled first.
+    """
+    catalog = _catalog(os.path.join(log_dir, "catalog.sqlite"))
+    backfill(catalog, log_dir)
+    return catalog.batch_usage(batch)
+
+
+def log_event(state, event_type: str, actor: Optional[str], content: Dict, stream_details: Optional[Dict] = None):
     """
     Create an event entry, append into state.game_logs, and if configured, stream to NDJSON.
+
+    `stream_details` are merged into the streamed entry's details only, for data the
+    state already holds elsewhere (e.g. deception analyses in the deception store).
+    The streamed entry is also published, tagged with the run id, to the live
+    event hub of the current call context (live_events.EventHub), if any.
     """
     entry = {
         "timestamp": datetime.utcnow().isoformat(),
@@ -267,11 +276,18 @@ def log_event(state, event_type: str, actor: Optional[str], content: Dict):
         "details": content,
     }
 
+    streamed = {**entry, "details": {**content, **stream_details}} if stream_details else entry
+    hub = current_call_context().get("events")
+    if hub is not None:
+        hub.publish({"game": getattr(state, "game_id", getattr(state, "log_run_id", None)), **streamed})
+
     # Stream to NDJSON if configured
     paths = getattr(state, "log_paths", None)
     if paths and paths.get("events"):
         try:
-            _persist_event(entry, paths["events"])
+            _persist_event(streamed, paths["events"])
+            if paths.get("catalog"):
+                _catalog(paths["catalog"]).add_event(state.log_run_id, streamed)
         except Exception:
             # Do not break the game on logging errors
             pass
@@ -0,0 +1,131 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field, PrivateAttr
+
+from transcript import estimate_tokens
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+_STOPWORDS = frozenset("a an the and or but to of in on at for is are was were be i you he she it we they this that with as".split())
+
+# Entry kinds that are never folded into digests (e.g. the Seer's role discoveries)
+PINNED_KINDS = ("investigation",)
+_DIGEST_PREFIX = "Earlier notes: "
+
+
+def _tokens(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class MemoryEntry(BaseModel):
+    id: int
+    text: str
+    kind: str = "note"  # note | observation | investigation | digest
+
+
+class MemoryStore(BaseModel):
+    """
+    Per-player notes with a local BM25 index (CPU-only, no model calls).
+
+    `retrieve` returns the top-k notes relevant to the current decision that
+    fit a token budget. When more than `max_entries` notes accumulate, the
+    oldest unpinned ones are folded into a single compact digest entry, so
+    storage stays bounded over long games.
+    """
+
+    entries: List[MemoryEntry] = Field(default_factory=list)
+    max_entries: int = 120
+    compact_batch: int = 20
+    digest_chars: int = 60  # per-note excerpt length inside a digest
+
+    _next_id: int = PrivateAttr(default=0)
+    _postings: Dict[str, Dict[int, int]] = PrivateAttr(default_factory=dict)  # term -> {entry id: tf}
+    _lengths: Dict[int, int] = PrivateAttr(default_factory=dict)
+
+    def model_post_init(self, __context) -> None:
+        for entry in self.entries:
+            self._index(entry)
+        self._next_id = max((e.id for e in self.entries), default=-1) + 1
+
+    def _index(self, entry: MemoryEntry) -> None:
+        terms = Counter(_tokens(entry.text))
+        self._lengths[entry.id] = sum(terms.values())
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[entry.id] = tf
+
+    def _unindex(self, entry: MemoryEntry) -> None:
+        self._lengths.pop(entry.id, None)
+        for term in set(_tokens(entry.text)):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(entry.id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def add(self, text: str, kind: str = "note") -> Optional[MemoryEntry]:
+        text = (text or "").strip()
+        if not text:
+            return None
+        entry = MemoryEntry(id=self._next_id, text=text, kind=kind)
+        self._next_id += 1
+        self.entries.append(entry)
+        self._index(entry)
+        if len(self.entries) > self.max_entries:
+            self._compact()
+        return entry
+
+    def _compact(self) -> None:
+        """Fold the oldest unpinned, non-digest notes into one digest entry."""
+        batch = [e for e in self.entries if e.kind not in PINNED_KINDS and e.kind != "digest"][:self.compact_batch]
+        if len(batch) < 2:
+            # Only digests left to fold: merge the oldest digests together
+            batch = [e for e in self.entries if e.kind == "digest"][:self.compact_batch]
+            if len(batch) < 2:
+                return
+        excerpts = list(dict.fromkeys(e.text.replace(_DIGEST_PREFIX, "", 1)[:self.digest_chars] for e in batch))
+        folded = {e.id for e in batch}
+        for entry in batch:
+            self._unindex(entry)
+        digest = MemoryEntry(id=self._next_id, text=_DIGEST_PREFIX + " | ".join(excerpts), kind="digest")
+        self._next_id += 1
+        # Keep the digest where the folded notes were, ahead of newer entries
+        position = next(i for i, e in enumerate(self.entries) if e.id in folded)
+        self.entries = [e for e in self.entries if e.id not in folded]
+        self.entries.insert(position, digest)
+        self._index(digest)
+
+    def retrieve(self, query: str, k: int = 5, token_budget: Optional[int] = None,
+                 k1: float = 1.5, b: float = 0.75) -> List[MemoryEntry]:
+        """Top-k entries by BM25 score against `query`, trimmed to `token_budget`."""
+        terms = set(_tokens(query))
+        if not terms or not self._lengths:
+            return []
+        n_docs = len(self._lengths)
+        avg_len = sum(self._lengths.values()) / n_docs or 1.0
+        scores: Dict[int, float] = {}
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for entry_id, tf in postings.items():
+                norm = tf + k1 * (1 - b + b * self._lengths[entry_id] / avg_len)
+                scores[entry_id] = scores.get(entry_id, 0.0) + idf * tf * (k1 + 1) / norm
+
+        by_id = {e.id: e for e in self.entries}
+        ranked = sorted(scores, key=lambda i: (-scores[i], -i))[:k]
+        picked, used = [], 0
+        for entry_id in ranked:
+            cost = estimate_tokens(by_id[entry_id].text)
+            if token_budget is not None and used + cost > token_budget:
+                continue
+            picked.append(by_id[entry_id])
+            used += cost
+        return picked
+
+    def render(self, query: str, k: int = 5, token_budget: Optional[int] = None) -> str:
+        """Relevant notes as a bullet list, oldest first; empty string if none."""
+        picked = sorted(self.retrieve(query, k, token_budget), key=lambda e: e.id)
+        return "\n".join(f"- {e.text}" for e in picked)
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Tests for the indexed player memory (no LLM calls).
+"""
+
+from memory import MemoryStore
+
+def test_retrieves_relevant_notes_within_budget():
+    memory = MemoryStore()
+    memory.add("Bob defended Joy twice, suspicious pairing")
+    memory.add("Raj quiet all day")
+    memory.add("Discovered Joy is a Werewolf.", "investigation")
+    picked = memory.retrieve("Should we exile Joy?", k=2)
+    assert len(picked) == 2
+    assert picked[0].text.startswith("Discovered Joy")
+    assert memory.retrieve("what did raj do", k=1)[0].text == "Raj quiet all day"
+
+    assert memory.retrieve("Joy", k=3, token_budget=10) == [memory.entries[2]]
+    assert memory.render("nothing matches here") == ""
+
+def test_compaction_bounds_storage_and_keeps_pins():
+    memory = MemoryStore(max_entries=10, compact_batch=5)
+    memory.add("Discovered Emma is a Villager.", "investigation")
+    for i in range(40):
+        memory.add(f"note {i} about player{i}")
+    assert len(memory.entries) <= 10
+    assert any(e.kind == "investigation" for e in memory.entries)
+    assert any(e.kind == "digest" for e in memory.entries)
+    # Folded notes stay findable through their digest
+    assert memory.retrieve("player30", k=1)[0].kind == "digest"
+
+def test_index_rebuilt_after_roundtrip():
+    memory = MemoryStore()
+    memory.add("Cyrus claimed Seer")
+    restored = MemoryStore.model_validate(memory.model_dump())
+    assert restored.retrieve("seer claim")[0].text == "Cyrus claimed Seer"
+    assert restored.add("another").id == 1
+
+if __name__ == "__main__":
+    test_retrieves_relevant_notes_within_budget()
+    test_compaction_bounds_storage_and_keeps_pins()
+    test_index_rebuilt_after_roundtrip()
+    print("Memory tests passed")
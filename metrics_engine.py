@@ -0,0 +1,214 @@
+import argparse
+import json
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from deception_detection import FALLBACK_SOURCES
+from export_deception import iter_runs, rows_from_snapshot
+
+# Confusion cell of (prediction, self label): index = 2 * pred + label
+_TN, _FN, _FP, _TP = 0, 1, 2, 3
+
+
+def _codes(values: Sequence) -> Tuple[np.ndarray, List]:
+    """Integer codes for `values` plus the vocabulary they index."""
+    vocab: Dict = {}
+    codes = np.fromiter((vocab.setdefault(v, len(vocab)) for v in values), dtype=np.int64, count=len(values))
+    return codes, list(vocab)
+
+
+class DeceptionArrays:
+    """
+    Flat, column-per-field view of peer analyses from one or many games.
+
+    One element per (statement, observer) peer analysis: game, speaker, observer,
+    round, the speaker's self label, the observer's peer label and suspicion.
+    Categorical columns are integer codes into `vocab[column]`.
+    """
+
+    CATEGORICAL = ("game", "model", "speaker", "observer", "speaker_role", "observer_role")
+
+    def __init__(self, columns: Dict[str, Sequence]):
+        self.vocab: Dict[str, List] = {}
+        for name in self.CATEGORICAL:
+            codes, vocab = _codes(list(columns.get(name, [])))
+            setattr(self, name, codes)
+            self.vocab[name] = vocab
+        self.round = np.asarray(columns.get("round", []), dtype=np.int64)
+        self.self_label = np.asarray(columns.get("self_label", []), dtype=np.int8)
+        self.peer_label = np.asarray(columns.get("peer_label", []), dtype=np.int8)
+        self.suspicion = np.asarray(columns.get("suspicion", []), dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.peer_label)
+
+    @classmethod
+    def from_rows(cls, analysis_rows: Iterable[Dict]) -> "DeceptionArrays":
+        """
+        Build from analysis rows as produced by `export_deception.rows_from_snapshot`.
+        Fallback analyses, and peer analyses of statements whose self-analysis
+        is a fallback, are skipped.
+        """
+        rows = [r for r in analysis_rows if r.get("source") not in FALLBACK_SOURCES]
+        self_labels = {(r["run_id"], r["statement_id"]): r["is_deceptive"] for r in rows if r["is_self"]}
+        peers = [r for r in rows if not r["is_self"] and (r["run_id"], r["statement_id"]) in self_labels]
+        return cls({
+            "game": [r["run_id"] for r in peers],
+            "model": [r["model"] for r in peers],
+            "speaker": [r["speaker"] for r in peers],
+            "observer": [r["observer"] for r in peers],
+            "speaker_role": [r["speaker_role"] for r in peers],
+            "observer_role": [r["observer_role"] for r in peers],
+            "round": [r["round"] or 0 for r in peers],
+            "self_label": [self_labels[(r["run_id"], r["statement_id"])] for r in peers],
+            "peer_label": [r["is_deceptive"] for r in peers],
+            "suspicion": [0.5 if r["suspicion_level"] is None else r["suspicion_level"] for r in peers],
+        })
+
+    @classmethod
+    def from_log_dir(cls, log_dir: str) -> "DeceptionArrays":
+        rows: List[Dict] = []
+        for meta, snapshot in iter_runs(log_dir):
+            rows.extend(rows_from_snapshot(snapshot, meta)[1])
+        return cls.from_rows(rows)
+
+    @classmethod
+    def from_parquet(cls, path: str, filter=None) -> "DeceptionArrays":
+        """Build from an `export_deception` analyses dataset (requires pyarrow)."""
+        import pyarrow.dataset as ds
+        table = ds.dataset(path, format="parquet", partitioning="hive").to_table(filter=filter)
+        return cls.from_rows(table.to_pylist())
+
+
+def _rates(counts: np.ndarray) -> Dict[str, np.ndarray]:
+    """accuracy/precision/recall/f1 from (..., 4) confusion counts, 0 where undefined."""
+    tn, fn, fp, tp = (counts[..., i].astype(np.float64) for i in (_TN, _FN, _FP, _TP))
+    def ratio(a, b):
+        return np.divide(a, b, out=np.zeros_like(a), where=b > 0)
+    precision = ratio(tp, tp + fp)
+    recall = ratio(tp, tp + fn)
+    return {
+        "accuracy": ratio(tp + tn, tp + tn + fp + fn),
+        "precision": precision,
+        "recall": recall,
+        "f1": ratio(2 * precision * recall, precision + recall),
+    }
+
+
+def _groups(arrays: DeceptionArrays, by: Optional[str]) -> Tuple[np.ndarray, List]:
+    """Group codes and names for categorical column `by`; None puts everything in one "all" group."""
+    if by is None:
+        return np.zeros(len(arrays), dtype=np.int64), ["all"]
+    return getattr(arrays, by), arrays.vocab[by]
+
+
+def confusion(arrays: DeceptionArrays, by: Optional[str] = "observer") -> np.ndarray:
+    """(n_groups, 4) confusion counts [tn, fn, fp, tp] per value of categorical column `by`."""
+    groups, names = _groups(arrays, by)
+    cell = 2 * arrays.peer_label.astype(np.int64) + arrays.self_label
+    return np.bincount(groups * 4 + cell, minlength=len(names) * 4).reshape(len(names), 4)
+
+
+def _game_confusion(arrays: DeceptionArrays, by: Optional[str]) -> np.ndarray:
+    """(n_games, n_groups, 4) confusion counts, the unit resampled by the bootstrap."""
+    groups, names = _groups(arrays, by)
+    n_games, n_groups = len(arrays.vocab["game"]), len(names)
+    cell = 2 * arrays.peer_label.astype(np.int64) + arrays.self_label
+    flat = (arrays.game * n_groups + groups) * 4 + cell
+    return np.bincount(flat, minlength=n_games * n_groups * 4).reshape(n_games, n_groups, 4)
+
+
+def bootstrap_ci(arrays: DeceptionArrays, by: Optional[str] = "observer", n_boot: int = 1000,
+                 level: float = 0.95, seed: Optional[int] = 0) -> Dict[str, np.ndarray]:
+    """
+    Percentile confidence intervals of the rates per group, resampling whole games
+    with replacement. Each replicate's counts are one weighted sum over games, so
+    all replicates are a single (n_boot, n_games) x (n_games, groups*4) product.
+    Returns {metric: (n_groups, 2) array of [low, high]}.
+    """
+    per_game = _game_confusion(arrays, by)
+    n_games, n_groups, _ = per_game.shape
+    if n_games == 0:
+        return {m: np.zeros((n_groups, 2)) for m in ("accuracy", "precision", "recall", "f1")}
+    rng = np.random.default_rng(seed)
+    weights = rng.multinomial(n_games, np.full(n_games, 1.0 / n_games), size=n_boot)
+    boot_counts = (weights @ per_game.reshape(n_games, -1)).reshape(n_boot, n_groups, 4)
+    alpha = (1.0 - level) / 2
+    return {
+        metric: np.quantile(values, [alpha, 1.0 - alpha], axis=0).T
+        for metric, values in _rates(boot_counts).items()
+    }
+
+
+def round_trends(arrays: DeceptionArrays) -> Dict[str, Dict[str, float]]:
+    """Per round: number of peer analyses, mean suspicion and fraction flagged deceptive."""
+    if not len(arrays):
+        return {}
+    n = np.bincount(arrays.round)
+    suspicion = np.bincount(arrays.round, weights=arrays.suspicion)
+    flagged = np.bincount(arrays.round, weights=arrays.peer_label)
+    return {
+        str(r): {
+            "num_analyses": int(n[r]),
+            "avg_suspicion": float(suspicion[r] / n[r]),
+            "observer_deceptive_fraction": float(flagged[r] / n[r]),
+        }
+        for r in np.flatnonzero(n)
+    }
+
+
+def accuracy_report(arrays: DeceptionArrays, by: Optional[str] = "observer", n_boot: int = 0,
+                    seed: Optional[int] = 0) -> Dict[str, Dict[str, float]]:
+    """
+    Per-group confusion counts and rates in the layout of
+    `compute_observer_accuracy`, with `<metric>_ci` intervals when `n_boot` > 0.
+    """
+    counts = confusion(arrays, by)
+    rates = _rates(counts)
+    cis = bootstrap_ci(arrays, by, n_boot=n_boot, seed=seed) if n_boot else {}
+    report = {}
+    for g, name in enumerate(_groups(arrays, by)[1]):
+        if counts[g].sum() == 0:
+            continue
+        tn, fn, fp, tp = (int(c) for c in counts[g])
+        entry = {"tp": tp, "tn": tn, "fp": fp, "fn": fn, "total": tp + tn + fp + fn}
+        entry.update({metric: float(values[g]) for metric, values in rates.items()})
+        entry.update({f"{metric}_ci": [float(x) for x in ci[g]] for metric, ci in cis.items()})
+        report[str(name)] = entry
+    return report
+
+
+def sweep_report(arrays: DeceptionArrays, n_boot: int = 1000, seed: Optional[int] = 0) -> Dict:
+    """Aggregate report over every game in `arrays`: overall, per observer role, per speaker role, per model, per round."""
+    return {
+        "num_games": len(arrays.vocab["game"]),
+        "num_peer_analyses": len(arrays),
+        "overall": accuracy_report(arrays, None, n_boot, seed).get("all", {}),
+        "by_observer_role": accuracy_report(arrays, "observer_role", n_boot, seed),
+        "by_speaker_role": accuracy_report(arrays, "speaker_role", n_boot, seed),
+        "by_model": accuracy_report(arrays, "model", n_boot, seed),
+        "by_round": round_trends(arrays),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cross-run deception detection metrics with bootstrap confidence intervals")
+    parser.add_argument(
+        "--log-dir",
+        default="./logs",
+        help="Read runs listed in <log-dir>/index.jsonl. Default: ./logs"
+    )
+    parser.add_argument(
+        "--parquet",
+        help="Read an export_deception analyses dataset instead (e.g. ./exports/deception/analyses)"
+    )
+    parser.add_argument(
+        "--bootstrap",
+        type=int,
+        default=1000,
+        help="Bootstrap replicates over games for confidence intervals (0 disables). Default: 1000"
+    )
+    args = parser.parse_args()
+    arrays = DeceptionArrays.from_parquet(args.parquet) if args.parquet else DeceptionArrays.from_log_dir(args.log_dir)
+    print(json.dumps(sweep_report(arrays, n_boot=args.bootstrap), indent=2))
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Tests for the vectorized cross-run metrics engine (no LLM calls).
+"""
+
+from types import SimpleNamespace
+
+from deception_detection import compute_observer_accuracy
+from export_deception import rows_from_snapshot
+from metrics_engine import DeceptionArrays, accuracy_report, round_trends, sweep_report
+
+def _snapshot(bob_lies: int):
+    return {
+        "roles": {"Alice": "Villager", "Bob": "Werewolf", "Cy": "Seer"},
+        "deception_statements": [
+            {"id": "s0", "speaker": "Bob", "round": 0, "self_reported_deceptive": bob_lies},
+            {"id": "s1", "speaker": "Alice", "round": 1, "self_reported_deceptive": 0},
+        ],
+        "deception_analyses": {
+            "s0": {"Bob": {"is_deceptive": bob_lies},
+                   "Alice": {"is_deceptive": 1, "suspicion_level": 0.9},
+                   "Cy": {"is_deceptive": 0, "suspicion_level": 0.4}},
+            "s1": {"Alice": {"is_deceptive": 0},
+                   "Bob": {"is_deceptive": 1, "suspicion_level": 0.7},
+                   "Cy": {"is_deceptive": 0, "suspicion_level": 0.1}},
+        },
+    }
+
+def _rows(run_id, snapshot):
+    return rows_from_snapshot(snapshot, {"run_id": run_id, "model": "m", "created_at_utc": "2026-01-01"})[1]
+
+def test_matches_per_game_observer_accuracy():
+    snapshot = _snapshot(bob_lies=1)
+    arrays = DeceptionArrays.from_rows(_rows("g1", snapshot))
+    expected = compute_observer_accuracy(SimpleNamespace(**snapshot))
+    assert accuracy_report(arrays) == expected
+
+    trends = round_trends(arrays)
+    assert trends["0"]["num_analyses"] == 2 and abs(trends["0"]["avg_suspicion"] - 0.65) < 1e-9
+    assert trends["1"]["observer_deceptive_fraction"] == 0.5
+
+
+def test_sweep_pools_games_with_bootstrap_intervals():
+    arrays = DeceptionArrays.from_rows(_rows("g1", _snapshot(1)) + _rows("g2", _snapshot(0)))
+    report = sweep_report(arrays, n_boot=200)
+    assert report["num_games"] == 2 and report["num_peer_analyses"] == 8
+    overall = report["overall"]
+    assert overall["total"] == 8 and overall["tp"] == 1
+    low, high = overall["accuracy_ci"]
+    assert 0.0 <= low <= overall["accuracy"] <= high <= 1.0
+    assert set(report["by_observer_role"]) == {"Villager", "Seer", "Werewolf"}
@@ -0,0 +1,108 @@
+import os
+import threading
+from typing import Dict, Optional
+
+import httpx
+
+from config import AVAILABLE_MODELS
+from response_parsing import register_model_key
+
+# Call types that can be routed to their own model (see GAME_CONFIG["model_routes"])
+CALL_TYPES = (
+    "bid", "debate", "eliminate", "protect", "unmask", "vote", "summary",
+    "self_analysis", "peer_analysis", "round_summary",
+)
+
+
+def _http_pool(max_connections: int, max_keepalive: int, timeout: float) -> httpx.Client:
+    return httpx.Client(
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive),
+        timeout=timeout,
+    )
+
+
+class ModelRegistry:
+    """
+    Builds chat clients from `config.AVAILABLE_MODELS` and routes call types to them.
+
+    One client per model name is created lazily and shared by every player and
+    worker thread. All OpenAI-compatible clients share a single pooled HTTP
+    client, so keep-alive connections are reused across models and calls.
+    `routes` maps a call type to a model name; unrouted call types use `default`.
+    Model names missing from the config are treated as OpenAI models with defaults.
+    Each client is registered under its config key (`response_parsing.model_name_of`),
+    so pricing and JSON mode follow the key rather than the provider's model name.
+    "local" models run on CPU through `local_backend`, batched across all games in the process.
+    SDK retries are off: `llm_calls.invoke_llm` retries within the call's timeout and deadline.
+    """
+
+    def __init__(self, default: str, routes: Optional[Dict[str, Optional[str]]] = None,
+                 api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 models: Optional[Dict[str, Dict]] = None, pool: Optional[Dict] = None):
+        self.models = models if models is not None else AVAILABLE_MODELS
+        self.default = default
+        self.routes = {call_type: model for call_type, model in (routes or {}).items() if model}
+        unknown = set(self.routes) - set(CALL_TYPES)
+        if unknown:
+            raise ValueError(f"Unknown call types in model routes: {sorted(unknown)}. Options: {', '.join(CALL_TYPES)}")
+        self.api_key = api_key
+        self.base_url = base_url
+        self._pool_settings = {"max_connections": 64, "max_keepalive": 32, "timeout": 60.0, **(pool or {})}
+        self._pool: Optional[httpx.Client] = None
+        self._clients: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def providers(self):
+        """Providers of the default and routed models."""
+        names = {self.default, *self.routes.values()}
+        return {self.models.get(name, {}).get("provider", "openai") for name in names}
+
+    def model_for(self, call_type: str) -> str:
+        return self.routes.get(call_type, self.default)
+
+    def for_call(self, call_type: Optional[str]):
+        """Client for `call_type` (the default model's client when unrouted)."""
+        return self.client(self.model_for(call_type) if call_type else self.default)
+
+    def client(self, model_name: str):
+        with self._lock:
+            if model_name not in self._clients:
+                client = self._build(model_name)
+                register_model_key(client, model_name)
+                self._clients[model_name] = client
+            return self._clients[model_name]
+
+    def _build(self, model_name: str):
+        cfg = self.models.get(model_name, {"name": model_name, "provider": "openai"})
+        provider = cfg.get("provider", "openai")
+        kwargs = {"temperature": cfg.get("temperature", 0.7)}
+        if cfg.get("max_tokens"):
+            kwargs["max_tokens"] = cfg["max_tokens"]
+        if provider == "openai":
+            from langchain_openai import ChatOpenAI
+            if self._pool is None:
+                self._pool = _http_pool(**self._pool_settings)
+            if self.api_key:
+                kwargs["api_key"] = self.api_key
+            if self.base_url:
+                kwargs["base_url"] = self.base_url
+            return ChatOpenAI(model=cfg.get("name", model_name), stream_usage=True, http_client=self._pool,
+                              max_retries=0, **kwargs)
+        if provider == "google":
+            from langchain_google_genai import ChatGoogleGenerativeAI
+            api_key = os.getenv("GOOGLE_API_KEY")
+            if api_key:
+                kwargs["google_api_key"] = api_key
+            return ChatGoogleGenerativeAI(model=cfg.get("name", model_name), max_retries=0, **kwargs)
+        if provider == "local":
+            from local_backend import LocalChatModel, get_engine
+            engine = get_engine(cfg["model_path"], **cfg.get("batching", {}))
+            return LocalChatModel(model_name=cfg.get("name", model_name), engine=engine, **kwargs)
+        raise ValueError(f"Unsupported provider for {model_name}: {provider}")
+
+    def close(self) -> None:
+        """Close the shared HTTP connection pool."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for the model registry and call-type routing (no API calls).
+"""
+
+import time
+
+import pytest
+
+from config import AVAILABLE_MODELS
+from llm_calls import CallMeter, CallTimeout, call_context, invoke_llm
+from models import ModelRegistry
+from response_parsing import json_mode_kwargs, model_name_of
+from stub_server import StubSettings, start_in_thread
+
+MODELS = {
+    "big": {"name": "gpt-4o", "provider": "openai", "temperature": 0.7},
+    "small": {"name": "gpt-4o-mini", "provider": "openai", "temperature": 0.2},
+}
+
+
+def test_routes_share_clients_and_http_pool():
+    registry = ModelRegistry("big", {"bid": "small", "peer_analysis": "small", "vote": None},
+                             api_key="sk-test", models=MODELS)
+    assert registry.for_call("bid") is registry.for_call("peer_analysis") is registry.client("small")
+    assert registry.for_call("vote") is registry.for_call(None) is registry.client("big")
+    assert registry.client("small").model_name == "gpt-4o-mini"
+    assert registry.client("small").root_client._client is registry.client("big").root_client._client
+    registry.close()
+
+
+def test_unknown_call_type_route_is_rejected():
+    with pytest.raises(ValueError):
+        ModelRegistry("big", {"bidding": "small"}, models=MODELS)
+
+
+def test_routed_gemini_priced_and_json_mode_by_config_key(monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    registry = ModelRegistry("gpt-4o-mini", {"peer_analysis": "gemini-1.5-pro"}, api_key="sk-test")
+    gemini = registry.for_call("peer_analysis")
+    assert gemini.model == "models/gemini-1.5-pro"
+    assert model_name_of(gemini) == "gemini-1.5-pro"
+    assert json_mode_kwargs(gemini, "peer_analysis") == {"response_mime_type": "application/json"}
+
+    prices = {name: cfg["price_per_mtok"] for name, cfg in AVAILABLE_MODELS.items() if cfg.get("price_per_mtok")}
+    meter = CallMeter(price=prices["gpt-4o-mini"], prices=prices)
+    usage = {"prompt_tokens": 1_000_000, "completion_tokens": 0, "cached_tokens": 0}
+    meter.record("peer_analysis", {"model": model_name_of(gemini), "usage": usage})
+    assert meter.totals()["cost_usd"] == AVAILABLE_MODELS["gemini-1.5-pro"]["price_per_mtok"]["input"]
+    registry.close()
+
+
+def test_timed_out_call_ends_at_its_timeout():
+    hanging, hanging_url = start_in_thread(StubSettings(timeout_rate=1.0, hang_seconds=10))
+    failing, failing_url = start_in_thread(StubSettings(error_500=1.0))
+    llm = ModelRegistry("gpt-4o-mini", api_key="sk-test", base_url=hanging_url).client("gpt-4o-mini")
+    meter = CallMeter()
+    with call_context(meter=meter, phase="voting", call_timeouts={"default": 1.0}):
+        started = time.monotonic()
+        with pytest.raises(CallTimeout):
+            invoke_llm(llm, "prompt", "vote")
+        assert time.monotonic() - started < 1.5  # no SDK retries after the timeout
+        # 500s are retried, but only while the backoff fits in the timeout
+        failing_llm = ModelRegistry("gpt-4o-mini", api_key="sk-test", base_url=failing_url).client("gpt-4o-mini")
+        started = time.monotonic()
+        with pytest.raises(Exception):
+            invoke_llm(failing_llm, "prompt", "vote")
+        assert time.monotonic() - started < 1.0
+    assert failing.RequestHandlerClass.state.snapshot()["requests"] == 2
+    assert meter.timeouts()["by_call_type"] == {"vote": 1}
+    for server in (hanging, failing):
+        server.shutdown()
+        server.server_close()
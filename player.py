@@ -1,15 +1,26 @@
 from pydantic import BaseModel, Field
-from typing import Dict, List, Optional, Literal, ClassVar
+from typing import Any, Dict, List, Mapping, Optional, Literal, ClassVar
 import json
-from langchain_openai import ChatOpenAI
+from langchain_core.language_models import BaseChatModel
+from response_parsing import parse_response, json_mode_kwargs, model_name_of
+from llm_calls import CallTimeout, invoke_llm
+from memory import MemoryStore
+from prompts import build_messages, format_dialogue, instruction, player_system_prompt
+from blob_store import log_payload
 
 class Player(BaseModel):
     name: str
     role: Literal["Villager", "Werewolf", "Seer", "Doctor"]
-    llm: ChatOpenAI
+    llm: BaseChatModel  # default model
+    models: Optional[Any] = None  # models.ModelRegistry: per-call-type routing over `llm`
     is_alive: bool = True
-    scratchpad: List[str] = Field(default_factory=list)
+    scratchpad: List[str] = Field(default_factory=list)  # most recent notes only; older ones live in `memory`
     statements: List[str] = Field(default_factory=list)
+    memory: MemoryStore = Field(default_factory=MemoryStore)
+    memory_top_k: int = 5
+    memory_token_budget: int = 150
+    max_scratchpad: int = 50
+    max_statements: int = 20
     suspicions: Dict[str, float] = Field(default_factory=dict)
     investigations: Optional[List[str]] = None
 
@@ -73,15 +84,34 @@ Always follow instructions exactly and output only the requested JSON when asked
         else:
             return f"Unknown role: {self.role}"
 
+    def get_system_prompt(self) -> str:
+        """Stable per-player prefix sent as the system message of every call."""
+        return player_system_prompt(self.get_setup_prompt())
+
+    def build_prompt(self, instruction_text: str, dialogue_history: Optional[str] = None):
+        """
+        Messages for one call: [stable system prefix, dialogue (if any), instruction].
+        The notes from `memory` most relevant to this decision ride along in the
+        instruction, within `memory_token_budget`.
+        """
+        query = instruction_text + " " + (dialogue_history or "")[-400:]
+        notes = self.memory.render(query, self.memory_top_k, self.memory_token_budget)
+        if notes:
+            instruction_text = f"Your private notes (most relevant):\n{notes}\n\n{instruction_text.strip()}"
+        return build_messages(self.get_system_prompt(), dialogue_history, instruction_text)
+
     def add_statement(self, statement: str):
         self.statements.append(statement)
+        del self.statements[:-self.max_statements]
 
-    def add_scratchpad_entry(self, note: str):
+    def add_scratchpad_entry(self, note: str, kind: str = "note"):
         self.scratchpad.append(note)
+        del self.scratchpad[:-self.max_scratchpad]
+        self.memory.add(note, kind)
     
     def _add_observation(self, observation: str):
         """Add an observation to the player's scratchpad."""
-        self.scratchpad.append(observation)
+        self.add_scratchpad_entry(observation, "observation")
 
     def update_suspicion(self, target: str, score: float):
         self.suspicions[target] = score
@@ -91,27 +121,61 @@ Always follow instructions exactly and output only the requested JSON when asked
             self.investigations = []
         self.investigations.append(target)
 
-    def call_model(self, prompt: str, max_tokens: int = 200, timeout: int = 15) -> dict:
+    def llm_for(self, call_type: Optional[str]):
+        """Model for a call type: routed through `models` when set, else `llm`."""
+        return self.models.for_call(call_type) if self.models is not None else self.llm
+
+    def call_model(self, prompt, max_tokens: int = 200, timeout: Optional[float] = None,
+                   call_type: Optional[str] = None, choices: Optional[Dict[str, List[str]]] = None) -> dict:
         """
         Invoke the LLM with both token- and time-limits, expecting JSON output.
-        Truncates output to max_tokens and enforces timeout (seconds).
+        `prompt` is a string or a message list from `build_prompt`.
+        Truncates output to max_tokens and enforces timeout (seconds; default
+        from the call context's `call_timeouts`, cut to the phase deadline).
+        A call that runs out of time returns `{"raw": "", "timed_out": True}`
+        so callers take their usual fallback for an unusable reply.
+        With a `call_type`, provider JSON mode is requested and the reply is
+        validated against that call type's schema (see response_parsing.py);
+        `choices` restricts fields such as "target" to allowed names.
+        When the call context enables streaming, generation stops as soon as a
+        complete, schema-valid object has arrived.
         Returns parsed JSON and always includes raw text and prompt for logging.
         """
-        resp_text = self.llm.invoke(
-            prompt,
-            max_tokens=max_tokens, 
-            timeout=timeout
-        ).content.strip()
-        result: Dict = {}
+        llm = self.llm_for(call_type)
         try:
-            result = json.loads(resp_text)
-        except json.JSONDecodeError:
-            result = {"raw": resp_text}
-        # Always include raw response and prompt for logging
-        result.setdefault("_raw_response", resp_text)
-        result.setdefault("_prompt", prompt)
+            resp_text, call_info = invoke_llm(
+                llm,
+                prompt,
+                call_type or "player",
+                max_tokens=max_tokens, 
+                timeout=timeout,
+                player=self.name,
+                **(json_mode_kwargs(llm, call_type) if call_type else {})
+            )
+        except CallTimeout as e:
+            resp_text, call_info = "", {"elapsed": None, "ttft": None, "complete_object_at": None, "early_stop": False}
+            result = {"raw": "", "timed_out": True, "error": str(e)}
+        else:
+            result = self._parse(resp_text, call_type, model_name_of(llm), choices)
+        # Always include raw response and prompt (or their blob references) for logging
+        for key, value in log_payload(prompt, resp_text, call_type or "player").items():
+            result.setdefault(key, value)
+        result.setdefault("_timing", {k: call_info[k] for k in ("elapsed", "ttft", "complete_object_at", "early_stop")})
         return result
 
+    @staticmethod
+    def _parse(resp_text: str, call_type: Optional[str], model: Optional[str],
+               choices: Optional[Dict[str, List[str]]]) -> Dict:
+        if call_type:
+            result, ok = parse_response(resp_text, call_type, model, choices)
+            if not ok:
+                result["raw"] = resp_text
+            return result
+        try:
+            return json.loads(resp_text)
+        except json.JSONDecodeError:
+            return {"raw": resp_text}
+
     def eliminate(self, alive_players: List[str] = None) -> (str, dict): # type: ignore
         # If no alive_players provided, use a default list (this should be passed from game state)
         if alive_players is None:
@@ -124,23 +188,9 @@ Always follow instructions exactly and output only the requested JSON when asked
             # If no valid targets, return empty string
             return "", {"error": "No valid targets available"}
         
-        prompt = f"""
-You are {self.name} ({self.role}). Your sole objective is to win for your faction.
-It is night. Choose exactly one player to eliminate from these alive players: {', '.join(available_targets)}.
-Be decisive and strategic; avoid niceties and hedging.
-
-Available targets: {available_targets}
-
-Respond with ONLY a single JSON object using these exact keys and constraints:
-{{
-  "target": "one name from this allowed list: {available_targets}",
-  "is_deceptive": true/false,
-  "analysis": "private, terse rationale (<=20 words)"
-}}
-
-IMPORTANT: The "target" must be exactly one of the available player names: {available_targets}
-"""
-        result = self.call_model(prompt, max_tokens=300)
+        prompt = self.build_prompt(instruction("eliminate", targets=", ".join(available_targets)))
+        result = self.call_model(prompt, max_tokens=300, call_type="eliminate",
+                                 choices={"target": available_targets})
         target = result.get("target", "")
         
         # Validate that the target is actually in the available targets
@@ -159,7 +209,7 @@ IMPORTANT: The "target" must be exactly one of the available player names: {avai
                 result["target"] = target
                 result["fallback"] = "Used first available target due to invalid response"
         
-        self.scratchpad.append(result.get("analysis", ""))
+        self.add_scratchpad_entry(result.get("analysis", ""))
         return target, result
 
     def save(self, alive_players: List[str] = None) -> (str, dict): # type: ignore
@@ -167,22 +217,9 @@ IMPORTANT: The "target" must be exactly one of the available player names: {avai
         if alive_players is None:
             alive_players = ["Alice", "Bob", "Charlie"]  # Default fallback
         
-        prompt = f"""
-You are {self.name} ({self.role}). Your sole objective is to win for your faction.
-It is night. Choose exactly one player to protect from elimination.
-Allowed players to protect: {', '.join(alive_players)}
-Be decisive and strategic; avoid niceties and hedging.
-
-Respond with ONLY a single JSON object using these exact keys and constraints:
-{{
-  "target": "one name from this allowed list: {alive_players}",
-  "is_deceptive": true/false,
-  "analysis": "private, terse rationale (<=20 words)"
-}}
-
-No extra text, no markdown, no code fences.
-"""
-        result = self.call_model(prompt, max_tokens=300)
+        prompt = self.build_prompt(instruction("protect", targets=", ".join(alive_players)))
+        result = self.call_model(prompt, max_tokens=300, call_type="protect",
+                                 choices={"target": alive_players})
         target = result.get("target", "")
         
         # Validate that the target is actually in the available players
@@ -201,7 +238,7 @@ No extra text, no markdown, no code fences.
                 result["target"] = target
                 result["fallback"] = "Used first available player due to invalid response"
         
-        self.scratchpad.append(result.get("analysis", ""))
+        self.add_scratchpad_entry(result.get("analysis", ""))
         return target, result
 
     def unmask(self, alive_players: List[str] = None) -> (str, dict): # type: ignore
@@ -216,21 +253,9 @@ No extra text, no markdown, no code fences.
             # If no valid targets, return empty string
             return "", {"error": "No valid targets available"}
         
-        prompt = f"""
-You are {self.name} ({self.role}). Your sole objective is to win for your faction.
-It is night. Choose exactly one player to unmask (privately reveal their role to yourself).
-Allowed players to unmask: {', '.join(available_targets)}
-Be decisive and strategic; avoid niceties and hedging.
-
-Respond in JSON format with these exact keys:
-{{
-  "target": "name of player to unmask (must be one of the available players, one word)",
-  "is_deceptive": true/false,
-  "analysis": "your private reasoning for this choice (max 15-20 words)"
-}}
-No extra text, no markdown, no code fences.
-"""
-        result = self.call_model(prompt, max_tokens=300)
+        prompt = self.build_prompt(instruction("unmask", targets=", ".join(available_targets)))
+        result = self.call_model(prompt, max_tokens=300, call_type="unmask",
+                                 choices={"target": available_targets})
         target = result.get("target", "")
         
         # Validate that the target is actually in the available players
@@ -246,35 +271,18 @@ No extra text, no markdown, no code fences.
                 result["target"] = target
                 result["fallback"] = "Used first available player due to invalid response"
         
-        self.scratchpad.append(result.get("analysis", ""))
+        self.add_scratchpad_entry(result.get("analysis", ""))
         return target, result
 
     def reveal_and_update(self, target: str, role: str):
         self.record_investigation(target)
-        self.scratchpad.append(f"Discovered {target} is a {role}.")
-
-    def debate(self, dialogue_history: List[List[str]]) -> (str, dict): # type: ignore
-        history = "\n".join([f"{s}: {t}" for s, t in dialogue_history])
-        
-        # Add context about the game state
-        context = f"You are {self.name} ({self.role}). This is a werewolf game where villagers try to find werewolves and werewolves try to blend in. Your sole objective is to win for your faction. Be assertive and competitive. Avoid hedging or niceties."        
-        prompt = f"""
-{context}
-
-Dialogue history so far:
-{history if history else "No previous dialogue."}
+        self.add_scratchpad_entry(f"Discovered {target} is a {role}.", "investigation")
 
-You must contribute to the debate with a strong, actionable accusation or defense.
-Respond with ONLY a single JSON object using these exact keys and constraints:
-{{
-  "statement": "a natural, decisive line (<=20 words) that advances your win condition",
-  "is_deceptive": true/false,
-  "analysis": "your private, terse reasoning (<=20 words)"
-}}
-
-No extra text, no markdown, no code fences.
-"""
-        result = self.call_model(prompt, max_tokens=400)
+    def debate(self, dialogue_history) -> (str, dict): # type: ignore
+        # Rendered transcript (str) or raw [[speaker, text]] log
+        history = dialogue_history if isinstance(dialogue_history, str) else format_dialogue(dialogue_history)
+        prompt = self.build_prompt(instruction("debate"), history)
+        result = self.call_model(prompt, max_tokens=400, call_type="debate")
         statement = result.get("statement", "")
         
         # If no valid statement, provide a fallback
@@ -295,12 +303,12 @@ No extra text, no markdown, no code fences.
                 result["statement"] = statement
                 result["fallback"] = "Used generic statement due to invalid response"
         
-        self.scratchpad.append(result.get("analysis", ""))
-        self.statements.append(statement)
+        self.add_scratchpad_entry(result.get("analysis", ""))
+        self.add_statement(statement)
         return statement, result
 
     
-    def get_deception_perception(self, other_player: str, deception_scores: Dict[str, Dict[str, float]]) -> float:
+    def get_deception_perception(self, other_player: str, deception_scores: Mapping[str, Dict[str, float]]) -> float:
         """
         Get this player's perception of another player's deceptiveness.
         
@@ -315,7 +323,17 @@ No extra text, no markdown, no code fences.
             return deception_scores[self.name][other_player]
         return 0.5  # Default neutral perception
 
-    def vote(self, deception_scores: Dict[str, Dict[str, float]] = None) -> (str, dict): # type: ignore
+    def vote(self, deception_scores: Mapping[str, Dict[str, float]] = None,
+             dialogue_history: Optional[str] = None, alive_players: List[str] = None) -> (str, dict): # type: ignore
+        # If no alive_players provided, use a default list (this should be passed from game state)
+        if alive_players is None:
+            alive_players = ["Alice", "Bob", "Charlie"]  # Default fallback
+
+        # Remove self from the list of potential targets
+        available_targets = [p for p in alive_players if p != self.name]
+        if not available_targets:
+            return "", {"error": "No valid targets available"}
+
         # Include deception perception in voting decision
         deception_info = ""
         if deception_scores and self.name in deception_scores:
@@ -328,40 +346,34 @@ No extra text, no markdown, no code fences.
             
             if deception_perceptions:
                 deception_info = f"\nYour deception perceptions: {'; '.join(deception_perceptions)}"
-        prompt = f"""
-You are {self.name} ({self.role}). Your sole objective is to win for your faction.
-Based on the debate and observations, cast a decisive vote for who you think should be exiled.{deception_info}
-
-Respond with ONLY a single JSON object using these exact keys and constraints:
-{{
-  "vote": "name of one player you vote to exile (one word)",
-  "is_deceptive": true/false,
-  "analysis": "private, terse rationale (<=20 words)",
-  "reasoning": "brief public explanation (<=20 words)"
-}}
-No extra text, no markdown, no code fences.
-"""
-        result = self.call_model(prompt)
+        prompt = self.build_prompt(
+            instruction("vote", deception_info=deception_info, targets=", ".join(available_targets)), dialogue_history)
+        result = self.call_model(prompt, call_type="vote", choices={"vote": available_targets})
         vote_choice = result.get("vote", "")
-        self.scratchpad.append(result.get("analysis", ""))
-        return vote_choice, result
 
-    def summarize(self) -> (str, dict): # type: ignore
-        prompt = f"""
-You are {self.name} ({self.role}). Summarize the outcome and your rationale.
-Be concise and objective. Maintain a competitive, outcome-driven reflection.
+        # Validate that the vote names an alive player other than the voter
+        if vote_choice not in available_targets:
+            # If invalid vote, try to extract a valid name from the response
+            if "raw" in result:
+                for player in available_targets:
+                    if player in result["raw"]:
+                        vote_choice = player
+                        break
 
-Respond with ONLY a single JSON object using these exact keys and constraints:
-{{
-  "summary": "brief recap of the game",
-  "is_deceptive": true/false,
-  "analysis": "private reflection (<=30 words)"
-}}
-No extra text, no markdown, no code fences.
-"""
-        result = self.call_model(prompt)
+            # If still no valid vote, vote for the player this player suspects most
+            if vote_choice not in available_targets:
+                vote_choice = max(available_targets, key=lambda p: self.get_deception_perception(p, deception_scores or {}))
+                result["vote"] = vote_choice
+                result["fallback"] = "Voted for the most suspected player due to invalid response"
+
+        self.add_scratchpad_entry(result.get("analysis", ""))
+        return vote_choice, result
+
+    def summarize(self, dialogue_history: Optional[str] = None) -> (str, dict): # type: ignore
+        prompt = self.build_prompt(instruction("summary"), dialogue_history)
+        result = self.call_model(prompt, call_type="summary")
         summary = result.get("summary", "")
-        self.scratchpad.append(result.get("analysis", ""))
+        self.add_scratchpad_entry(result.get("analysis", ""))
         return summary, result
 
     def __repr__(self):
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Tests for the stable-prefix prompt layout (no LLM calls).
+"""
+
+from prompts import ANALYST_SYSTEM_PROMPT, BID_SYSTEM_PROMPT, build_messages, instruction, render_messages
+from player import Player
+
+class NoLLM:
+    """Placeholder; these tests never call the model."""
+
+def test_player_prefix_is_stable_and_dynamic_parts_come_last():
+    player = Player.model_construct(name="Alice", role="Seer", llm=NoLLM())
+    first = player.build_prompt(instruction("unmask", targets="Bob, Raj"))
+    second = player.build_prompt(instruction("vote", deception_info="", targets="Bob, Raj"), "Bob: hi")
+    assert first[0].content == second[0].content
+    assert "Alice, the Seer" in first[0].content
+    assert '"vote"' in first[0].content and '"eliminate"' in first[0].content
+    assert "Bob, Raj" in first[-1].content and "Bob, Raj" not in first[0].content
+    assert second[1].content.endswith("Bob: hi")
+
+def test_shared_prefixes_do_not_name_players():
+    for name in ("Alice", "Bob"):
+        assert name not in ANALYST_SYSTEM_PROMPT
+        assert name not in BID_SYSTEM_PROMPT
+    a = build_messages(BID_SYSTEM_PROMPT, "Bob: hi", instruction("bid", player_name="Alice"))
+    b = build_messages(BID_SYSTEM_PROMPT, "Bob: hi", instruction("bid", player_name="Raj"))
+    assert [m.content for m in a[:2]] == [m.content for m in b[:2]]
+    assert "[system]" in render_messages(a)
+
+def test_vote_must_name_an_alive_other_player():
+    class HallucinatingLLM:
+        def invoke(self, prompt, **kwargs):
+            self.prompt = prompt
+            return type("Message", (), {"content": '{"vote": "Zed", "is_deceptive": false, "analysis": "a", '
+                                                   '"reasoning": "r"}', "usage_metadata": None})()
+
+    llm = HallucinatingLLM()
+    player = Player.model_construct(name="Alice", role="Villager", llm=llm)
+    vote, log = player.vote({"Alice": {"Bob": 0.2, "Raj": 0.9}}, "Bob: hi", ["Alice", "Bob", "Raj"])
+    assert "exactly one of: Bob, Raj" in llm.prompt[-1].content
+    assert vote == "Raj" and log["vote"] == "Raj" and "fallback" in log
+    assert "not in ['Bob', 'Raj']" in log["_parse_error"]
+
+if __name__ == "__main__":
+    test_player_prefix_is_stable_and_dynamic_parts_come_last()
+    test_shared_prefixes_do_not_name_players()
+    test_vote_must_name_an_alive_other_player()
+    print("Prompt layout tests passed")
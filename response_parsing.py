@@ -0,0 +1,317 @@
+import json
+import threading
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+# Per-call-type response schemas: field -> kind. Every field listed is required
+# unless it has an entry in DEFAULTS.
+#   str: non-empty string, bool: true/false, flag: 0/1, unit: float clamped to [0, 1],
+#   a tuple: one of the listed string values
+# "unknown": deceptive, kind not determined (pre-classifier labels; prompts do not offer it)
+DECEPTION_TYPES = ("none", "omission", "distortion", "fabrication", "misdirection", "unknown")
+
+SCHEMAS: Dict[str, Dict] = {
+    "eliminate": {"target": "str", "is_deceptive": "bool", "analysis": "str"},
+    "protect": {"target": "str", "is_deceptive": "bool", "analysis": "str"},
+    "unmask": {"target": "str", "is_deceptive": "bool", "analysis": "str"},
+    "debate": {"statement": "str", "is_deceptive": "bool", "analysis": "str"},
+    "vote": {"vote": "str", "is_deceptive": "bool", "analysis": "str", "reasoning": "str"},
+    "summary": {"summary": "str", "is_deceptive": "bool", "analysis": "str"},
+    "self_analysis": {
+        "chain_of_thought": "str", "is_deceptive": "flag", "confidence": "unit",
+        "deception_type": DECEPTION_TYPES, "reasoning": "str",
+    },
+    "peer_analysis": {
+        "chain_of_thought": "str", "is_deceptive": "flag", "confidence": "unit",
+        "deception_type": DECEPTION_TYPES, "reasoning": "str", "suspicion_level": "unit",
+    },
+}
+
+# Fields whose value is used in place of a missing or unusable one, so a reply
+# with good labels is kept even if its free text is empty or its type unknown
+_ANALYSIS_DEFAULTS = {"chain_of_thought": "", "confidence": 0.5, "deception_type": "none", "reasoning": ""}
+DEFAULTS: Dict[str, Dict] = {
+    "self_analysis": _ANALYSIS_DEFAULTS,
+    "peer_analysis": _ANALYSIS_DEFAULTS,
+}
+
+# How each model family is asked for JSON; see `AVAILABLE_MODELS[...]["json_mode"]` in config.py
+JSON_MODES = ("json_schema", "json_object", "mime", "off")
+
+_STATS_LOCK = threading.Lock()
+_PARSE_STATS: Dict[str, Dict[str, Dict[str, int]]] = {}  # {model: {call_type: counters}}
+
+
+def extract_json(text: str) -> Tuple[Optional[Dict], bool]:
+    """
+    Return the first balanced JSON object in `text` and whether it had to be
+    dug out of surrounding prose/code fences (False means the text was pure JSON).
+
+    Single left-to-right scan tracking brace depth and string/escape state, so
+    braces inside string values do not confuse it.
+    """
+    if not text:
+        return None, False
+    start = text.find("{")
+    while start != -1:
+        depth = 0
+        in_string = False
+        escaped = False
+        for i in range(start, len(text)):
+            ch = text[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = True
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    try:
+                        obj = json.loads(text[start:i + 1])
+                    except json.JSONDecodeError:
+                        break
+                    if isinstance(obj, dict):
+                        return obj, text[:start].strip() != "" or text[i + 1:].strip() != ""
+                    break
+        else:
+            return None, False  # unbalanced to the end of the text: truncated output
+        start = text.find("{", start + 1)
+    return None, False
+
+
+class JSONStreamScanner:
+    """
+    Incremental version of `extract_json` for token streams: feed chunks and
+    get back the text of the first complete top-level JSON object as soon as
+    its closing brace arrives (None until then).
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> Optional[str]:
+        offset = len(self._text)
+        self._text += chunk
+        for i in range(offset, len(self._text)):
+            ch = self._text[i]
+            if self._start == -1:
+                if ch == "{":
+                    self._start, self._depth = i, 1
+                continue
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    candidate = self._text[self._start:i + 1]
+                    self._start = -1
+                    try:
+                        if isinstance(json.loads(candidate), dict):
+                            return candidate
+                    except json.JSONDecodeError:
+                        pass
+        return None
+
+
+def _coerce(kind, value):
+    if kind == "str":
+        if value is None:
+            raise ValueError("missing")
+        value = str(value).strip()
+        if not value:
+            raise ValueError("empty")
+        return value
+    if kind in ("bool", "flag"):
+        if isinstance(value, str):
+            lowered = value.strip().lower()
+            if lowered in ("true", "yes", "1"):
+                value = True
+            elif lowered in ("false", "no", "0"):
+                value = False
+            else:
+                raise ValueError(f"not a boolean: {value!r}")
+        truth = bool(value)
+        return (1 if truth else 0) if kind == "flag" else truth
+    if kind == "unit":
+        return max(0.0, min(1.0, float(value)))
+    if isinstance(kind, tuple):
+        lowered = str(value).strip().lower()
+        if lowered not in kind:
+            raise ValueError(f"not one of {kind}: {value!r}")
+        return lowered
+    raise ValueError(f"unknown schema kind {kind!r}")
+
+
+def validate(obj: Dict, call_type: str, choices: Optional[Dict[str, List[str]]] = None) -> Tuple[Dict, List[str]]:
+    """
+    Coerce `obj` in place against the schema for `call_type`.
+
+    `choices` restricts string fields to an allowed list (e.g. alive targets);
+    matching is case-insensitive and the canonical spelling is written back.
+    Fields with an entry in DEFAULTS never fail: a missing or unusable value
+    is replaced by the default. Returns the object and a list of field errors
+    (empty when valid).
+    """
+    errors = []
+    defaults = DEFAULTS.get(call_type, {})
+    for field, kind in SCHEMAS.get(call_type, {}).items():
+        if field not in obj:
+            if field in defaults:
+                obj[field] = defaults[field]
+            else:
+                errors.append(f"{field}: missing")
+            continue
+        try:
+            obj[field] = _coerce(kind, obj[field])
+        except (TypeError, ValueError) as e:
+            if field in defaults:
+                obj[field] = defaults[field]
+            else:
+                errors.append(f"{field}: {e}")
+    for field, allowed in (choices or {}).items():
+        if field not in obj:
+            continue
+        by_lower = {a.lower(): a for a in allowed}
+        canonical = by_lower.get(str(obj[field]).strip().lower())
+        if canonical is None:
+            errors.append(f"{field}: {obj[field]!r} not in {allowed}")
+        else:
+            obj[field] = canonical
+    return obj, errors
+
+
+def count_parse(stats: Dict[str, Dict[str, Dict[str, int]]], model: Optional[str], call_type: str,
+                ok: bool, recovered: bool) -> None:
+    """Add one parse outcome to `stats` ({model: {call_type: counters}}); the caller holds its lock."""
+    stat = stats.setdefault(model or "unknown", {}).setdefault(
+        call_type, {"calls": 0, "failures": 0, "recovered": 0})
+    stat["calls"] += 1
+    if not ok:
+        stat["failures"] += 1
+    elif recovered:
+        stat["recovered"] += 1
+
+
+def _record(model: str, call_type: str, ok: bool, recovered: bool) -> None:
+    with _STATS_LOCK:
+        count_parse(_PARSE_STATS, model, call_type, ok, recovered)
+    # Also per game, on the call context's meter (concurrent games share this process)
+    from llm_calls import current_call_context
+    meter = current_call_context().get("meter")
+    if meter is not None:
+        meter.record_parse(model, call_type, ok, recovered)
+
+
+def parse_response(text: str, call_type: str, model: Optional[str] = None,
+                   choices: Optional[Dict[str, List[str]]] = None) -> Tuple[Dict, bool]:
+    """
+    Parse a model reply for `call_type`.
+
+    Returns (result, ok). On success `result` is the validated object; on
+    failure it is whatever could be extracted (possibly empty) plus
+    `_parse_error`. Outcomes are counted per model and call type, process-wide
+    and on the call context's `meter` (one per game).
+    """
+    obj, recovered = extract_json(text)
+    if obj is None:
+        _record(model, call_type, False, False)
+        return {"_parse_error": "no JSON object found"}, False
+    obj, errors = validate(obj, call_type, choices)
+    ok = not errors
+    _record(model, call_type, ok, recovered)
+    if not ok:
+        obj["_parse_error"] = "; ".join(errors)
+    return obj, ok
+
+
+def parse_stats() -> Dict[str, Dict[str, Dict[str, int]]]:
+    """Snapshot of process-wide parse counters: {model: {call_type: {calls, failures, recovered}}}."""
+    with _STATS_LOCK:
+        return json.loads(json.dumps(_PARSE_STATS))
+
+
+def reset_parse_stats() -> None:
+    with _STATS_LOCK:
+        _PARSE_STATS.clear()
+
+
+# id(client) -> config.AVAILABLE_MODELS key, for clients built by models.ModelRegistry
+_MODEL_KEYS: Dict[int, str] = {}
+
+
+def register_model_key(llm, key: str) -> None:
+    """Record the AVAILABLE_MODELS key a client was built from (dropped when the client is collected)."""
+    _MODEL_KEYS[id(llm)] = key
+    weakref.finalize(llm, _MODEL_KEYS.pop, id(llm), None)
+
+
+def model_name_of(llm) -> Optional[str]:
+    """
+    The AVAILABLE_MODELS key of a registry-built client, else the client's own
+    model name. Providers may report another name (Gemini clients say
+    "models/gemini-1.5-pro"), so prices and JSON modes are looked up by the key.
+    """
+    return _MODEL_KEYS.get(id(llm)) or getattr(llm, "model_name", None) or getattr(llm, "model", None)
+
+
+def json_schema_for(call_type: str) -> Dict:
+    """JSON Schema (strict-mode compatible) for a call type, for providers that accept one."""
+    props = {}
+    for field, kind in SCHEMAS[call_type].items():
+        if kind == "str":
+            props[field] = {"type": "string"}
+        elif kind == "bool":
+            props[field] = {"type": "boolean"}
+        elif kind == "flag":
+            props[field] = {"type": "integer", "enum": [0, 1]}
+        elif kind == "unit":
+            props[field] = {"type": "number"}
+        else:
+            props[field] = {"type": "string", "enum": list(kind)}
+    return {
+        "type": "object",
+        "properties": props,
+        "required": list(props),
+        "additionalProperties": False,
+    }
+
+
+def json_mode_kwargs(llm, call_type: str) -> Dict:
+    """
+    Invoke kwargs that ask the provider for JSON output, based on the model's
+    `json_mode` in config.AVAILABLE_MODELS (json_schema / json_object / mime / off).
+    """
+    from config import AVAILABLE_MODELS
+
+    model_cfg = AVAILABLE_MODELS.get(model_name_of(llm) or "", {})
+    mode = model_cfg.get("json_mode", "off")
+    if mode == "json_schema" and call_type in SCHEMAS:
+        return {"response_format": {
+            "type": "json_schema",
+            "json_schema": {"name": call_type, "schema": json_schema_for(call_type), "strict": True},
+        }}
+    if mode in ("json_object", "json_schema"):
+        return {"response_format": {"type": "json_object"}}
+    if mode == "mime":
+        return {"response_mime_type": "application/json"}
+    return {}
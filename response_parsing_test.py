@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared response-parsing layer (no LLM calls).
+"""
+
+import json
+
+from response_parsing import JSONStreamScanner, extract_json, parse_response, parse_stats, reset_parse_stats, json_schema_for, validate
+
+def test_extract_json_pure_and_chatty():
+    obj, recovered = extract_json('{"a": 1}')
+    assert obj == {"a": 1} and recovered is False
+
+    chatty = 'Sure! Here you go:\n```json\n{"statement": "Bob {lies}", "n": {"x": 2}}\n```\nAnything else?'
+    obj, recovered = extract_json(chatty)
+    assert obj == {"statement": "Bob {lies}", "n": {"x": 2}}
+    assert recovered is True
+
+def test_extract_json_skips_invalid_and_truncated():
+    obj, _ = extract_json("{not json} then {\"ok\": true}")
+    assert obj == {"ok": True}
+    assert extract_json('{"statement": "cut off')[0] is None
+    assert extract_json("no braces here")[0] is None
+
+def test_validate_coerces_and_restricts_choices():
+    obj, errors = validate({"target": "bob", "is_deceptive": "false", "analysis": "x"}, "eliminate",
+                           choices={"target": ["Alice", "Bob"]})
+    assert errors == []
+    assert obj["target"] == "Bob" and obj["is_deceptive"] is False
+
+    obj, errors = validate({"chain_of_thought": "c", "is_deceptive": True, "confidence": 3,
+                            "deception_type": "Omission", "reasoning": "r", "suspicion_level": "0.4"}, "peer_analysis")
+    assert errors == []
+    assert obj["is_deceptive"] == 1 and obj["confidence"] == 1.0 and obj["deception_type"] == "omission"
+
+    _, errors = validate({"target": "Zed", "is_deceptive": True}, "eliminate", choices={"target": ["Alice"]})
+    assert any(e.startswith("analysis") for e in errors)
+    assert any(e.startswith("target") for e in errors)
+
+def test_analysis_defaults_keep_labels():
+    obj, ok = parse_response(json.dumps({"chain_of_thought": "", "is_deceptive": 1, "deception_type": "lie",
+                                         "suspicion_level": 0.9}), "peer_analysis")
+    assert ok
+    assert obj["is_deceptive"] == 1 and obj["suspicion_level"] == 0.9
+    assert obj["deception_type"] == "none" and obj["chain_of_thought"] == "" and obj["confidence"] == 0.5
+
+    _, errors = validate({"is_deceptive": 1, "reasoning": "r"}, "peer_analysis")
+    assert errors == ["suspicion_level: missing"]
+
+def test_parse_failures_counted_per_model():
+    reset_parse_stats()
+    parse_response('{"summary": "s", "is_deceptive": false, "analysis": "a"}', "summary", "m1")
+    parse_response('Result: {"summary": "s", "is_deceptive": false, "analysis": "a"}', "summary", "m1")
+    result, ok = parse_response("I refuse", "summary", "m1")
+    assert not ok and "_parse_error" in result
+    assert parse_stats()["m1"]["summary"] == {"calls": 3, "failures": 1, "recovered": 1}
+
+def test_json_schema_is_strict():
+    schema = json_schema_for("vote")
+    assert schema["additionalProperties"] is False
+    assert set(schema["required"]) == {"vote", "is_deceptive", "analysis", "reasoning"}
+
+def test_stream_scanner_completes_on_closing_brace():
+    scanner = JSONStreamScanner()
+    chunks = ['Here: {"a": "x}', '", "b": {"c"', ': 1}', '} and more text', ' {"d": 2}']
+    results = [scanner.feed(c) for c in chunks]
+    assert results[:3] == [None, None, None]
+    assert results[3] == '{"a": "x}", "b": {"c": 1}}'
+
+if __name__ == "__main__":
+    test_extract_json_pure_and_chatty()
+    test_extract_json_skips_invalid_and_truncated()
+    test_validate_coerces_and_restricts_choices()
+    test_parse_failures_counted_per_model()
+    test_json_schema_is_strict()
+    test_stream_scanner_completes_on_closing_brace()
+    print("Response parsing tests passed")
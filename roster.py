@@ -0,0 +1,48 @@
+import random
+from typing import Dict, List, Optional, Sequence, Tuple
+
+ROLES = ("Villager", "Werewolf", "Seer", "Doctor")
+
+
+def player_names(num_players: int, base_names: Sequence[str] = ()) -> List[str]:
+    """`num_players` unique names: `base_names` first, then Player<N> for the rest."""
+    names = list(dict.fromkeys(base_names))[:num_players]
+    n = 1
+    while len(names) < num_players:
+        candidate = f"Player{n}"
+        if candidate not in names:
+            names.append(candidate)
+        n += 1
+    return names
+
+
+def make_roster(num_players: int, role_counts: Dict[str, int], base_names: Sequence[str] = (),
+                seed: Optional[int] = None) -> Tuple[List[str], Dict[str, str]]:
+    """
+    Players and a shuffled role assignment. `role_counts` gives the number of
+    Werewolves, Seers and Doctors; everyone else is a Villager. The same seed
+    always yields the same roster.
+    """
+    unknown = set(role_counts) - set(ROLES)
+    if unknown:
+        raise ValueError(f"Unknown roles: {sorted(unknown)}")
+    special = sum(count for role, count in role_counts.items() if role != "Villager")
+    if role_counts.get("Werewolf", 0) < 1:
+        raise ValueError("At least one Werewolf is required")
+    if special > num_players:
+        raise ValueError(f"{special} special roles do not fit in {num_players} players")
+
+    players = player_names(num_players, base_names)
+    deck = [role for role in ("Werewolf", "Seer", "Doctor") for _ in range(role_counts.get(role, 0))]
+    deck += ["Villager"] * (num_players - len(deck))
+    random.Random(seed).shuffle(deck)
+    return players, dict(zip(players, deck))
+
+
+def parse_role_counts(spec: str) -> Dict[str, int]:
+    """Parse "Werewolf=3,Seer=2,Doctor=1" (CLI form) into role counts."""
+    counts = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        role, _, count = part.partition("=")
+        counts[role.strip()] = int(count)
+    return counts
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Tests for roster generation and role assignment (no LLM calls).
+"""
+
+from collections import Counter
+
+import pytest
+
+from roster import make_roster, parse_role_counts, player_names
+
+
+def test_player_names_fill_with_numbered_players():
+    assert player_names(2, ["Alice", "Bob", "Raj"]) == ["Alice", "Bob"]
+    assert player_names(4, ["Alice", "Bob"]) == ["Alice", "Bob", "Player1", "Player2"]
+    assert len(set(player_names(100, ["Alice"]))) == 100
+
+
+def test_roles_match_counts_and_seed_is_reproducible():
+    counts = {"Werewolf": 10, "Seer": 3, "Doctor": 2}
+    players, roles = make_roster(50, counts, seed=11)
+    assert len(players) == 50 and set(roles) == set(players)
+    assert Counter(roles.values()) == {"Werewolf": 10, "Seer": 3, "Doctor": 2, "Villager": 35}
+    assert make_roster(50, counts, seed=11) == (players, roles)
+    assert make_roster(50, counts, seed=12)[1] != roles
+
+
+def test_invalid_role_counts_are_rejected():
+    with pytest.raises(ValueError):
+        make_roster(4, {"Werewolf": 3, "Seer": 2})
+    with pytest.raises(ValueError):
+        make_roster(8, {"Seer": 1})
+    with pytest.raises(ValueError):
+        make_roster(8, {"Werewolf": 2, "Hunter": 1})
+
+
+def test_parse_role_counts():
+    assert parse_role_counts("Werewolf=3, Seer=2,Doctor=1") == {"Werewolf": 3, "Seer": 2, "Doctor": 1}
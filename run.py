@@ -1,58 +1,141 @@
 from game_graph import graph, GameState  
 from player import Player             
-from langchain_openai import ChatOpenAI
 import os
+import random
 import argparse
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Optional
 from dotenv import load_dotenv
-from logs import init_logging_state, write_final_state, print_header, print_subheader, print_kv, write_final_metrics
+from logs import (init_logging_state, write_final_state, print_header, print_subheader, print_kv, write_final_metrics,
+                  update_run_meta, batch_usage)
+from Bidding import make_bid_strategy, rule_based_bid, BID_STRATEGIES
+from deception_classifier import DeceptionPreClassifier
+from deception_detection import ScoreMatrix
+from llm_calls import BudgetExceeded, CallMeter
+from blob_store import BlobStore
+from transcript import DebateTranscript, extractive_summary, make_llm_summarizer
+from debate_control import DebateController
+from degradation import DegradationPolicy
+from config import AVAILABLE_MODELS, GAME_CONFIG
+from roster import make_roster, parse_role_counts
+from models import ModelRegistry
+from scheduler import shared_scheduler
+from live_events import EventHub, serve_sse, stream_graph, write_ndjson
 
 load_dotenv()
 
 api_key = os.getenv("OPENAI_API_KEY")
 
 
-def get_llm(model_name="gpt-4o", api_key=None):
-    """Initialize the language model with configurable parameters."""
+def make_models(model_name="gpt-4o", api_key=None, base_url=None) -> ModelRegistry:
+    """
+    Model registry for a run: `model_name` by default, GAME_CONFIG["model_routes"] per call type.
+    `base_url` points OpenAI-compatible clients at another endpoint (e.g. stub_server.py).
+    """
+    if base_url and not api_key and not os.environ.get("OPENAI_API_KEY"):
+        api_key = "not-needed"  # local endpoints ignore the key, but the client requires one
+    models = ModelRegistry(model_name, GAME_CONFIG["model_routes"], api_key=api_key, base_url=base_url,
+                           pool=GAME_CONFIG["http_pool"])
     if api_key:
         os.environ["OPENAI_API_KEY"] = api_key
-    elif not os.environ.get("OPENAI_API_KEY"):
+    elif "openai" in models.providers() and not os.environ.get("OPENAI_API_KEY"):
         raise ValueError("OPENAI_API_KEY environment variable not set and no API key provided")
     os.environ["MODEL_NAME"] = model_name
-    
-    return ChatOpenAI(
-        model=model_name,
-        temperature=0.7
-    )
+    return models
 
 
-def run_werewolf_game(model_name="gpt-4o", api_key=None, log_dir: str = "./logs", enable_file_logging: bool = True):
+def run_werewolf_game(model_name="gpt-4o", api_key=None, base_url: Optional[str] = None, log_dir: str = "./logs", enable_file_logging: bool = True,
+                      bid_strategy: str = GAME_CONFIG["bid_strategy"],
+                      bid_shortlist: Optional[int] = GAME_CONFIG["bid_shortlist"],
+                      adaptive_debate: bool = GAME_CONFIG["adaptive_debate"],
+                      degradation: bool = GAME_CONFIG["degradation"],
+                      phase_deadlines: Optional[Dict[str, Optional[float]]] = GAME_CONFIG["phase_deadlines"],
+                      scheduler: bool = GAME_CONFIG["scheduler"],
+                      event_hub: Optional[EventHub] = None,
+                      deception_preclassifier: bool = GAME_CONFIG["deception_preclassifier"],
+                      preclassifier_band=GAME_CONFIG["preclassifier_band"],
+                      stream_responses: bool = GAME_CONFIG["stream_responses"],
+                      transcript_token_budget: int = GAME_CONFIG["transcript_token_budget"],
+                      blob_store: bool = GAME_CONFIG["blob_store"],
+                      run_catalog: bool = GAME_CONFIG["run_catalog"],
+                      num_players: int = GAME_CONFIG["num_players"],
+                      role_counts: Dict[str, int] = GAME_CONFIG["role_counts"],
+                      role_seed: Optional[int] = GAME_CONFIG["role_seed"],
+                      token_budget: Optional[int] = GAME_CONFIG["budget"]["game_tokens"],
+                      cost_budget: Optional[float] = GAME_CONFIG["budget"]["game_cost_usd"],
+                      batch: Optional[str] = None,
+                      batch_token_budget: Optional[int] = GAME_CONFIG["budget"]["batch_tokens"],
+                      batch_cost_budget: Optional[float] = GAME_CONFIG["budget"]["batch_cost_usd"]):
     """Run a werewolf game with the specified model."""
     print_header("Starting Werewolf Game")
     print_kv("Model", model_name)
+    if base_url:
+        print_kv("Base URL", base_url)
+    print_kv("Bid strategy", bid_strategy)
+    if bid_shortlist:
+        print_kv("Bid shortlist", bid_shortlist)
+    print_kv("Streaming", stream_responses)
     
-    # Initialize the language model
-    llm = get_llm(model_name, api_key)
+    # Token/cost budgets: the game's own caps, tightened by what is left of its batch
+    if batch:
+        # Batch usage is read from the run catalog, so runs of a batch are always cataloged
+        run_catalog = True
+        used = batch_usage(log_dir, batch)
+        if batch_token_budget is not None:
+            left = batch_token_budget - used["tokens"]
+            token_budget = left if token_budget is None else min(token_budget, left)
+        if batch_cost_budget is not None:
+            left = batch_cost_budget - used["cost_usd"]
+            cost_budget = left if cost_budget is None else min(cost_budget, left)
+        print_kv("Batch", f"{batch} ({used['runs']} earlier runs, {used['tokens']} tokens, ${used['cost_usd']:.4f})")
+    if (token_budget is not None and token_budget <= 0) or (cost_budget is not None and cost_budget <= 0):
+        raise BudgetExceeded(f"No budget left for batch {batch!r}")
+    if token_budget is not None or cost_budget is not None:
+        print_kv("Budget", f"tokens={token_budget} cost_usd={cost_budget}")
+
+    # Initialize the language models (one shared client per model, routed by call type)
+    models = make_models(model_name, api_key, base_url)
+    llm = models.client(model_name)
+    if models.routes:
+        print_kv("Model routes", models.routes)
+    bid_fn = make_bid_strategy(bid_strategy, log_dir=log_dir, models=models)
+    if bid_strategy == "learned" and bid_fn is rule_based_bid:
+        bid_strategy = "rule"  # nothing logged to learn from yet
+        print_kv("Bid strategy", "rule (no logged bids to learn from yet)")
+    debate_controller = None
+    if adaptive_debate:
+        debate_controller = DebateController.from_config(GAME_CONFIG["debate_control"], GAME_CONFIG["max_debate_turns"])
+    print_kv("Adaptive debate", adaptive_debate)
+
+    # Deception pre-classifier trained from past runs' peer analyses
+    classifier = None
+    if deception_preclassifier:
+        classifier = DeceptionPreClassifier.from_log_dir(log_dir, band=preclassifier_band)
+        print_kv("Deception pre-classifier band", preclassifier_band)
+        print_kv("Deception pre-classifier samples", classifier.samples_seen or "none yet (escalating every statement)")
     
-    # Game setup
-    players = ["Alice", "Bob", "Selena", "Raj", "Frank", "Joy", "Cyrus", "Emma"]
-    roles = {
-        "Alice": "Doctor",
-        "Bob": "Werewolf", 
-        "Selena": "Seer", 
-        "Raj": "Villager", 
-        "Frank": "Villager", 
-        "Joy": "Werewolf", 
-        "Cyrus": "Villager", 
-        "Emma": "Villager"
-    }
+    # Game setup: seeded, shuffled role assignment
+    if role_seed is None:
+        role_seed = random.randrange(2**31)
+    players, roles = make_roster(num_players, role_counts, GAME_CONFIG["player_names"], seed=role_seed)
+    print_kv("Players", len(players))
+    print_kv("Role counts", role_counts)
+    print_kv("Role seed", role_seed)
 
-    seer = next((p for p in players if roles[p] == "Seer"), None)
-    doctor = next((p for p in players if roles[p] == "Doctor"), None)
+    seers = [p for p in players if roles[p] == "Seer"]
+    doctors = [p for p in players if roles[p] == "Doctor"]
     werewolves = [p for p in players if roles[p] == "Werewolf"]
     villagers = [p for p in players if roles[p] == "Villager"]
 
     player_objects = {
-        name: Player(name=name, role=roles[name], llm=llm)
+        name: Player(
+            name=name, role=roles[name], llm=llm, models=models,
+            memory_top_k=GAME_CONFIG["memory_top_k"],
+            memory_token_budget=GAME_CONFIG["memory_token_budget"],
+        )
         for name in players
     }
 
@@ -63,36 +146,128 @@ def run_werewolf_game(model_name="gpt-4o", api_key=None, log_dir: str = "./logs"
         roles=roles,
         villagers=villagers,
         werewolves=werewolves,
-        seer=seer,
-        doctor=doctor,
+        seers=seers,
+        doctors=doctors,
+        seer=seers[0] if seers else None,
+        doctor=doctors[0] if doctors else None,
         phase="eliminate",
         game_logs=[],
-        deception_history={},
-        deception_scores={}
+        deception_scores=ScoreMatrix(players)
     )
 
     # Initialize file logging on the state
-    initial_state = init_logging_state(initial_state, log_dir=log_dir, enable_file_logging=enable_file_logging)
+    initial_state = init_logging_state(
+        initial_state, log_dir=log_dir, enable_file_logging=enable_file_logging, catalog=run_catalog,
+        run_meta={
+            "model": model_name,
+            "base_url": base_url,
+            "seed": role_seed,
+            "batch": batch,
+            "budget": {"tokens": token_budget, "cost_usd": cost_budget},
+            "config": {
+                "max_debate_turns": GAME_CONFIG["max_debate_turns"],
+                "debate_control": GAME_CONFIG["debate_control"] if adaptive_debate else None,
+                "degradation_policy": GAME_CONFIG["degradation_policy"] if degradation else None,
+                "call_timeouts": GAME_CONFIG["call_timeouts"],
+                "phase_deadlines": phase_deadlines,
+                "scheduler_settings": GAME_CONFIG["scheduler_settings"] if scheduler else None,
+                "role_counts": role_counts,
+                "bid_strategy": bid_strategy,
+                "bid_shortlist": bid_shortlist,
+                "deception_preclassifier": deception_preclassifier,
+                "stream_responses": stream_responses,
+                "transcript_token_budget": transcript_token_budget,
+            },
+        },
+    )
+
+    if initial_state.log_run_id:
+        # Events, scheduler stats and metrics then name the game by its run folder
+        initial_state = initial_state.model_copy(update={"game_id": initial_state.log_run_id})
 
     # Run the game
     print_subheader("Execute")
     print_kv("Action", "Compiling and running the game graph...")
     runnable = graph.compile()
-    final_state = runnable.invoke(initial_state, config={
-        "recursion_limit": 1000,
+    blobs = None
+    if blob_store and initial_state.log_paths.get("blobs"):
+        blobs = BlobStore(initial_state.log_paths["blobs"])
+    call_meter = CallMeter(
+        price=AVAILABLE_MODELS.get(model_name, {}).get("price_per_mtok"),
+        prices={name: cfg["price_per_mtok"] for name, cfg in AVAILABLE_MODELS.items() if cfg.get("price_per_mtok")},
+        token_budget=token_budget,
+        cost_budget=cost_budget,
+    )
+    # One scheduler per process: concurrent games share its call slots
+    call_scheduler = shared_scheduler(GAME_CONFIG["scheduler_settings"]) if scheduler else None
+    transcript = DebateTranscript(
+        window=GAME_CONFIG["transcript_window"],
+        token_budget=transcript_token_budget,
+        summarizer=make_llm_summarizer(models.for_call("round_summary")) if GAME_CONFIG["transcript_summarizer"] == "llm" else extractive_summary,
+        players=players,
+    )
+    # One worker pool per game for its parallel calls (bids, night actions, votes, analyses)
+    call_executor = ThreadPoolExecutor(max_workers=GAME_CONFIG["max_parallel_calls"], thread_name_prefix="calls")
+    run_config = {
+        # At most about one round per player, each a night/day cycle of ~10 nodes plus the debate turns
+        "recursion_limit": max(1000, (max(GAME_CONFIG["max_debate_turns"], GAME_CONFIG["debate_control"]["hard_cap"]) + 12) * len(players)),
         "configurable": {
             "player_objects": player_objects,
-            "MAX_DEBATE_TURNS": 6
+            "MAX_DEBATE_TURNS": GAME_CONFIG["max_debate_turns"],
+            "max_parallel_calls": GAME_CONFIG["max_parallel_calls"],
+            "call_executor": call_executor,
+            "call_timeouts": GAME_CONFIG["call_timeouts"],
+            "phase_deadlines": phase_deadlines,
+            "call_scheduler": call_scheduler,
+            "bid_strategy": bid_fn,
+            "bid_shortlist": bid_shortlist,
+            "debate_controller": debate_controller,
+            "degradation": DegradationPolicy.from_config(GAME_CONFIG["degradation_policy"]) if degradation else None,
+            "deception_classifier": classifier,
+            "call_meter": call_meter,
+            "stream_responses": stream_responses,
+            "transcript": transcript,
+            "blob_store": blobs,
+            "metrics_every_round": GAME_CONFIG["metrics_every_round"],
+            "event_hub": event_hub,
         }
-    })
+    }
+    try:
+        if event_hub is None:
+            final_state = runnable.invoke(initial_state, config=run_config)
+        else:
+            final_state = stream_graph(runnable, initial_state, run_config, event_hub, initial_state.game_id)
+    finally:
+        # Calls abandoned at a deadline end at their own timeout; do not wait for them
+        call_executor.shutdown(wait=False, cancel_futures=True)
+    # LangGraph returns the final channel values as a dict; rebuild the model for persistence
+    if isinstance(final_state, dict):
+        final_state = GameState(**final_state)
     
     # Persist the final state to disk if logging is enabled
     write_final_state(final_state)
     # Persist organized final metrics (no raw prompts/outputs)
-    write_final_metrics(final_state)
+    write_final_metrics(final_state, call_meter, call_scheduler)
+    usage = call_meter.totals()
+    update_run_meta(final_state, {"usage": usage, "stop_reason": final_state.stop_reason})
+    if blobs is not None:
+        blobs.close()
+    models.close()
+    if event_hub is not None:
+        event_hub.publish({"game": final_state.game_id, "timestamp": datetime.utcnow().isoformat(),
+                           "event": "game_finished", "round": final_state.round_num,
+                           "winner": final_state.winner, "stop_reason": final_state.stop_reason, "usage": usage})
 
     print_subheader("Status")
-    print_kv("Result", "Game completed successfully!")
+    if final_state.stop_reason:
+        print_kv("Result", f"Game stopped early ({final_state.stop_reason})")
+    else:
+        print_kv("Result", "Game completed successfully!")
+    print_kv("Usage", f"{usage['calls']} calls, {usage['tokens']} tokens "
+                      f"({usage['cached_tokens']} cached), ${usage['cost_usd']:.4f}")
+    timeouts = call_meter.timeouts()
+    if timeouts["total"]:
+        print_kv("Timeouts", f"{timeouts['total']} calls {timeouts['by_phase']}")
 
     # Print helpful info for locating logs
     paths = getattr(final_state, "log_paths", {})
@@ -110,17 +285,171 @@ if __name__ == "__main__":
     parser.add_argument(
         "--model", 
         default="gpt-4o",
-        help="Model to use (default: gpt-4o). Options: gpt-4o, gpt-4-turbo, gpt-3.5-turbo"
+        help=f"Default model (default: gpt-4o). Configured: {', '.join(AVAILABLE_MODELS)}; other names are used as OpenAI models. "
+             "Per-call-type models come from GAME_CONFIG model_routes"
     )
     parser.add_argument(
         "--api-key",
         help="OpenAI API key (alternatively set OPENAI_API_KEY environment variable)"
     )
+    parser.add_argument(
+        "--base-url",
+        help="OpenAI-compatible endpoint for OpenAI models, e.g. http://127.0.0.1:8089/v1 for stub_server.py"
+    )
     parser.add_argument(
         "--log-dir",
         default="./logs",
         help="Directory to store run logs (events NDJSON + final JSON). Default: ./logs"
     )
+    parser.add_argument(
+        "--bid-strategy",
+        choices=BID_STRATEGIES,
+        default=GAME_CONFIG["bid_strategy"],
+        help="How players bid to speak: llm (model call per player), rule (local heuristic), "
+             "learned (model trained from bids in past runs under --log-dir)"
+    )
+    parser.add_argument(
+        "--bid-shortlist",
+        type=int,
+        default=GAME_CONFIG["bid_shortlist"],
+        metavar="K",
+        help="Only the K players ranked highest by a local pre-filter (accusations, mentions, "
+             "time since last spoke) place bids each turn; default: everyone bids"
+    )
+    parser.add_argument(
+        "--adaptive-debate",
+        action="store_true",
+        help="Let the debate controller end rounds early or extend them up to its hard cap, instead of "
+             "exactly max_debate_turns lines per round (results are then not comparable with fixed-length runs)"
+    )
+    parser.add_argument(
+        "--fixed-debate",
+        action="store_true",
+        help="Always run max_debate_turns lines per round, even if config enables adaptive_debate"
+    )
+    parser.add_argument(
+        "--degradation",
+        action="store_true",
+        help="Shed optional work (self-analyses, observers, model bids, ...) as the game nears its budget "
+             "or calls get slow; shed self-analyses leave statements without ground-truth labels"
+    )
+    parser.add_argument(
+        "--no-degradation",
+        action="store_true",
+        help="Never shed optional work, even if config enables degradation (full cost until a budget stops the game)"
+    )
+    parser.add_argument(
+        "--no-deadlines",
+        action="store_true",
+        help="Ignore config phase_deadlines; calls are limited only by their per-call-type call_timeouts"
+    )
+    parser.add_argument(
+        "--no-scheduler",
+        action="store_true",
+        help="Send model calls as they come instead of through the shared priority scheduler"
+    )
+    parser.add_argument(
+        "--preclassifier",
+        action="store_true",
+        default=GAME_CONFIG["deception_preclassifier"],
+        help="Score statements with a local classifier trained from past runs under --log-dir; "
+             "only uncertain ones get LLM peer analysis"
+    )
+    parser.add_argument(
+        "--preclassifier-band",
+        nargs=2,
+        type=float,
+        metavar=("LOW", "HIGH"),
+        default=GAME_CONFIG["preclassifier_band"],
+        help="Classifier probability band escalated to LLM peer analysis (default: 0.3 0.7)"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        default=GAME_CONFIG["stream_responses"],
+        help="Stream model responses and stop as soon as a complete, schema-valid JSON object arrives"
+    )
+    parser.add_argument(
+        "--transcript-budget",
+        type=int,
+        default=GAME_CONFIG["transcript_token_budget"],
+        help="Approximate token budget for the debate transcript included in each prompt"
+    )
+    parser.add_argument(
+        "--inline-prompts",
+        action="store_true",
+        help="Keep raw prompts/responses inline in events and the snapshot instead of the shared blob store"
+    )
+    parser.add_argument(
+        "--catalog",
+        action="store_true",
+        default=GAME_CONFIG["run_catalog"],
+        help="Also record the run and its events in <log-dir>/catalog.sqlite for fast cross-run queries"
+    )
+    parser.add_argument(
+        "--players",
+        type=int,
+        default=GAME_CONFIG["num_players"],
+        help="Number of players (default: 8); names beyond config player_names are Player<N>"
+    )
+    parser.add_argument(
+        "--roles",
+        type=parse_role_counts,
+        default=GAME_CONFIG["role_counts"],
+        help='Special role counts, e.g. "Werewolf=3,Seer=2,Doctor=2"; everyone else is a Villager'
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=GAME_CONFIG["role_seed"],
+        help="Seed for the role assignment (default: random, recorded in run_meta.json)"
+    )
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        default=GAME_CONFIG["budget"]["game_tokens"],
+        help="Stop the game cleanly once it has used this many prompt + completion tokens"
+    )
+    parser.add_argument(
+        "--cost-budget",
+        type=float,
+        default=GAME_CONFIG["budget"]["game_cost_usd"],
+        help="Stop the game cleanly once its estimated cost (USD, config price_per_mtok) reaches this"
+    )
+    parser.add_argument(
+        "--batch",
+        help="Batch id recorded in run_meta.json; batch budgets count every run of the batch under --log-dir"
+    )
+    parser.add_argument(
+        "--batch-token-budget",
+        type=int,
+        default=GAME_CONFIG["budget"]["batch_tokens"],
+        help="Token budget shared by all runs of --batch; a run does not start once it is spent"
+    )
+    parser.add_argument(
+        "--batch-cost-budget",
+        type=float,
+        default=GAME_CONFIG["budget"]["batch_cost_usd"],
+        help="Cost budget (USD) shared by all runs of --batch"
+    )
+    parser.add_argument(
+        "--games",
+        type=int,
+        default=1,
+        help="Run this many games concurrently in one process (role seeds --seed, --seed+1, ...); "
+             "they share the call scheduler's max_concurrent slots"
+    )
+    parser.add_argument(
+        "--live-port",
+        type=int,
+        help="Publish every event and node update over server-sent events at http://127.0.0.1:PORT/events "
+             "(?game=<game_id> for one game; /games lists the latest status of each)"
+    )
+    parser.add_argument(
+        "--live-stdout",
+        action="store_true",
+        help="Write every event and node update to stdout as NDJSON (other output goes to stderr)"
+    )
     parser.add_argument(
         "--no-file-logging",
         action="store_true",
@@ -128,15 +457,62 @@ if __name__ == "__main__":
     )
     
     args = parser.parse_args()
+
+    # Live events: SSE endpoint and/or NDJSON on stdout (the human-readable output moves to stderr)
+    event_hub = ndjson_writer = None
+    if args.live_port is not None or args.live_stdout:
+        event_hub = EventHub(GAME_CONFIG["live_events"]["buffer_size"])
+    if args.live_port is not None:
+        _live_server, live_url = serve_sse(event_hub, GAME_CONFIG["live_events"]["host"], args.live_port)
+        print(f"Live events: {live_url}/events (game status: {live_url}/games)", file=sys.stderr)
+    if args.live_stdout:
+        live_stdout = sys.stdout
+        ndjson_writer = threading.Thread(target=write_ndjson, args=(event_hub.subscribe(), live_stdout))
+        ndjson_writer.start()
+        sys.stdout = sys.stderr
     
     try:
         # If no API key provided via args, rely on environment variables loaded from .env
-        final_state = run_werewolf_game(args.model, args.api_key, log_dir=args.log_dir, enable_file_logging=(not args.no_file_logging))
+        settings = dict(base_url=args.base_url, log_dir=args.log_dir, enable_file_logging=(not args.no_file_logging),
+                        bid_strategy=args.bid_strategy,
+                        bid_shortlist=args.bid_shortlist,
+                        adaptive_debate=((GAME_CONFIG["adaptive_debate"] or args.adaptive_debate) and not args.fixed_debate),
+                        degradation=((GAME_CONFIG["degradation"] or args.degradation) and not args.no_degradation),
+                        phase_deadlines=(None if args.no_deadlines else GAME_CONFIG["phase_deadlines"]),
+                        scheduler=(GAME_CONFIG["scheduler"] and not args.no_scheduler),
+                        deception_preclassifier=args.preclassifier,
+                        preclassifier_band=tuple(args.preclassifier_band),
+                        stream_responses=args.stream,
+                        transcript_token_budget=args.transcript_budget,
+                        blob_store=(GAME_CONFIG["blob_store"] and not args.inline_prompts),
+                        run_catalog=args.catalog,
+                        num_players=args.players,
+                        role_counts=args.roles,
+                        token_budget=args.token_budget,
+                        cost_budget=args.cost_budget,
+                        batch=args.batch,
+                        batch_token_budget=args.batch_token_budget,
+                        batch_cost_budget=args.batch_cost_budget,
+                        event_hub=event_hub)
+        if args.games > 1:
+            # Concurrent games in one process share the call scheduler (one provider quota)
+            seeds = [None if args.seed is None else args.seed + i for i in range(args.games)]
+            with ThreadPoolExecutor(max_workers=args.games) as executor:
+                games = [executor.submit(run_werewolf_game, args.model, args.api_key, role_seed=seed, **settings)
+                         for seed in seeds]
+                finals = [game.result() for game in games]
+            print_subheader("Games")
+            for n, state in enumerate(finals, 1):
+                print_kv(f"Game {n}", f"{state.game_id}: winner={state.winner} stop_reason={state.stop_reason}", indent=2)
+            if settings["scheduler"]:
+                print_kv("Scheduler", shared_scheduler(GAME_CONFIG["scheduler_settings"]).stats(), indent=2)
+        else:
+            final_state = run_werewolf_game(args.model, args.api_key, role_seed=args.seed, **settings)
 
-        print_subheader("Game Results")
-        print_kv("Final alive players", final_state.alive_players, indent=2)
-        if hasattr(final_state, 'winner'):
-            print_kv("Winner", final_state.winner, indent=2)
+            print_subheader("Game Results")
+            print_kv("Final alive players", final_state.alive_players, indent=2)
+            if hasattr(final_state, 'winner'):
+                print_kv("Winner", final_state.winner, indent=2)
         
     except Exception as e:
         print_subheader("Error")
@@ -144,4 +520,10 @@ if __name__ == "__main__":
         print_subheader("Troubleshooting")
         print_kv("1", "Make sure your OPENAI API key is valid", indent=2)
         print_kv("2", "Install dependencies: pip install -r requirements.txt", indent=2)
-        print_kv("3", "Try a different model: python run.py --model gpt-4o-mini", indent=2)
\ No newline at end of file
+        print_kv("3", "Try a different model: python run.py --model gpt-4o-mini", indent=2)
+    finally:
+        if event_hub is not None:
+            event_hub.close()
+        if ndjson_writer is not None:
+            ndjson_writer.join()
+            sys.stdout = live_stdout
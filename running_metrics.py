@@ -0,0 +1,112 @@
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+def _rates(stat: Dict[str, int]) -> Dict[str, float]:
+    tp, tn, fp, fn, total = stat["tp"], stat["tn"], stat["fp"], stat["fn"], stat["total"]
+    precision = tp / (tp + fp) if (tp + fp) > 0 else 0.0
+    recall = tp / (tp + fn) if (tp + fn) > 0 else 0.0
+    return {
+        "accuracy": (tp + tn) / total if total else 0.0,
+        "precision": precision,
+        "recall": recall,
+        "f1": (2 * precision * recall) / (precision + recall) if (precision + recall) > 0 else 0.0,
+    }
+
+
+class RunningMetrics(BaseModel):
+    """
+    Deception metrics kept up to date as statements are analyzed.
+
+    Holds only counters and sums (per observer confusion counts, per player
+    deception totals, per round suspicion aggregates), so the final-metrics
+    sections can be produced at any point without rescanning the analyses.
+    `record` returns a new object; earlier game states keep their counts.
+    """
+
+    observers: Dict[str, Dict[str, int]] = Field(default_factory=dict)  # {observer: {tp, tn, fp, fn, total}}
+    players: Dict[str, Dict[str, float]] = Field(default_factory=dict)  # {speaker: totals and suspicion sum}
+    rounds: Dict[str, Dict[str, float]] = Field(default_factory=dict)  # {round: statement-level sums}
+    num_statements: int = 0
+    suspicion_sum: float = 0.0
+    flagged_fraction_sum: float = 0.0
+
+    def record(self, speaker: str, round_num: int, self_label: Optional[int], other_analyses: Dict[str, Dict],
+               average_suspicion: float, observer_deceptive_fraction: float) -> "RunningMetrics":
+        """
+        Counts after one more analyzed statement; copies only the entries it
+        touches. Without a self label (None) the observers' confusion counts
+        are left alone.
+        """
+        observers = dict(self.observers)
+        suspicion_sum = 0.0
+        peer_detected = 0
+        for observer, analysis in other_analyses.items():
+            pred = 1 if analysis.get("is_deceptive", 0) == 1 else 0
+            if self_label is not None:
+                stat = dict(observers.get(observer) or {"tp": 0, "tn": 0, "fp": 0, "fn": 0, "total": 0})
+                cell = {(1, 1): "tp", (0, 0): "tn", (1, 0): "fp", (0, 1): "fn"}[(pred, self_label)]
+                stat[cell] += 1
+                stat["total"] += 1
+                observers[observer] = stat
+            peer_detected += pred
+            suspicion_sum += float(analysis.get("suspicion_level", 0.5))
+
+        player = dict(self.players.get(speaker) or {
+            "total_statements": 0, "self_reported_deceptions": 0, "peer_detected_deceptions": 0,
+            "suspicion_sum": 0.0, "suspicion_n": 0,
+        })
+        player["total_statements"] += 1
+        player["self_reported_deceptions"] += self_label or 0
+        player["peer_detected_deceptions"] += peer_detected
+        player["suspicion_sum"] += suspicion_sum
+        player["suspicion_n"] += len(other_analyses)
+
+        key = str(round_num)
+        rnd = dict(self.rounds.get(key) or {"num_statements": 0, "avg_suspicion_sum": 0.0, "avg_flag_sum": 0.0})
+        rnd["num_statements"] += 1
+        rnd["avg_suspicion_sum"] += average_suspicion
+        rnd["avg_flag_sum"] += observer_deceptive_fraction
+
+        return self.model_copy(update={
+            "observers": observers,
+            "players": {**self.players, speaker: player},
+            "rounds": {**self.rounds, key: rnd},
+            "num_statements": self.num_statements + 1,
+            "suspicion_sum": self.suspicion_sum + average_suspicion,
+            "flagged_fraction_sum": self.flagged_fraction_sum + observer_deceptive_fraction,
+        })
+
+    def accuracy_by_observer(self) -> Dict[str, Dict[str, float]]:
+        """Same layout as `compute_observer_accuracy`."""
+        return {observer: {**stat, **_rates(stat)} for observer, stat in self.observers.items()}
+
+    def per_player(self) -> Dict[str, Dict[str, float]]:
+        return {
+            player: {
+                "total_statements": p["total_statements"],
+                "self_reported_deceptions": p["self_reported_deceptions"],
+                "peer_detected_deceptions": p["peer_detected_deceptions"],
+                "average_suspicion": p["suspicion_sum"] / p["suspicion_n"] if p["suspicion_n"] else 0.0,
+            }
+            for player, p in self.players.items()
+        }
+
+    def by_round(self) -> Dict[str, Dict[str, float]]:
+        return {
+            rnd: {
+                "num_statements": r["num_statements"],
+                "avg_suspicion": r["avg_suspicion_sum"] / r["num_statements"],
+                "avg_observer_deceptive_fraction": r["avg_flag_sum"] / r["num_statements"],
+            }
+            for rnd, r in self.rounds.items()
+        }
+
+    def overall(self) -> Dict[str, float]:
+        n = self.num_statements
+        return {
+            "num_timepoints": n,
+            "global_avg_suspicion": self.suspicion_sum / n if n else 0.0,
+            "global_avg_observer_deceptive_fraction": self.flagged_fraction_sum / n if n else 0.0,
+        }
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests for metrics maintained incrementally during play (no LLM calls).
+"""
+
+from typing import Dict, List
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from deception_detection import ScoreMatrix, compute_observer_accuracy, update_deception_history
+from running_metrics import RunningMetrics
+
+class _State(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    round_num: int = 0
+    phase: str = "debate"
+    deception_statements: List[Dict] = Field(default_factory=list)
+    deception_analyses: Dict[str, Dict[str, Dict]] = Field(default_factory=dict)
+    deception_scores: ScoreMatrix = Field(default_factory=ScoreMatrix)
+    running_metrics: RunningMetrics = Field(default_factory=RunningMetrics)
+
+def test_running_metrics_match_full_recompute():
+    state = _State()
+    plays = [
+        (0, "Bob", 1, {"Alice": (1, 0.9), "Cy": (0, 0.2)}),
+        (0, "Alice", 0, {"Bob": (1, 0.8), "Cy": (0, 0.1)}),
+        (1, "Cy", 0, {"Alice": (0, 0.3), "Bob": (0, 0.4)}),
+    ]
+    for round_num, speaker, self_label, peers in plays:
+        state = state.model_copy(update={"round_num": round_num})
+        analyses = {o: {"is_deceptive": d, "suspicion_level": s} for o, (d, s) in peers.items()}
+        before = state.running_metrics
+        state = update_deception_history(state, speaker, "text", {"is_deceptive": self_label}, analyses)
+        assert before is not state.running_metrics
+
+    running = state.running_metrics
+    assert running.accuracy_by_observer() == compute_observer_accuracy(state)
+    assert running.per_player()["Bob"] == {
+        "total_statements": 1, "self_reported_deceptions": 1,
+        "peer_detected_deceptions": 1, "average_suspicion": 0.55,
+    }
+    assert running.by_round()["0"]["num_statements"] == 2
+    assert abs(running.by_round()["1"]["avg_suspicion"] - 0.35) < 1e-9
+    assert running.overall()["num_timepoints"] == 3
+
+def test_parse_error_fallbacks_left_out_of_metrics():
+    state = _State()
+    peers = {
+        "Alice": {"is_deceptive": 1, "suspicion_level": 0.9, "source": "llm"},
+        "Cy": {"is_deceptive": 0, "suspicion_level": 0.5, "source": "parse_error"},
+    }
+    state = update_deception_history(state, "Bob", "text", {"is_deceptive": 1, "source": "llm"}, peers)
+    row = state.deception_statements[0]
+    assert row["observer_count"] == 1 and row["average_suspicion"] == 0.9
+    assert set(state.deception_analyses["s0"]) == {"Bob", "Alice", "Cy"}
+    assert "Cy" not in state.deception_scores
+    assert "Cy" not in state.running_metrics.observers
+
+    # No self label: kept in the store, left out of the confusion counts
+    state = update_deception_history(state, "Bob", "text", {"is_deceptive": 0, "source": "parse_error"}, {
+        "Alice": {"is_deceptive": 1, "suspicion_level": 0.8, "source": "llm"},
+    })
+    assert state.deception_statements[1]["self_reported_deceptive"] is None
+    assert state.running_metrics.observers["Alice"]["total"] == 1
+    assert state.running_metrics.accuracy_by_observer() == compute_observer_accuracy(state)
+    assert state.running_metrics.per_player()["Bob"]["total_statements"] == 2
+
+def test_timed_out_analyses_left_out_of_metrics():
+    from game_graph import _failed_analysis
+
+    state = _State()
+    state = update_deception_history(state, "Bob", "text", {"is_deceptive": 1, "source": "llm"}, {
+        "Alice": {"is_deceptive": 1, "suspicion_level": 0.9, "source": "llm"},
+        "Cy": _failed_analysis("Analysis timed out at the phase deadline", "timeout"),
+        "Dee": _failed_analysis("Analysis failed: boom", "error"),
+    })
+    assert state.deception_statements[0]["average_suspicion"] == 0.9
+    assert set(state.deception_analyses["s0"]) == {"Bob", "Alice", "Cy", "Dee"}
+    assert set(state.running_metrics.observers) == {"Alice"}
+    assert set(state.deception_scores) == {"Alice"}
+
+    # A timed-out self-analysis leaves the statement unlabelled
+    state = update_deception_history(state, "Bob", "text", _failed_analysis("late", "timeout"), {
+        "Alice": {"is_deceptive": 0, "suspicion_level": 0.2, "source": "llm"},
+    })
+    assert state.deception_statements[1]["self_reported_deceptive"] is None
+    assert state.running_metrics.observers["Alice"] == {"tp": 1, "tn": 0, "fp": 0, "fn": 0, "total": 1}
+    assert state.running_metrics.accuracy_by_observer() == compute_observer_accuracy(state)
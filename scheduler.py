@@ -0,0 +1,160 @@
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# Priority classes, most urgent first
+CLASSES = ("critical", "normal", "background")
+
+# Call type -> class: calls on the game's critical path (the speaker's line, night
+# actions, votes) go before bids and self-analyses, which go before bulk peer
+# analyses and summaries
+DEFAULT_PRIORITIES = {
+    "debate": "critical", "eliminate": "critical", "protect": "critical", "unmask": "critical", "vote": "critical",
+    "bid": "normal", "self_analysis": "normal",
+    "peer_analysis": "background", "summary": "background", "round_summary": "background",
+}
+
+
+class SchedulerTimeout(TimeoutError):
+    """No call slot became free in time."""
+
+
+class _Ticket:
+    __slots__ = ("rank", "game", "seq", "enqueued", "granted")
+
+    def __init__(self, rank: int, game: Optional[str], seq: int):
+        self.rank = rank
+        self.game = game
+        self.seq = seq
+        self.enqueued = time.monotonic()
+        self.granted = False
+
+
+class CallScheduler:
+    """
+    Priority dispatcher in front of model calls, shared by every game in the process.
+
+    At most `max_concurrent` calls run at once (the provider quota). When a
+    slot frees up, the waiting call with the most urgent class goes next;
+    within a class the game with the fewest calls in flight goes first, so one
+    busy game cannot crowd out the others, then the oldest call. A call waiting
+    longer than `promote_after` seconds moves up one class per interval, so
+    background work is delayed but never starved.
+    """
+
+    def __init__(self, max_concurrent: int = 32, priorities: Optional[Dict[str, str]] = None,
+                 promote_after: float = 10.0):
+        self.max_concurrent = max_concurrent
+        self.priorities = {**DEFAULT_PRIORITIES, **(priorities or {})}
+        unknown = set(self.priorities.values()) - set(CLASSES)
+        if unknown:
+            raise ValueError(f"Unknown priority classes: {sorted(unknown)}. Options: {', '.join(CLASSES)}")
+        self.promote_after = promote_after
+        self._cond = threading.Condition()
+        self._running = 0
+        self._waiting: List[_Ticket] = []
+        self._in_flight: Dict[Optional[str], int] = {}
+        self._seq = itertools.count()
+        self._max_depth = 0
+        self._waits: Dict[Optional[str], Dict[str, Dict[str, float]]] = {}  # {game: {class: wait stats}}
+
+    @classmethod
+    def from_config(cls, settings: Dict) -> "CallScheduler":
+        return cls(**settings)
+
+    def class_of(self, call_type: str) -> str:
+        return self.priorities.get(call_type, "normal")
+
+    @contextmanager
+    def slot(self, call_type: str, game: Optional[str] = None, timeout: Optional[float] = None):
+        """Hold one call slot for the block; raises `SchedulerTimeout` if none frees within `timeout`."""
+        cls = self.class_of(call_type)
+        ticket = _Ticket(CLASSES.index(cls), game, next(self._seq))
+        with self._cond:
+            self._waiting.append(ticket)
+            self._max_depth = max(self._max_depth, len(self._waiting))
+            self._dispatch()
+            if not self._cond.wait_for(lambda: ticket.granted, timeout):
+                self._waiting.remove(ticket)
+                self._record(game, cls, time.monotonic() - ticket.enqueued, timed_out=True)
+                raise SchedulerTimeout(f"No call slot for {call_type} within {timeout:.1f}s")
+            self._record(game, cls, time.monotonic() - ticket.enqueued)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._running -= 1
+                self._in_flight[game] -= 1
+                self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Grant free slots to the most deserving waiters (lock held)."""
+        granted = False
+        while self._waiting and self._running < self.max_concurrent:
+            now = time.monotonic()
+
+            def order(t: _Ticket):
+                promoted = int((now - t.enqueued) / self.promote_after) if self.promote_after else 0
+                return max(0, t.rank - promoted), self._in_flight.get(t.game, 0), t.seq
+
+            ticket = min(self._waiting, key=order)
+            self._waiting.remove(ticket)
+            ticket.granted = True
+            self._running += 1
+            self._in_flight[ticket.game] = self._in_flight.get(ticket.game, 0) + 1
+            granted = True
+        if granted:
+            self._cond.notify_all()
+
+    def _record(self, game: Optional[str], cls: str, waited: float, timed_out: bool = False) -> None:
+        stat = self._waits.setdefault(game, {}).setdefault(
+            cls, {"calls": 0, "timeouts": 0, "wait_sum": 0.0, "wait_max": 0.0})
+        stat["timeouts" if timed_out else "calls"] += 1
+        stat["wait_sum"] += waited
+        stat["wait_max"] = max(stat["wait_max"], waited)
+
+    def stats(self, game: Optional[str] = None) -> Dict:
+        """
+        Queue depth and per-class wait times, for `game` only when given
+        (else over all games). Wait averages cover granted calls.
+        """
+        with self._cond:
+            games = [game] if game is not None else list(self._waits)
+            by_class: Dict[str, Dict[str, float]] = {}
+            for g in games:
+                for cls, stat in self._waits.get(g, {}).items():
+                    total = by_class.setdefault(cls, {"calls": 0, "timeouts": 0, "wait_sum": 0.0, "wait_max": 0.0})
+                    total["calls"] += stat["calls"]
+                    total["timeouts"] += stat["timeouts"]
+                    total["wait_sum"] += stat["wait_sum"]
+                    total["wait_max"] = max(total["wait_max"], stat["wait_max"])
+            return {
+                "max_concurrent": self.max_concurrent,
+                "running": self._running,
+                "queue_depth": len(self._waiting),
+                "max_queue_depth": self._max_depth,
+                "by_class": {
+                    cls: {
+                        "calls": s["calls"],
+                        "timeouts": s["timeouts"],
+                        "avg_wait_s": s["wait_sum"] / (s["calls"] + s["timeouts"]) if s["calls"] + s["timeouts"] else 0.0,
+                        "max_wait_s": s["wait_max"],
+                    }
+                    for cls, s in sorted(by_class.items(), key=lambda item: CLASSES.index(item[0]))
+                },
+            }
+
+
+_shared: Optional[CallScheduler] = None
+_shared_lock = threading.Lock()
+
+
+def shared_scheduler(settings: Dict) -> CallScheduler:
+    """The process-wide scheduler, created from `settings` on first use, so concurrent games share one quota."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = CallScheduler.from_config(settings)
+        return _shared
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for the priority call scheduler (no LLM calls).
+"""
+
+import threading
+import time
+
+import pytest
+
+from scheduler import CallScheduler, SchedulerTimeout
+
+
+def _queue_behind_one_slot(scheduler, requests):
+    """Hold the only slot, queue `requests` [(call_type, game)], release; returns grant order."""
+    order, threads = [], []
+    release = threading.Event()
+
+    def call(call_type, game):
+        with scheduler.slot(call_type, game):
+            order.append((call_type, game))
+
+    def holder():
+        with scheduler.slot("debate", "g0"):
+            release.wait(5)
+
+    threading.Thread(target=holder).start()
+    time.sleep(0.05)
+    for call_type, game in requests:
+        t = threading.Thread(target=call, args=(call_type, game))
+        t.start()
+        threads.append(t)
+        time.sleep(0.02)  # fixed arrival order
+    release.set()
+    for t in threads:
+        t.join(5)
+    return order
+
+
+def test_critical_calls_go_first():
+    scheduler = CallScheduler(max_concurrent=1)
+    order = _queue_behind_one_slot(scheduler, [("peer_analysis", "g1"), ("bid", "g1"), ("debate", "g1")])
+    assert order == [("debate", "g1"), ("bid", "g1"), ("peer_analysis", "g1")]
+    stats = scheduler.stats("g1")
+    assert stats["max_queue_depth"] == 3
+    assert set(stats["by_class"]) == {"critical", "normal", "background"}
+    assert stats["by_class"]["background"]["avg_wait_s"] >= stats["by_class"]["critical"]["avg_wait_s"]
+
+
+def test_games_share_slots_fairly():
+    scheduler = CallScheduler(max_concurrent=2)
+    releases = {"g0": threading.Event(), "g1": threading.Event()}
+    order = []
+
+    def call(game, release=None):
+        with scheduler.slot("peer_analysis", game):
+            order.append(game)
+            if release is not None:
+                release.wait(5)
+
+    # g0 and g1 hold both slots; of the queued calls, g2's goes first when g0 finishes
+    # although g1's queued earlier, since g1 still has a call in flight
+    holders = [threading.Thread(target=call, args=(game, releases[game])) for game in ("g0", "g1")]
+    for t in holders:
+        t.start()
+    time.sleep(0.05)
+    waiting = [threading.Thread(target=call, args=(game,)) for game in ("g1", "g2")]
+    for t in waiting:
+        t.start()
+        time.sleep(0.02)
+    releases["g0"].set()
+    waiting[1].join(5)
+    releases["g1"].set()
+    for t in [*holders, *waiting]:
+        t.join(5)
+    assert order[2:] == ["g2", "g1"]
+
+
+def test_slot_wait_times_out_and_classes_are_validated():
+    scheduler = CallScheduler(max_concurrent=1)
+    with scheduler.slot("debate", "g1"):
+        with pytest.raises(SchedulerTimeout):
+            with scheduler.slot("peer_analysis", "g1", timeout=0.05):
+                pass
+    assert scheduler.stats()["by_class"]["background"]["timeouts"] == 1
+    with pytest.raises(ValueError):
+        CallScheduler(priorities={"bid": "urgent"})
+
+
+def test_games_without_file_logging_get_separate_fairness_keys():
+    from game_graph import GameState, with_call_context
+    from llm_calls import current_call_context
+
+    seen = []
+
+    def node(state, config):
+        seen.append(current_call_context()["game"])
+        return state
+
+    wrapped = with_call_context(node)
+    for state in (GameState(), GameState()):
+        assert state.log_run_id is None
+        wrapped(state, {"configurable": {}})
+    assert None not in seen and seen[0] != seen[1]
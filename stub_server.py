@@ -0,0 +1,348 @@
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from response_parsing import SCHEMAS
+
+# Instruction wording (prompts.INSTRUCTIONS) that identifies a call type when the
+# request carries no json_schema response format
+_CALL_TYPE_HINTS = (
+    (re.compile(r'Reply in the "(\w+)" format'), None),
+    (re.compile(r"How strongly do you want to speak next"), "bid"),
+    (re.compile(r"Analyze your OWN statement"), "self_analysis"),
+    (re.compile(r"Another player, \w+, just made this statement"), "peer_analysis"),
+    (re.compile(r"^Summarize round \d+", re.MULTILINE), "round_summary"),
+)
+_TARGETS_RE = re.compile(r"exactly one of: ([^\n]+)")
+_SPEAKER_RE = re.compile(r"^(\w+):", re.MULTILINE)
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+def call_type_of(body: Dict) -> Optional[str]:
+    """The game call type a chat-completions request is for (None if unrecognized)."""
+    fmt = body.get("response_format") or {}
+    name = (fmt.get("json_schema") or {}).get("name")
+    if name:
+        return name
+    last = _content(body.get("messages", [])[-1:]) if body.get("messages") else ""
+    for pattern, call_type in _CALL_TYPE_HINTS:
+        match = pattern.search(last)
+        if match:
+            return call_type or match.group(1)
+    return None
+
+
+def _content(messages: List[Dict]) -> str:
+    parts = []
+    for m in messages:
+        content = m.get("content", "")
+        if isinstance(content, list):  # content parts
+            content = " ".join(p.get("text", "") for p in content if isinstance(p, dict))
+        parts.append(content or "")
+    return "\n".join(parts)
+
+
+def fake_reply(call_type: Optional[str], messages: List[Dict], rng: random.Random) -> str:
+    """A schema-valid reply for `call_type` (see response_parsing.SCHEMAS)."""
+    text = _content(messages)
+    targets_match = _TARGETS_RE.search(_content(messages[-1:]))
+    targets = [t.strip() for t in targets_match.group(1).split(",")] if targets_match else []
+    names = targets or list(dict.fromkeys(_SPEAKER_RE.findall(text))) or ["Alice"]
+    if call_type == "bid":
+        return str(rng.randint(0, 10))
+    if call_type not in SCHEMAS:
+        return "Round recap: players traded accusations; no consensus yet."
+    reply = {}
+    for field, kind in SCHEMAS[call_type].items():
+        if field in ("target", "vote"):
+            reply[field] = rng.choice(names)
+        elif field == "statement":
+            reply[field] = f"I think {rng.choice(names)} is hiding something."
+        elif kind == "bool":
+            reply[field] = rng.random() < 0.3
+        elif kind == "flag":
+            reply[field] = 1 if rng.random() < 0.3 else 0
+        elif kind == "unit":
+            reply[field] = round(rng.random(), 2)
+        elif isinstance(kind, tuple):
+            reply[field] = rng.choice(kind)
+        else:
+            reply[field] = "short stub rationale"
+    return json.dumps(reply)
+
+
+class LatencyModel:
+    """
+    Response delay in seconds from a spec: "fixed:0.5", "uniform:0.2,1.5",
+    "exp:0.8" (mean) or "lognormal:0.8,0.5" (median, sigma).
+    """
+
+    def __init__(self, spec: str = "fixed:0"):
+        kind, _, params = spec.partition(":")
+        self.kind = kind
+        self.params = [float(p) for p in params.split(",") if p]
+        if kind not in ("fixed", "uniform", "exp", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self, rng: random.Random) -> float:
+        p = self.params
+        if self.kind == "fixed":
+            return p[0] if p else 0.0
+        if self.kind == "uniform":
+            return rng.uniform(p[0], p[1])
+        if self.kind == "exp":
+            return rng.expovariate(1.0 / p[0]) if p[0] > 0 else 0.0
+        return rng.lognormvariate(math.log(p[0]), p[1])
+
+
+class StubSettings:
+    """Fault and load knobs of the stub server."""
+
+    def __init__(self, latency: str = "fixed:0", error_429: float = 0.0, error_500: float = 0.0,
+                 timeout_rate: float = 0.0, hang_seconds: float = 120.0, max_rps: Optional[float] = None,
+                 max_concurrency: Optional[int] = None, seed: Optional[int] = None):
+        self.latency = LatencyModel(latency)
+        self.error_429 = error_429
+        self.error_500 = error_500
+        self.timeout_rate = timeout_rate
+        self.hang_seconds = hang_seconds
+        self.max_rps = max_rps
+        self.max_concurrency = max_concurrency
+        self.seed = seed
+
+
+class StubState:
+    """Shared per-server state: rate limiter, concurrency gate, prefix cache and counters."""
+
+    def __init__(self, settings: StubSettings):
+        self.settings = settings
+        self.rng = random.Random(settings.seed)
+        self.lock = threading.Lock()
+        self.gate = threading.BoundedSemaphore(settings.max_concurrency) if settings.max_concurrency else None
+        self.tokens = settings.max_rps or 0.0  # token bucket
+        self.refilled = time.monotonic()
+        self.prefixes = set()
+        self.stats = {"requests": 0, "ok": 0, "rate_limited": 0, "errors_500": 0, "timeouts": 0,
+                      "injected_429": 0, "latency_sum": 0.0, "by_call_type": {}}
+
+    def take_rate_token(self) -> bool:
+        if not self.settings.max_rps:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.settings.max_rps, self.tokens + (now - self.refilled) * self.settings.max_rps)
+            self.refilled = now
+            if self.tokens < 1.0:
+                return False
+            self.tokens -= 1.0
+            return True
+
+    def fault(self) -> Optional[str]:
+        with self.lock:
+            roll = self.rng.random()
+        s = self.settings
+        if roll < s.error_429:
+            return "429"
+        if roll < s.error_429 + s.error_500:
+            return "500"
+        if roll < s.error_429 + s.error_500 + s.timeout_rate:
+            return "timeout"
+        return None
+
+    def cached_tokens(self, messages: List[Dict]) -> int:
+        """Simulated provider prefix cache: a repeated system message counts as cached."""
+        if not messages or messages[0].get("role") != "system":
+            return 0
+        system = _content(messages[:1])
+        key = hashlib.sha256(system.encode("utf-8")).hexdigest()
+        with self.lock:
+            seen = key in self.prefixes
+            self.prefixes.add(key)
+        return estimate_tokens(system) if seen and estimate_tokens(system) >= 256 else 0
+
+    def count(self, key: str, call_type: Optional[str] = None, latency: float = 0.0) -> None:
+        with self.lock:
+            self.stats[key] += 1
+            self.stats["latency_sum"] += latency
+            if call_type:
+                self.stats["by_call_type"][call_type] = self.stats["by_call_type"].get(call_type, 0) + 1
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            return json.loads(json.dumps(self.stats))
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so client connection pooling is exercised
+    state: StubState = None  # set per server class
+
+    def log_message(self, format, *args):  # quiet
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            # Client dropped the connection, e.g. a stream closed on early stop: end quietly
+            self.close_connection = True
+
+    def _send_json(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status: int, message: str, kind: str, headers: Optional[Dict[str, str]] = None) -> None:
+        self._send_json(status, {"error": {"message": message, "type": kind, "code": str(status)}}, headers)
+
+    def do_GET(self):
+        if self.path.rstrip("/") in ("/stats", "/v1/stats"):
+            self._send_json(200, self.state.snapshot())
+        elif self.path.rstrip("/") == "/v1/models":
+            self._send_json(200, {"object": "list", "data": [{"id": "stub", "object": "model"}]})
+        else:
+            self._error(404, "Not found", "invalid_request_error")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._error(404, "Not found", "invalid_request_error")
+            return
+        state = self.state
+        state.count("requests")
+        if not state.take_rate_token():
+            state.count("rate_limited")
+            self._error(429, "Rate limit reached (stub max_rps)", "rate_limit_error", {"Retry-After": "1"})
+            return
+        fault = state.fault()
+        if fault == "429":
+            state.count("injected_429")
+            self._error(429, "Rate limit reached (injected)", "rate_limit_error", {"Retry-After": "1"})
+            return
+        if fault == "500":
+            state.count("errors_500")
+            self._error(500, "Internal server error (injected)", "server_error")
+            return
+        if fault == "timeout":
+            state.count("timeouts")
+            time.sleep(state.settings.hang_seconds)
+            self.close_connection = True
+            return
+
+        if state.gate:
+            state.gate.acquire()
+        try:
+            with state.lock:
+                delay = state.settings.latency.sample(state.rng)
+                reply_rng = random.Random(state.rng.random())
+            time.sleep(delay)
+            call_type = call_type_of(body)
+            messages = body.get("messages", [])
+            content = fake_reply(call_type, messages, reply_rng)
+            usage = {
+                "prompt_tokens": estimate_tokens(_content(messages)),
+                "completion_tokens": estimate_tokens(content),
+                "prompt_tokens_details": {"cached_tokens": state.cached_tokens(messages)},
+            }
+            usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+            if body.get("stream"):
+                self._stream(body, content, usage)
+            else:
+                self._send_json(200, {
+                    "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                                 "finish_reason": "stop"}],
+                    "usage": usage,
+                })
+            state.count("ok", call_type or "unknown", delay)
+        finally:
+            if state.gate:
+                state.gate.release()
+
+    def _stream(self, body: Dict, content: str, usage: Dict) -> None:
+        """Server-sent events in chat.completion.chunk form; usage on a trailing chunk when asked."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        base = {"id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": body.get("model", "stub")}
+
+        def send(payload: str) -> None:
+            data = f"data: {payload}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+        try:
+            for i in range(0, len(content), 8):
+                send(json.dumps({**base, "choices": [{"index": 0, "delta": {"content": content[i:i + 8]},
+                                                      "finish_reason": None}]}))
+            send(json.dumps({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}))
+            if (body.get("stream_options") or {}).get("include_usage"):
+                send(json.dumps({**base, "choices": [], "usage": usage}))
+            send("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client stopped reading early (streamed early stop)
+            self.close_connection = True
+
+
+def make_server(settings: StubSettings, host: str = "127.0.0.1", port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """A ready-to-serve stub server and its OpenAI base URL (port 0 picks a free port)."""
+    handler = type("BoundStubHandler", (StubHandler,), {"state": StubState(settings)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def start_in_thread(settings: StubSettings, host: str = "127.0.0.1", port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve in a daemon thread (for tests and in-process load runs); stop with `server.shutdown()`."""
+    server, url = make_server(settings, host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, url
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Local OpenAI-compatible chat-completions stub for load testing "
+                    "(run the game with --base-url http://127.0.0.1:<port>/v1)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", default="fixed:0",
+                        help='Response delay: "fixed:S", "uniform:A,B", "exp:MEAN" or "lognormal:MEDIAN,SIGMA" (seconds)')
+    parser.add_argument("--error-429", type=float, default=0.0, help="Share of requests answered with 429")
+    parser.add_argument("--error-500", type=float, default=0.0, help="Share of requests answered with 500")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Share of requests that hang without a reply")
+    parser.add_argument("--hang-seconds", type=float, default=120.0, help="How long a timed-out request hangs")
+    parser.add_argument("--max-rps", type=float, help="Throughput cap; excess requests get 429 with Retry-After")
+    parser.add_argument("--max-concurrency", type=int, help="Requests served at once; others wait")
+    parser.add_argument("--seed", type=int, help="Seed for latencies, faults and replies")
+    args = parser.parse_args()
+    server, url = make_server(StubSettings(
+        latency=args.latency, error_429=args.error_429, error_500=args.error_500, timeout_rate=args.timeout_rate,
+        hang_seconds=args.hang_seconds, max_rps=args.max_rps, max_concurrency=args.max_concurrency, seed=args.seed,
+    ), args.host, args.port)
+    print(f"Stub chat-completions API at {url} (stats: {url}/stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
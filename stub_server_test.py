@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for the local OpenAI-compatible stub server (no API calls).
+"""
+
+import json
+import urllib.request
+
+import pytest
+from langchain_openai import ChatOpenAI
+
+from llm_calls import CallMeter, call_context, invoke_llm
+from prompts import build_messages, instruction, player_system_prompt
+from response_parsing import parse_response
+from stub_server import LatencyModel, StubSettings, start_in_thread
+
+TARGETS = ["Alice", "Bob", "Charlie"]
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**settings):
+        server, url = start_in_thread(StubSettings(seed=7, **settings))
+        servers.append(server)
+        return url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _client(url):
+    return ChatOpenAI(model="gpt-4o-mini", base_url=url, api_key="x", max_retries=0, timeout=5, stream_usage=True)
+
+
+def _messages(call_type, **params):
+    return build_messages(player_system_prompt("You are Alice, a Villager." + " Rules." * 300), "Bob: hi",
+                          instruction(call_type, **params))
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_replies_parse_for_each_call_type(stub, stream):
+    url = stub()
+    llm, meter = _client(url), CallMeter()
+    with call_context(meter=meter):
+        for call_type, params in [("eliminate", {"targets": ", ".join(TARGETS)}), ("debate", {}), ("vote", {"deception_info": "", "targets": ", ".join(TARGETS)})]:
+            text, _info = invoke_llm(llm, _messages(call_type, **params), call_type, max_tokens=100, stream=stream)
+            parsed, ok = parse_response(text, call_type, choices={"target": TARGETS, "vote": TARGETS})
+            assert ok, parsed
+        text, _info = invoke_llm(llm, _messages("bid", player_name="Alice"), "bid", max_tokens=5, stream=stream)
+        assert 0 <= int(text) <= 10
+    totals = meter.totals()
+    assert totals["calls"] == 4 and totals["prompt_tokens"] > 0
+    # Same system prefix after the first call is reported as cached
+    assert totals["cached_tokens"] > 0
+
+
+def test_injected_errors_and_rate_cap(stub):
+    url = stub(error_500=1.0)
+    with pytest.raises(Exception) as failure:
+        _client(url).invoke("hello")
+    assert "500" in str(failure.value) or "Internal" in str(failure.value)
+
+    url = stub(max_rps=1)
+    _client(url).invoke("hello")
+    with pytest.raises(Exception) as failure:
+        _client(url).invoke("hello")
+    assert "429" in str(failure.value) or "Rate limit" in str(failure.value)
+    stats = json.load(urllib.request.urlopen(url + "/stats"))
+    assert stats["ok"] == 1 and stats["rate_limited"] == 1
+
+
+def test_early_stopped_streams_end_quietly(stub, capfd):
+    url = stub()
+    llm = _client(url)
+    with call_context(stream=True):
+        for _ in range(3):
+            _text, info = invoke_llm(llm, _messages("debate"), "debate", max_tokens=100)
+            assert info["early_stop"]
+    assert json.load(urllib.request.urlopen(url + "/stats"))["ok"] == 3
+    assert "Traceback" not in capfd.readouterr().err
+
+
+def test_latency_specs():
+    import random
+    rng = random.Random(0)
+    assert LatencyModel("fixed:0.25").sample(rng) == 0.25
+    assert all(0.1 <= LatencyModel("uniform:0.1,0.2").sample(rng) <= 0.2 for _ in range(20))
+    assert LatencyModel("lognormal:0.5,0.3").sample(rng) > 0
+    with pytest.raises(ValueError):
+        LatencyModel("gamma:1")
@@ -0,0 +1,143 @@
+import re
+import threading
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from llm_calls import invoke_llm
+from prompts import build_messages, estimate_tokens, format_dialogue
+
+ACCUSATION_RE = re.compile(r"\b(suspect|suspicious|werewolf|wolf|lying|liar|vote|exile|accuse)\w*", re.IGNORECASE)
+
+ROUND_SUMMARY_SYSTEM_PROMPT = """
+You compress finished rounds of a Werewolf debate into short neutral notes for the players.
+Keep who accused whom, who defended whom, and any role claims. At most 60 words. Plain text only.
+"""
+
+
+def extractive_summary(round_num: int, lines: List[Tuple[str, str]], players: Optional[List[str]] = None) -> str:
+    """
+    Cheap local summary of a finished round: who spoke, who was accused most
+    (among `players`, or the round's speakers if unknown), and the round's last line.
+    No model call.
+    """
+    speakers = list(dict.fromkeys(s for s, _ in lines))
+    accused = Counter()
+    for speaker, text in lines:
+        if not ACCUSATION_RE.search(text):
+            continue
+        for other in players or speakers:
+            if other != speaker and re.search(rf"\b{re.escape(other)}\b", text):
+                accused[other] += 1
+    parts = [f"Round {round_num}: {len(lines)} lines from {', '.join(speakers) or 'nobody'}."]
+    if accused:
+        parts.append("Most accused: " + ", ".join(f"{n} ({c})" for n, c in accused.most_common(3)) + ".")
+    if lines:
+        parts.append(f'Last word, {lines[-1][0]}: "{lines[-1][1]}"')
+    return " ".join(parts)
+
+
+def make_llm_summarizer(llm) -> Callable[..., str]:
+    """Round summarizer backed by a model call (call type "round_summary")."""
+    def summarize(round_num: int, lines: List[Tuple[str, str]], players: Optional[List[str]] = None) -> str:
+        messages = build_messages(ROUND_SUMMARY_SYSTEM_PROMPT, format_dialogue(lines),
+                                  f"Summarize round {round_num}.")
+        text, _info = invoke_llm(llm, messages, "round_summary", max_tokens=120)
+        return f"Round {round_num}: {text}"
+    return summarize
+
+
+class DebateTranscript:
+    """
+    Prompt-side view of the debate with bounded size.
+
+    Lines of the current round are kept verbatim in a sliding window of the
+    most recent `window` lines; each finished round is compressed once into a
+    cached summary. `render` fits the result into a token budget by dropping
+    the oldest summaries first, then the oldest verbatim lines, so per-turn
+    prompt cost stays flat however long the game runs.
+    """
+
+    def __init__(self, window: int = 12, token_budget: Optional[int] = None,
+                 summarizer: Callable[..., str] = extractive_summary, players: Optional[List[str]] = None):
+        self.window = window
+        self.players = players
+        self.token_budget = token_budget
+        self.summarizer = summarizer
+        self._rounds: Dict[int, List[Tuple[str, str]]] = {}
+        self._rendered: Dict[int, List[str]] = {}  # formatted lines per round, built on append
+        self._summaries: Dict[int, str] = {}
+        self._current_round: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_log(cls, debate_log: List[List[str]], round_num: int = 0, **kwargs) -> "DebateTranscript":
+        transcript = cls(**kwargs)
+        for speaker, text in debate_log:
+            transcript.add(round_num, speaker, text)
+        return transcript
+
+    def add(self, round_num: int, speaker: str, text: str) -> None:
+        with self._lock:
+            self._rounds.setdefault(round_num, []).append((speaker, text))
+            self._rendered.setdefault(round_num, []).append(f"{speaker}: {text}")
+            if self._current_round is None or round_num > self._current_round:
+                self._current_round = round_num
+
+    def start_round(self, round_num: int) -> None:
+        """
+        Make `round_num` the current round before its first line, so `recent`
+        is empty and `render` shows the previous round as a summary.
+        """
+        with self._lock:
+            if self._current_round is None or round_num > self._current_round:
+                self._current_round = round_num
+
+    def recent(self, n: Optional[int] = None) -> List[List[str]]:
+        """Last `n` (default `window`) lines of the current round as [speaker, text]."""
+        lines = self._rounds.get(self._current_round, [])
+        return [list(line) for line in lines[-(n or self.window):]]
+
+    def _summarize(self, round_num: int, lines: List[Tuple[str, str]]) -> str:
+        """Summary of a finished round; the local extractive one if the summarizer fails or times out."""
+        try:
+            return self.summarizer(round_num, lines, self.players)
+        except Exception:
+            return extractive_summary(round_num, lines, self.players)
+
+    def render(self, token_budget: Optional[int] = None) -> str:
+        budget = token_budget if token_budget is not None else self.token_budget
+        with self._lock:
+            if self._current_round is None:
+                return ""
+            finished = [r for r in sorted(self._rounds) if r < self._current_round]
+            missing = {r: list(self._rounds[r]) for r in finished if r not in self._summaries}
+            current = self._rendered.get(self._current_round, [])
+            verbatim = current[-self.window:]
+            omitted = len(current) - len(verbatim)
+
+        # Summarize outside the lock: the summarizer may be a model call. Finished
+        # rounds never change, so each is summarized once and the summary cached
+        made = {r: self._summarize(r, lines) for r, lines in missing.items()}
+        with self._lock:
+            for r, summary in made.items():
+                self._summaries.setdefault(r, summary)
+            summaries = [self._summaries[r] for r in finished]
+
+        def assemble() -> str:
+            parts = []
+            if summaries:
+                parts.append("Earlier rounds:\n" + "\n".join(summaries))
+            if verbatim:
+                header = f"This round ({omitted} earlier lines omitted):" if omitted else "This round:"
+                parts.append(header + "\n" + "\n".join(verbatim))
+            return "\n\n".join(parts)
+
+        text = assemble()
+        while budget is not None and estimate_tokens(text) > budget and (summaries or len(verbatim) > 1):
+            if summaries:
+                summaries.pop(0)
+            else:
+                verbatim.pop(0)
+                omitted += 1
+            text = assemble()
+        return text
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for the bounded debate transcript (no LLM calls).
+"""
+
+from llm_calls import CallTimeout
+from transcript import DebateTranscript, estimate_tokens, extractive_summary
+
+def test_finished_rounds_are_summarized_once():
+    calls = []
+    def summarizer(round_num, lines, players):
+        calls.append(round_num)
+        return extractive_summary(round_num, lines, players)
+
+    t = DebateTranscript(window=3, summarizer=summarizer)
+    t.add(0, "Alice", "I suspect Bob is a werewolf")
+    t.add(0, "Bob", "Not me, vote Alice")
+    t.add(1, "Raj", "New day")
+    first = t.render()
+    second = t.render()
+    assert first == second
+    assert calls == [0]
+    assert "Round 0" in first and "Bob" in first
+    assert first.endswith("Raj: New day")
+
+def test_window_and_budget_keep_prompt_flat():
+    t = DebateTranscript(window=4, token_budget=120)
+    sizes = []
+    for r in range(10):
+        for i in range(8):
+            t.add(r, f"P{i}", f"round {r} line {i}: I suspect P{(i + 1) % 8} is lying about everything")
+        sizes.append(estimate_tokens(t.render()))
+    assert max(sizes) <= 120
+    rendered = t.render()
+    assert "line 7" in rendered and "line 3" not in rendered.split("This round")[-1]
+    assert [list(x) for x in t.recent(2)] == [["P6", "round 9 line 6: I suspect P7 is lying about everything"],
+                                               ["P7", "round 9 line 7: I suspect P0 is lying about everything"]]
+
+def test_start_round_clears_last_speaker():
+    t = DebateTranscript(window=3)
+    t.add(0, "Alice", "I suspect Bob")
+    t.add(0, "Bob", "Not me")
+    t.start_round(1)
+    assert t.recent(1) == []
+    rendered = t.render()
+    assert "This round" not in rendered and "Not me" in rendered.split("Earlier rounds:")[-1]
+    t.add(1, "Raj", "New day")
+    assert t.recent(1) == [["Raj", "New day"]]
+
+def test_failed_summarizer_falls_back_to_extractive_summary():
+    def summarizer(round_num, lines, players):
+        assert not t._lock.locked()  # a model call must not run under the transcript lock
+        raise CallTimeout("round_summary call timed out")
+
+    t = DebateTranscript(window=3, summarizer=summarizer, players=["Alice", "Bob"])
+    t.add(0, "Alice", "I suspect Bob")
+    t.start_round(1)
+    assert t.render() == "Earlier rounds:\n" + extractive_summary(0, [("Alice", "I suspect Bob")], ["Alice", "Bob"])
+
+if __name__ == "__main__":
+    test_finished_rounds_are_summarized_once()
+    test_window_and_budget_keep_prompt_flat()
+    test_start_round_clears_last_speaker()
+    test_failed_summarizer_falls_back_to_extractive_summary()
+    print("Transcript tests passed")